@@ -13,4 +13,10 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djangoproject.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# The event stream of the players is served by the ASGI application, and the
+# rest of the requests by Django
+from djapi.event_stream import EventStreamRouter
+
+application = EventStreamRouter(django_application)
@@ -47,7 +47,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'djapi.token_expire.ExpiringTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -63,9 +63,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',    
-    'djapi.token_expire.TokenExpirationMiddleware'
-
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'djangoproject.urls'
@@ -88,20 +86,59 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'djangoproject.wsgi.application'
 
+# Excludes the benchmark from the test runs, unless it is requested with --tag benchmark
+TEST_RUNNER = 'djapi.test_runner.TestRunner'
+
 
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': os.environ.get('POSTGRES_NAME'),
-        'USER': os.environ.get('POSTGRES_USER'),
-        'PASSWORD': os.environ.get('POSTGRES_PASSWORD'),
-        'HOST': 'db',
-        'PORT': 5432,
+# PostgreSQL is used when its configuration is available (Docker). Otherwise, a local
+# SQLite database is used, which allows running the tests and the benchmarks offline.
+if os.environ.get('POSTGRES_NAME'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_NAME'),
+            'USER': os.environ.get('POSTGRES_USER'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD'),
+            'HOST': 'db',
+            'PORT': 5432,
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            # Concurrent writers wait for the lock instead of failing
+            'OPTIONS': {'timeout': 30},
+            # The test database is stored in a file, so it can be shared between threads
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+        }
+    }
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+# The leaderboards, the rankings among friends, the lists of tournaments and the
+# revoked tokens are kept in the cache, and every process must see the changes of
+# the others, so a shared Redis cache is used when it is available (Docker). Otherwise,
+# the cache is local to the process, which is only valid with a single process
+# (the tests and the local development server).
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
     }
-}
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -146,14 +183,89 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'djapi.CustomUser'
 TOKEN_EXPIRED_AFTER_SECONDS = 3600  # Time of the token expiration in seconds 
+# 'database' stores the tokens in the database. 'signed' issues signed tokens that are
+# verified without querying the database (revoked tokens are stored in the cache, which
+# must be shared by every process: see CACHES).
+TOKEN_MODE = os.environ.get('TOKEN_MODE', 'database')
+TOKEN_CACHE_TIMEOUT = 60  # Time in seconds that a validated token is kept in the process cache
+TOKEN_CACHE_MAX_SIZE = 10000  # Max number of validated tokens kept in the process cache
+
+# If enabled, the increments of the player counters are accumulated in memory and
+# written every PLAYER_STATS_FLUSH_INTERVAL seconds, one UPDATE per player.
+PLAYER_STATS_WRITE_BEHIND = False
+PLAYER_STATS_FLUSH_INTERVAL = 1.0
+
+# Backend of the events pushed to the players by the ASGI event stream (/api/events/).
+# 'djapi.events.LocalBackend' works when the API and the stream run in one process, and
+# 'djapi.events.PostgresBackend' sends the events between processes with LISTEN/NOTIFY.
+EVENTS_BACKEND = os.environ.get('EVENTS_BACKEND', 'djapi.events.LocalBackend')
+EVENT_STREAM_KEEPALIVE = 15  # Seconds between the keepalive comments of an idle stream and the checks of the token
+EVENT_STREAM_TICKET_TIMEOUT = 60  # Seconds that a ticket to open the event stream is valid
+
+# Read notifications older than this number of days are deleted by compact_notifications
+NOTIFICATION_RETENTION_DAYS = 30
+
+# The notifications of the views are written with bulk_create when the transaction is
+# committed. If enabled, they are written by a background thread every
+# NOTIFICATION_OUTBOX_FLUSH_INTERVAL seconds instead, out of the request.
+NOTIFICATION_OUTBOX_WRITE_BEHIND = False
+NOTIFICATION_OUTBOX_FLUSH_INTERVAL = 0.5
+NOTIFICATION_OUTBOX_MAX_SIZE = 10000  # Max notifications queued, the oldest are discarded
+
+# Number of players of every leaderboard, and max seconds before they are rebuilt
+LEADERBOARD_SIZE = 100
+LEADERBOARD_TIMEOUT = 300
+
+# The lists of tournaments are cached until a tournament changes, and at most this time
+TOURNAMENT_LIST_TIMEOUT = 300
+TOURNAMENT_LIST_LOCK_TIMEOUT = 5  # Max seconds waiting for a list that another request is reading
+
+# The rankings among friends are cached until a player or a friend changes, and at most this time
+FRIEND_RANKING_TIMEOUT = 300
+
+# Search of the players: 'database' (PostgreSQL indexes) or 'memory' (sorted index
+# kept by each process). By default, 'database' with PostgreSQL and 'memory' otherwise.
+PLAYER_SEARCH_BACKEND = os.environ.get('PLAYER_SEARCH_BACKEND')
+PLAYER_SEARCH_MIN_SUBSTRING_LENGTH = 3
+PLAYER_SEARCH_INDEX_TIMEOUT = 60  # Max seconds before the in-memory index is rebuilt
+
+# The results of the games are computed by the server from the guesses sent by the
+# client. Temporary compatibility: while enabled, the games sent without guesses keep
+# the attempts, win and experience computed by the client.
+SCORING_TRUST_CLIENT_RESULTS = True
+
+# JSON file with the valid words of the game grouped by length. By default, the list
+# of the client (ionic-app/src/assets/words.json), so both use the same words.
+WORDS_FILE = os.environ.get('WORDS_FILE', os.path.join(BASE_DIR.parent, 'ionic', 'ionic-app', 'src', 'assets', 'words.json'))
 
 MEDIA_URL = '/avatars/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'avatars')
 
+# The avatars are stored with a thumbnail of every size (max width and height in pixels)
+AVATAR_SIZES = {'small': 64, 'medium': 256}
+AVATAR_MAX_UPLOAD_SIZE = 5 * 1024 * 1024  # Bytes
+AVATAR_MAX_PIXELS = 4096 * 4096
+# The URLs of the avatar files are signed, and valid between this time and twice it (seconds)
+AVATAR_URL_TIMEOUT = 3600
+
+# Media files are streamed by Django ('django'), or by nginx with X-Accel-Redirect
+# ('x-accel'), once the view has checked the permissions. In x-accel mode, the
+# files are not served through MEDIA_URL.
+MEDIA_SERVING = os.environ.get('MEDIA_SERVING', 'django')
+MEDIA_ACCEL_PREFIX = '/protected-media/'  # Internal location of nginx with MEDIA_ROOT
+# Origin of the URLs of the media files given to the clients (nginx). Required with
+# 'x-accel'. If not defined, the URLs are built on the host of the request.
+MEDIA_ORIGIN = os.environ.get('MEDIA_ORIGIN')
+
 ## Conection with the FrontEnd
 
 CORS_ALLOWED_ORIGINS = [
     'http://localhost:8100', # Ionic in local (dev)
     'http://localhost', # Ionic in Docker
 ]
-CORS_ALLOW_REDIRECTS = False
\ No newline at end of file
+CORS_ALLOW_REDIRECTS = False
+# Headers of the API that the FrontEnd can read (the cursor of the next page)
+CORS_EXPOSE_HEADERS = [
+    'Link',
+    'X-Next-Cursor',
+]
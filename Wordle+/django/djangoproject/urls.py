@@ -29,6 +29,7 @@ router.register(r'api/classicwordles', views.ClassicWordleViewSet)
 router.register(r'api/notifications', views.NotificationsViewSet)
 router.register(r'api/games', views.GameViewSet)
 router.register(r'api/tournaments', views.TournamentViewSet)
+router.register(r'api/words', views.WordsViewSet, basename='words')
 router.register('api/friendlist', FriendListViewSet, basename='friendlist')
 router.register('api/friendrequest', FriendRequestViewSet, basename='friendrequest')
 
@@ -39,13 +40,18 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api-token-auth/', CustomObtainAuthToken.as_view()),
     path('check-token-expiration/', CheckTokenExpirationView.as_view(), name='check-token-expiration'),
+    path('api-token-logout/', LogoutView.as_view(), name='token-logout'),
+    path('api/events/ticket/', EventTicketView.as_view(), name='event-ticket'),
     
     path('api/avatar/<int:user_id>/', AvatarView.as_view(), name='avatar'),
+    path('api/avatar/<int:user_id>/<str:digest>/<str:size>/', AvatarFileView.as_view(), name='avatar-file'),
+    path('api/avatars/', AvatarBatchView.as_view(), name='avatars'),
     path('api/users-info/', UserInfoAPIView.as_view(), name='user-detail'),
     path('api/participations/', ParticipationViewSet.as_view({'get': 'list', 'post': 'create'}), name='participations'),
     path('api/list-players/', PlayerListAPIView.as_view(), name='player-list'),
     path('api/games/<int:pk>/tournament/', views.GameViewSet.as_view({'patch': 'tournament'}), name='game-partial-update-tournament'),
+]
 
-
-    
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+# The media files are only served as static files when Django streams them
+if settings.MEDIA_SERVING == 'django':
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
@@ -5,9 +5,10 @@ from django.contrib.auth.admin import UserAdmin
 from django.db import models
 from django import forms
 from django.core.validators import MaxValueValidator
-import math
 
 from .models import *
+from .friend_graph import remove_friendship
+from .tournaments import JoinError, join_tournament
 
 class CustomUserAdmin(UserAdmin):
     model = CustomUser
@@ -123,35 +124,12 @@ class ParticipationAdmin(admin.ModelAdmin):
 
     # Checks if a new participation can be added
     def save_model(self, request, obj, form, change):
-        tournament = obj.tournament
-        if (tournament.num_players >= tournament.max_players):
-            raise forms.ValidationError("The max number of participations for this tournament has been reached.")
-            
-        tournament.num_players += 1
-        super().save_model(request, obj, form, change)
-
-        # If the tournament is full, create the rounds and the games of the first round
-        if (tournament.num_players >= tournament.max_players):
-            tournament.is_closed = True
-            rounds = int(math.log2(tournament.max_players))
-            for round_number in range(1, rounds+1):
-                round = Round.objects.create(tournament=tournament, number=round_number)
-                if round_number == 1:
-                    participants = Participation.objects.filter(tournament=tournament)
-                    participants_count = participants.count()
-                    for i in range(0, participants_count, 2):
-                        player1 = participants[i].player
-                        player2 = participants[i + 1].player
-                        new_game = Game.objects.create(player1=player1, player2=player2, is_tournament_game=True)
-                        RoundGame.objects.create(round=round, game=new_game)
-
-        tournament.save()
-
-        player = obj.player
-        message = f"You were assigned in {tournament.name}. Good luck!"
-        link = "http://localhost/tabs/tournaments"
-        notification = Notification.objects.create(player=player, text=message, link=link)
-        notification.save()
+        if change:
+            return super().save_model(request, obj, form, change)
+        try:
+            join_tournament(obj)
+        except JoinError as error:
+            raise forms.ValidationError(str(error))
 
     # Decreases the number of the players of the tournament
     def delete_model(self, request, obj):
@@ -186,6 +164,24 @@ class ParticipationAdmin(admin.ModelAdmin):
 class FriendListAdmin(admin.ModelAdmin):
     list_display = ('id', 'sender', 'receiver',)
 
+    # The friendships are stored in both directions, so the rows can not be edited
+    def get_readonly_fields(self, request, obj=None):
+        return ('sender', 'receiver') if obj else ()
+
+    # Adds the reverse row of the new friendship
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if not change:
+            FriendList.objects.get_or_create(sender_id=obj.receiver_id, receiver_id=obj.sender_id)
+
+    # Deletes both rows of the friendship
+    def delete_model(self, request, obj):
+        remove_friendship(obj.sender_id, obj.receiver_id)
+
+    def delete_queryset(self, request, queryset):
+        for sender_id, receiver_id in queryset.values_list('sender_id', 'receiver_id'):
+            remove_friendship(sender_id, receiver_id)
+
 class FriendRequestAdmin(admin.ModelAdmin):
     list_display = ('id', 'sender', 'receiver',)
 
@@ -6,4 +6,5 @@ class DjapiConfig(AppConfig):
     name = 'djapi'
 
     def ready(self):
+        import djapi.checks
         import djapi.signals
@@ -0,0 +1,246 @@
+import base64
+import binascii
+import hashlib
+import re
+import time
+from io import BytesIO
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.signing import Signer
+from django.utils.crypto import constant_time_compare
+from django.db.models import Exists, OuterRef, Q
+from PIL import Image, ImageOps
+from djapi.leaderboards import LEADERBOARD_FIELDS, cached_leaderboards, top_players
+from djapi.models import CustomUser, FriendList, Game, Participation
+
+# Avatars of the users. The uploaded image is decoded and validated once, and it
+# is stored with the hash of its content in the name, with thumbnails of every
+# size of AVATAR_SIZES next to it:
+#   avatars/<sha256>.png, avatars/<sha256>_small.png, avatars/<sha256>_medium.png
+#
+# The content of a file never changes, so its URL (/api/avatar/<user_id>/<sha256>/<size>/)
+# is cached by the clients, and a new avatar gets a new URL.
+#
+# The images are requested without credentials (<img> tags), so the URLs are signed
+# and they expire: they are only given to the users that can see the avatar (its
+# owner, and visible_avatars), and the file view only checks the signature. The
+# expiration time is rounded, so the URL of an avatar does not change for
+# AVATAR_URL_TIMEOUT seconds and the clients can cache it.
+
+AVATAR_DIRECTORY = 'avatars'
+# Formats accepted, with the extension of their files
+FORMATS = {'PNG': 'png', 'JPEG': 'jpg', 'GIF': 'gif', 'WEBP': 'webp'}
+CONTENT_TYPES = {'png': 'image/png', 'jpg': 'image/jpeg', 'gif': 'image/gif', 'webp': 'image/webp'}
+AVATAR_NAME = re.compile(AVATAR_DIRECTORY + r'/(?P<digest>[0-9a-f]{64})\.(?P<extension>\w+)$')
+AVATAR_URL_SALT = 'djapi.avatars'
+
+
+# Error of an uploaded image that is not valid, with the message for the user
+class AvatarError(Exception):
+    pass
+
+
+def avatar_sizes():
+    return getattr(settings, 'AVATAR_SIZES', {'small': 64, 'medium': 256})
+
+def max_upload_size():
+    return getattr(settings, 'AVATAR_MAX_UPLOAD_SIZE', 5 * 1024 * 1024)
+
+def max_pixels():
+    return getattr(settings, 'AVATAR_MAX_PIXELS', 4096 * 4096)
+
+# Min seconds that a signed URL is valid (max twice this time)
+def url_timeout():
+    return getattr(settings, 'AVATAR_URL_TIMEOUT', 3600)
+
+
+# Returns the bytes of an uploaded avatar. It can be an uploaded file, the bytes of
+# the image, or a string with the image in base64, optionally as a data URL
+# (data:image/png;base64,...).
+def read_upload(upload):
+    if isinstance(upload, bytes):
+        return upload
+    if hasattr(upload, 'read'):
+        if upload.size > max_upload_size():
+            raise AvatarError('The image is too big.')
+        return upload.read()
+
+    if not isinstance(upload, str):
+        raise AvatarError('Invalid image.')
+    if upload.startswith('data:'):
+        upload = upload.partition(',')[2]
+    # The size is checked before decoding, 4 base64 characters are 3 bytes
+    if len(upload) > max_upload_size() * 4 // 3 + 4:
+        raise AvatarError('The image is too big.')
+    try:
+        return base64.b64decode(upload, validate=True)
+    except (binascii.Error, ValueError):
+        raise AvatarError('Invalid image.')
+
+# Returns the image of the content, checking that it is a complete image of an
+# accepted format and size
+def open_image(content):
+    try:
+        image = Image.open(BytesIO(content))
+        if image.format not in FORMATS:
+            raise AvatarError(f'The image must be one of: {", ".join(FORMATS)}.')
+        if image.width * image.height > max_pixels():
+            raise AvatarError('The image is too big.')
+        image.load()
+    except AvatarError:
+        raise
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        raise AvatarError('Invalid image.')
+    return image
+
+# The thumbnails of the photos are JPEG, and the others are PNG, which keeps the transparency
+def thumbnail_extension(extension):
+    return 'jpg' if extension == 'jpg' else 'png'
+
+def thumbnail(image, size, extension):
+    thumbnail = ImageOps.exif_transpose(image)
+    thumbnail.thumbnail((size, size))
+    output = BytesIO()
+    if extension == 'jpg':
+        thumbnail.convert('RGB').save(output, 'JPEG', quality=85, optimize=True)
+    else:
+        if thumbnail.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+            thumbnail = thumbnail.convert('RGBA')
+        thumbnail.save(output, 'PNG', optimize=True)
+    return output.getvalue()
+
+
+# Name of the file of an avatar with the given size ('original' or a thumbnail)
+def file_name(digest, extension, size='original'):
+    if size == 'original':
+        return f'{AVATAR_DIRECTORY}/{digest}.{extension}'
+    return f'{AVATAR_DIRECTORY}/{digest}_{size}.{thumbnail_extension(extension)}'
+
+# Returns (digest, extension) of a stored avatar name, or None if it was stored
+# before the avatars were content addressed
+def parse_name(name):
+    match = AVATAR_NAME.match(name or '')
+    return (match['digest'], match['extension']) if match else None
+
+def file_names(digest, extension):
+    return [file_name(digest, extension)] + [file_name(digest, extension, size) for size in avatar_sizes()]
+
+# Stores the uploaded avatar of the user and its thumbnails, and removes the
+# previous one. Raises AvatarError if the image is not valid.
+def save_avatar(user, upload):
+    content = read_upload(upload)
+    if len(content) > max_upload_size():
+        raise AvatarError('The image is too big.')
+    image = open_image(content)
+
+    digest = hashlib.sha256(content).hexdigest()
+    extension = FORMATS[image.format]
+    name = file_name(digest, extension)
+    # Equal images are stored once
+    for size, pixels in avatar_sizes().items():
+        if not default_storage.exists(file_name(digest, extension, size)):
+            default_storage.save(file_name(digest, extension, size), ContentFile(thumbnail(image, pixels, extension)))
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(content))
+
+    previous = user.avatar.name
+    user.avatar.name = name
+    user.save(update_fields=['avatar'])
+    if previous and previous != name:
+        delete_files(previous)
+    return digest
+
+# Deletes the files of an avatar if no other user has it
+def delete_files(name):
+    if CustomUser.objects.filter(avatar=name).exists():
+        return
+    parsed = parse_name(name)
+    for stored in file_names(*parsed) if parsed else [name]:
+        default_storage.delete(stored)
+
+# The avatars stored as text by the previous versions are converted the first time
+# they are read. Returns False if the stored avatar is not a valid image.
+def convert_legacy_avatar(user):
+    try:
+        with default_storage.open(user.avatar.name, 'rb') as legacy:
+            content = legacy.read()
+    except OSError:
+        return False
+
+    # The legacy files have the image, or the data URL sent by the client
+    try:
+        save_avatar(user, content)
+    except AvatarError:
+        try:
+            save_avatar(user, content.decode('utf-8'))
+        except (AvatarError, UnicodeDecodeError):
+            return False
+    return True
+
+
+# Returns the paths of the URLs of every size of the avatar of the user, or None
+# if the user has no avatar
+def avatar_paths(user):
+    parsed = parse_name(user.avatar.name)
+    if parsed is None:
+        return None
+    return {size: avatar_path(user.id, parsed[0], size) for size in ['original', *avatar_sizes()]}
+
+# Signed path of the avatar file
+def avatar_path(user_id, digest, size):
+    timeout = url_timeout()
+    expires = (int(time.time()) // timeout + 2) * timeout
+    query = urlencode({'expires': expires, 'signature': url_signature(user_id, digest, size, expires)})
+    return f'/api/avatar/{user_id}/{digest}/{size}/?{query}'
+
+def url_signature(user_id, digest, size, expires):
+    return Signer(salt=AVATAR_URL_SALT).signature(f'{user_id}:{digest}:{size}:{expires}')
+
+# Checks the signature of the URL of an avatar file. Returns the expiration time,
+# or None if the signature is not valid or the URL has expired.
+def check_url_signature(user_id, digest, size, expires, signature):
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return None
+    if expires <= time.time() or not constant_time_compare(signature or '', url_signature(user_id, digest, size, expires)):
+        return None
+    return expires
+
+# Returns {user_id: avatar name} of the given users whose avatar can be seen by the
+# viewer, with a single query. The staff see every avatar, and the players see
+# their own, the ones of the players in the rankings, of their friends, and of the
+# players they have played a game or a tournament with. The players in the rankings
+# are read from the cached leaderboards, and the ones that are not cached are
+# subqueries of the same query (they are not rebuilt).
+def visible_avatars(viewer, user_ids):
+    users = CustomUser.objects.filter(id__in=user_ids).exclude(Q(avatar='') | Q(avatar=None))
+    if not viewer.is_staff:
+        leaderboards = cached_leaderboards()
+        ranked = Q(id__in={entry['user']['id'] for entries in leaderboards.values() for entry in entries})
+        for field in LEADERBOARD_FIELDS:
+            if field not in leaderboards:
+                ranked |= Q(player__in=top_players(field).values('id'))
+        friends = FriendList.objects.filter(sender__user=viewer, receiver=OuterRef('player'))
+        opponents = Game.objects.filter(Q(player1__user=viewer, player2=OuterRef('player')) |
+                                        Q(player2__user=viewer, player1=OuterRef('player')))
+        rivals = Participation.objects.filter(player=OuterRef('player'), tournament__participation__player__user=viewer)
+        users = users.filter(Q(id=viewer.id) | ranked | Exists(friends) | Exists(opponents) | Exists(rivals))
+    return dict(users.values_list('id', 'avatar'))
+
+# Returns the thumbnail of the given avatar as a data URL, or None if the avatar was
+# stored before the avatars were content addressed
+def inline_thumbnail(name, size):
+    parsed = parse_name(name)
+    if parsed is None:
+        return None
+    thumbnail_name = file_name(*parsed, size)
+    try:
+        with default_storage.open(thumbnail_name, 'rb') as stored:
+            content = stored.read()
+    except OSError:
+        return None
+    content_type = CONTENT_TYPES[thumbnail_name.rsplit('.', 1)[1]]
+    return f'data:{content_type};base64,' + base64.b64encode(content).decode()
@@ -0,0 +1,81 @@
+import math
+from django.db import transaction
+from django.utils import timezone
+from djapi.events import publish_to_players
+from djapi.models import Game, Participation, Player, Round, RoundGame, Tournament
+from djapi.outbox import notify_players
+from djapi.stats import add_player_stats
+from djapi.tournament_lists import invalidate_tournament_lists
+
+# Advancement of the brackets of the tournaments. When the last game of a round
+# gets a winner, the winners are paired in the games of the next round, or the
+# tournament ends if it was the last round.
+#
+# The round is advanced in one transaction that locks the tournament, so when the
+# last two results of a round are saved at the same time, the second transaction
+# waits for the first one and sees its winner: the round is advanced exactly once.
+# In the same way, the tournament is marked as finished when the final ends, so
+# saving the final again does not end it (and reward its winner) again.
+# The number of queries does not depend on the size of the tournament.
+
+TOURNAMENTS_LINK = 'http://localhost/tabs/tournaments'
+
+
+# Creates the games of a round between the pairs of players, (player1_id, player2_id)
+def create_round_games(round, pairs):
+    games = Game.objects.bulk_create([
+        Game(player1_id=player1_id, player2_id=player2_id, is_tournament_game=True) for player1_id, player2_id in pairs
+    ])
+    RoundGame.objects.bulk_create([RoundGame(round=round, game=game) for game in games])
+    return games
+
+# Advances the tournament of the game if it was the last game of its round.
+# Returns the number of the new round, 0 if the tournament has ended, or None if
+# the round is not completed yet.
+def advance_round(game):
+    if not game.is_tournament_game or game.winner_id is None:
+        return None
+
+    with transaction.atomic():
+        round_game = RoundGame.objects.filter(game=game).values('round_id', 'round__number', 'round__tournament_id').first()
+        if round_game is None:
+            return None
+        tournament = Tournament.objects.select_for_update().get(pk=round_game['round__tournament_id'])
+        # The round was already advanced by another result, or the tournament has ended
+        if tournament.is_finished or tournament.current_round != round_game['round__number']:
+            return None
+
+        winners = list(Game.objects.filter(roundgame__round_id=round_game['round_id'])
+                       .order_by('roundgame__id').values_list('winner_id', flat=True))
+        if None in winners:
+            return None
+
+        participants = list(Participation.objects.filter(tournament=tournament).values_list('player_id', flat=True))
+        if tournament.current_round >= int(math.log2(tournament.max_players)):
+            # Conditional update, so only one transaction ends the tournament
+            if not Tournament.objects.filter(pk=tournament.pk, is_finished=False) \
+                    .update(is_finished=True, updated_at=timezone.now()):
+                return None
+            tournament.is_finished = True
+            invalidate_tournament_lists()
+            end_tournament(tournament, game.winner_id, participants)
+            return 0
+
+        next_round_number = tournament.current_round + 1
+        next_round = Round.objects.get(tournament=tournament, number=next_round_number)
+        create_round_games(next_round, zip(winners[0::2], winners[1::2]))
+        Tournament.objects.filter(pk=tournament.pk).update(current_round=next_round_number, updated_at=timezone.now())
+        tournament.current_round = next_round_number
+        invalidate_tournament_lists()
+
+        publish_to_players(participants, 'round', {'tournament': tournament.id, 'round': next_round_number})
+        notify_players(participants, f"Round {next_round_number} of {tournament.name} started. Good luck!",
+                       TOURNAMENTS_LINK)
+    return next_round_number
+
+def end_tournament(tournament, winner_id, participants):
+    winner = Player.objects.select_related('user').get(pk=winner_id)
+    add_player_stats(winner, wins_tournament=1, xp=1000)
+    publish_to_players(participants, 'tournament_end', {'tournament': tournament.id, 'winner': winner_id})
+    notify_players(participants, f"{tournament.name} has finished. The winner is {winner.user.username}!",
+                   TOURNAMENTS_LINK)
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Warning, register
+
+# Checks of the configuration that the features of djapi depend on
+
+
+# The revoked signed tokens are kept in the cache, so it must be shared by every
+# process. Otherwise, a token revoked by a process is still valid in the rest.
+@register()
+def check_signed_token_cache(app_configs, **kwargs):
+    if getattr(settings, 'TOKEN_MODE', 'database') != 'signed':
+        return []
+    if not isinstance(caches['default'], (LocMemCache, DummyCache)):
+        return []
+    return [Warning(
+        'TOKEN_MODE is "signed" but the default cache is local to the process.',
+        hint='The revoked tokens are only known by the process that revoked them. '
+             'Set REDIS_URL to use a shared cache, or run a single process.',
+        id='djapi.W001',
+    )]
+
+
+# With 'x-accel', the files are sent by nginx, so the URLs of the media files must
+# be on its origin. Otherwise, the clients that call Django directly get empty files.
+@register()
+def check_media_origin(app_configs, **kwargs):
+    if getattr(settings, 'MEDIA_SERVING', 'django') != 'x-accel' or getattr(settings, 'MEDIA_ORIGIN', None):
+        return []
+    return [Error(
+        'MEDIA_SERVING is "x-accel" but MEDIA_ORIGIN is not defined.',
+        hint='Set MEDIA_ORIGIN to the origin of nginx, for example http://localhost.',
+        id='djapi.E001',
+    )]
@@ -0,0 +1,62 @@
+import hashlib
+from functools import wraps
+from django.db.models import Count, Max
+from django.utils.http import parse_etags
+from rest_framework.response import Response
+
+# Conditional responses of the read endpoints. Every endpoint has a stamp, a cheap
+# value that changes when its response changes (e.g. the number of rows and the
+# last timestamp). The ETag is the hash of the stamp, the URL and the user, so a
+# client that sends If-None-Match with the current ETag gets a 304 Not Modified
+# without reading the rows or running the serializer.
+#
+# Example:
+#   @action(detail=False, methods=['get'])
+#   @conditional(lambda view, request: queryset_stamp(Game.objects.filter(...), 'timestamp'))
+#   def games(self, request): ...
+
+
+# Returns the ETag of the response of the request for the given stamp
+def make_etag(request, stamp):
+    value = repr((request.get_full_path(), request.user.pk, stamp))
+    return '"%s"' % hashlib.md5(value.encode()).hexdigest()
+
+# Returns the ETag and, if the client already has the current response, the 304
+# response that must be sent instead
+def check_etag(request, stamp):
+    etag = make_etag(request, stamp)
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        return etag, Response(status=304, headers=etag_headers(etag))
+    return etag, None
+
+# The clients keep the responses, but they must check them every time
+def etag_headers(etag):
+    return {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+
+# Stamp of the rows of a queryset: their number, the last value of the field and
+# the other aggregates given, computed with a single query
+def queryset_stamp(queryset, field, **aggregates):
+    stamp = queryset.aggregate(count=Count('pk'), last=Max(field), **aggregates)
+    return tuple(sorted(stamp.items()))
+
+# Decorator of the views with a conditional response. stamp(view, request) returns
+# the stamp of the response, or None to run the view without an ETag. The ETag is
+# only added to the successful responses.
+def conditional(stamp):
+    def decorator(function):
+        @wraps(function)
+        def view(self, request, *args, **kwargs):
+            value = stamp(self, request)
+            if value is None:
+                return function(self, request, *args, **kwargs)
+
+            etag, not_modified = check_etag(request, value)
+            if not_modified is not None:
+                return not_modified
+            response = function(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                for header, header_value in etag_headers(etag).items():
+                    response[header] = header_value
+            return response
+        return view
+    return decorator
@@ -0,0 +1,131 @@
+import json
+import random
+import threading
+from bisect import bisect_left
+from django.conf import settings
+
+# Word dictionary of the game. The word lists are loaded once per process from
+# the JSON file defined in settings.WORDS_FILE, which has the same format as the
+# one used by the client: {"4": ["abcd", ...], "5": ["abcde", ...], ...}
+
+
+# Sorted list of words of the same length packed in a single bytes object.
+# Every word takes exactly `length` bytes, so the i-th word is found by index
+# arithmetic and the lookups are binary searches without a Python string
+# object per word.
+class PackedWords(object):
+    def __init__(self, length, words):
+        self.length = length
+        unique_words = sorted(set(word.encode('ascii') for word in words))
+        self.data = b''.join(unique_words)
+        self.count = len(unique_words)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError('Word index out of range')
+        start = index * self.length
+        return self.data[start:start + self.length].decode('ascii')
+
+    def __contains__(self, word):
+        try:
+            key = word.encode('ascii')
+        except (AttributeError, UnicodeEncodeError):
+            return False
+        if len(key) != self.length:
+            return False
+
+        index = bisect_left(_PackedKeys(self), key)
+        return index < self.count and self._key(index) == key
+
+    def _key(self, index):
+        start = index * self.length
+        return self.data[start:start + self.length]
+
+    def random_word(self):
+        if not self.count:
+            return None
+        return self[random.randrange(self.count)]
+
+
+# Read only sequence view of the packed keys, used to bisect the packed words
+class _PackedKeys(object):
+    def __init__(self, packed):
+        self.packed = packed
+
+    def __len__(self):
+        return self.packed.count
+
+    def __getitem__(self, index):
+        return self.packed._key(index)
+
+
+class WordDictionary(object):
+    def __init__(self, words_by_length):
+        self.indexes = {}
+        for length, words in words_by_length.items():
+            length = int(length)
+            words = [word.strip().lower() for word in words if len(word.strip()) == length]
+            if words:
+                self.indexes[length] = PackedWords(length, words)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding='utf-8') as words_file:
+            return cls(json.load(words_file))
+
+    def __contains__(self, word):
+        if not isinstance(word, str):
+            return False
+        index = self.indexes.get(len(word))
+        return index is not None and word.lower() in index
+
+    def __bool__(self):
+        return bool(self.indexes)
+
+    def lengths(self):
+        return sorted(self.indexes)
+
+    def validate(self, words):
+        return {word: word in self for word in words}
+
+    def random_word(self, length):
+        index = self.indexes.get(length)
+        if index is None:
+            return None
+        return index.random_word()
+
+
+_dictionary = None
+_dictionary_lock = threading.Lock()
+
+# Returns the dictionary of the process, loading it the first time it is used.
+# If the words file does not exist, an empty dictionary is returned.
+def get_dictionary():
+    global _dictionary
+    if _dictionary is None:
+        with _dictionary_lock:
+            if _dictionary is None:
+                try:
+                    _dictionary = WordDictionary.from_file(settings.WORDS_FILE)
+                except FileNotFoundError:
+                    _dictionary = WordDictionary({})
+    return _dictionary
+
+# Forgets the loaded dictionary, so the next call to get_dictionary reads the
+# words file again.
+def reset_dictionary():
+    global _dictionary
+    with _dictionary_lock:
+        _dictionary = None
+
+# Checks if a word can be used in a game. When there is no dictionary
+# available every word is accepted, as the server can not decide, so the
+# games can still be played. The endpoints of the dictionary answer 503 instead.
+def is_valid_word(word):
+    dictionary = get_dictionary()
+    return not dictionary or word in dictionary
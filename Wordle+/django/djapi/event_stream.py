@@ -0,0 +1,203 @@
+import asyncio
+import json
+import secrets
+import time
+from urllib.parse import parse_qs
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from rest_framework import exceptions
+from djapi.events import get_backend, player_channel
+from djapi.token_expire import ExpiringTokenAuthentication, token_has_expired, token_is_active
+
+# Server-Sent Events stream of the events of a player, served by the ASGI
+# application at EVENT_STREAM_PATH. The client connects once and receives the
+# notifications, the results of its games and the progress of its tournaments
+# as they happen, instead of polling the API:
+#
+#   const { ticket } = await api.post('/api/events/ticket/');
+#   const events = new EventSource(`${api}/api/events/?ticket=${ticket}`);
+#   events.addEventListener('notification', (event) => JSON.parse(event.data));
+#
+# EventSource can not send headers, so the API token is not sent in the URL,
+# where it would be written to the access logs. The client gets a ticket first
+# (EventTicketView): a random key, kept in the cache with the API token, that can
+# only be used once and expires in EVENT_STREAM_TICKET_TIMEOUT seconds. The
+# Authorization header is also accepted.
+#
+# The token is checked again every EVENT_STREAM_KEEPALIVE seconds, without the
+# token cache, and the stream ends when it expires or it is revoked (logout).
+# An idle connection only costs a coroutine and a queue, so a worker can keep
+# thousands of clients connected.
+
+EVENT_STREAM_PATH = '/api/events/'
+TICKET_KEY = 'event-ticket:{}'
+
+
+def keepalive_interval():
+    return getattr(settings, 'EVENT_STREAM_KEEPALIVE', 15)
+
+def ticket_timeout():
+    return getattr(settings, 'EVENT_STREAM_TICKET_TIMEOUT', 60)
+
+
+# Creates a ticket to open the event stream with the given API token
+def issue_ticket(token_key):
+    ticket = secrets.token_urlsafe(24)
+    cache.set(TICKET_KEY.format(ticket), token_key, timeout=ticket_timeout())
+    return ticket
+
+# Returns the API token of the ticket, or None if it is not valid. The ticket
+# can not be used again.
+@sync_to_async
+def redeem_ticket(ticket):
+    key = TICKET_KEY.format(ticket)
+    token_key = cache.get(key)
+    if token_key is not None:
+        cache.delete(key)
+    return token_key
+
+
+# The checks of the tokens only read, so they run in the thread pool instead of
+# the single thread shared by the sync code: the rechecks of thousands of open
+# streams are not serialized. The connection of the pool thread is released after
+# every check, as Django does at the end of a request.
+@sync_to_async(thread_sensitive=False)
+def check_token(token):
+    close_old_connections()
+    try:
+        return token_is_active(token)
+    finally:
+        close_old_connections()
+
+# Validates the token and returns it with the id of the player
+@sync_to_async(thread_sensitive=False)
+def authenticate(key):
+    close_old_connections()
+    try:
+        return _authenticate(key)
+    finally:
+        close_old_connections()
+
+def _authenticate(key):
+    try:
+        user, token = ExpiringTokenAuthentication().authenticate_credentials(key)
+    except exceptions.AuthenticationFailed as error:
+        return None, None, str(error.detail)
+    player = getattr(user, 'player', None)
+    if player is None:
+        return token, None, 'Player not found'
+    return token, player.id, None
+
+
+def format_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'.encode()
+
+
+# ASGI application that serves the event stream and sends the rest of the
+# requests to the Django application
+class EventStreamRouter(object):
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] == EVENT_STREAM_PATH:
+            await event_stream(scope, receive, send)
+        else:
+            await self.application(scope, receive, send)
+
+
+# Returns the API token of the Authorization header or of the ?ticket= parameter
+async def get_token_key(scope):
+    headers = dict(scope['headers'])
+    authorization = headers.get(b'authorization', b'').decode().split()
+    if len(authorization) == 2 and authorization[0] == 'Token':
+        return authorization[1]
+    ticket = parse_qs(scope['query_string'].decode()).get('ticket', [None])[0]
+    if ticket:
+        return await redeem_ticket(ticket)
+    return None
+
+# CORS headers, as the API sends them with django-cors-headers
+def cors_headers(scope):
+    origin = dict(scope['headers']).get(b'origin', b'').decode()
+    if origin and origin in getattr(settings, 'CORS_ALLOWED_ORIGINS', []):
+        return [(b'access-control-allow-origin', origin.encode()), (b'vary', b'Origin')]
+    return []
+
+
+async def send_error(send, scope, status, message):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json')] + cors_headers(scope),
+    })
+    await send({'type': 'http.response.body', 'body': json.dumps({'error': message}).encode()})
+
+
+async def event_stream(scope, receive, send):
+    if scope['method'] != 'GET':
+        return await send_error(send, scope, 405, 'Method not allowed')
+
+    key = await get_token_key(scope)
+    if not key:
+        return await send_error(send, scope, 401, 'Authentication credentials were not provided or the ticket is not valid.')
+    token, player_id, error = await authenticate(key)
+    if error:
+        return await send_error(send, scope, 401 if token is None else 404, error)
+
+    subscription = await get_backend().subscribe(player_channel(player_id))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                # Disables the buffering of nginx, so the events are sent at once
+                (b'x-accel-buffering', b'no'),
+            ] + cors_headers(scope),
+        })
+        # The client reconnects after 5 seconds if the connection is lost
+        await send({'type': 'http.response.body', 'body': b'retry: 5000\n\n', 'more_body': True})
+
+        disconnected = asyncio.ensure_future(wait_disconnect(receive))
+        checked_at = time.monotonic()
+        try:
+            while True:
+                next_event = asyncio.ensure_future(subscription.get())
+                done, _ = await asyncio.wait({next_event, disconnected}, timeout=keepalive_interval(),
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if disconnected in done:
+                    next_event.cancel()
+                    return
+                if next_event in done:
+                    message = next_event.result()
+                    body = format_event(message['event'], message['data'])
+                else:
+                    next_event.cancel()
+                    body = b': keepalive\n\n'
+
+                # The stream ends when the token expires or it is revoked, and the
+                # client has to connect again with a new token
+                if time.monotonic() - checked_at >= keepalive_interval():
+                    checked_at = time.monotonic()
+                    if token_has_expired(token):
+                        await send({'type': 'http.response.body', 'body': format_event('expired', {})})
+                        return
+                    if not await check_token(token):
+                        await send({'type': 'http.response.body', 'body': format_event('revoked', {})})
+                        return
+                await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+        finally:
+            disconnected.cancel()
+    finally:
+        subscription.close()
+
+
+async def wait_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
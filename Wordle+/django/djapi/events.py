@@ -0,0 +1,174 @@
+import asyncio
+import json
+import logging
+import threading
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+# Publish/subscribe hub of the events pushed to the players. The events of a
+# player are published in the channel 'player:<id>', and the clients connected
+# to the event stream (djapi.event_stream) receive them.
+#
+# The backend is chosen with the EVENTS_BACKEND setting:
+# - LocalBackend: the events are delivered to the clients connected to the same
+#   process. It is enough when the API and the stream run in a single worker.
+# - PostgresBackend: the events are sent with NOTIFY, and every worker delivers
+#   them to its own clients with LISTEN. It is needed when the API and the
+#   stream run in several processes.
+
+logger = logging.getLogger(__name__)
+
+# Events kept for a slow client. When its queue is full, the new events are dropped.
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+def player_channel(player_id):
+    return f'player:{player_id}'
+
+
+# Queue of the events of a client. It lives in the event loop of the stream, and
+# it can be fed from any thread.
+class Subscription(object):
+    def __init__(self, backend, channel):
+        self.backend = backend
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def put(self, message):
+        self.loop.call_soon_threadsafe(self._put, message)
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            logger.warning('Event dropped for %s, the client is not reading.', self.channel)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.backend.unsubscribe(self)
+
+
+# Delivers the events to the subscriptions of this process
+class LocalBackend(object):
+    def __init__(self):
+        self.subscriptions = {}
+        self.lock = threading.Lock()
+
+    def publish(self, channel, message):
+        self.deliver(channel, message)
+
+    def deliver(self, channel, message):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.put(message)
+
+    async def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self.lock:
+            self.subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self.subscriptions[subscription.channel]
+
+    def subscriber_count(self):
+        with self.lock:
+            return sum(len(subscriptions) for subscriptions in self.subscriptions.values())
+
+
+# Sends the events through PostgreSQL, so they reach the clients of every
+# process. A single connection per process listens to all the events.
+class PostgresBackend(LocalBackend):
+    pg_channel = 'wordle_events'
+
+    def __init__(self):
+        super().__init__()
+        self.listener = None
+
+    def publish(self, channel, message):
+        payload = json.dumps({'channel': channel, 'message': message})
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.pg_channel, payload])
+
+    async def subscribe(self, channel):
+        if self.listener is None:
+            self.listen()
+        return await super().subscribe(channel)
+
+    def listen(self):
+        try:
+            import psycopg2
+        except ImportError:
+            raise ImproperlyConfigured('PostgresBackend requires psycopg2.')
+
+        database = settings.DATABASES['default']
+        listener = psycopg2.connect(
+            dbname=database['NAME'], user=database['USER'], password=database['PASSWORD'],
+            host=database['HOST'], port=database['PORT'],
+        )
+        listener.autocommit = True
+        listener.cursor().execute(f'LISTEN {self.pg_channel}')
+        asyncio.get_running_loop().add_reader(listener.fileno(), self.read_notifications)
+        self.listener = listener
+
+    def read_notifications(self):
+        try:
+            self.listener.poll()
+        except Exception:
+            # The connection is opened again by the next subscription
+            logger.exception('The connection listening to the events has been lost.')
+            asyncio.get_running_loop().remove_reader(self.listener.fileno())
+            self.listener = None
+            return
+
+        while self.listener.notifies:
+            notify = self.listener.notifies.pop(0)
+            event = json.loads(notify.payload)
+            self.deliver(event['channel'], event['message'])
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = import_string(getattr(settings, 'EVENTS_BACKEND', 'djapi.events.LocalBackend'))()
+    return _backend
+
+def reset_backend():
+    global _backend
+    _backend = None
+
+
+# Publishes an event to a player. The event is sent when the current transaction
+# is committed, so the clients never receive events of data that is not saved.
+def publish_to_player(player_id, event, data):
+    message = {'event': event, 'data': data}
+    channel = player_channel(player_id)
+
+    def send():
+        try:
+            get_backend().publish(channel, message)
+        except Exception:
+            logger.exception('The event %s could not be published.', event)
+
+    transaction.on_commit(send)
+
+def publish_to_players(player_ids, event, data):
+    for player_id in player_ids:
+        publish_to_player(player_id, event, data)
@@ -0,0 +1,60 @@
+from django.db.models import Count
+from djapi.friend_rankings import invalidate_friend_rankings
+from djapi.models import FriendList, FriendRequest, Player
+
+# Graph of the friends. Every friendship is stored as two directed edges of
+# FriendList, (sender=player, receiver=friend) and (sender=friend, receiver=player),
+# so the friends of a player are the receivers of the rows where they are the sender.
+# Every question is answered by the unique index of (sender, receiver), without
+# OR conditions:
+# - are_friends(a, b): a single row of the index.
+# - friends_of(a): a range of the index, which has the ids of the friends.
+# - mutual_friends(a, b) and suggestions(a): joins of ranges of the index.
+#
+# The friendships must be created and deleted with add_friendship and
+# remove_friendship, which keep both edges.
+
+
+# Adding an existing friendship does nothing (a retried or concurrent accept)
+def add_friendship(player_id, friend_id):
+    FriendList.objects.bulk_create([
+        FriendList(sender_id=player_id, receiver_id=friend_id),
+        FriendList(sender_id=friend_id, receiver_id=player_id),
+    ], ignore_conflicts=True)
+    invalidate_friend_rankings([player_id, friend_id])
+
+# Removes the friendship, and returns False if the players were not friends
+def remove_friendship(player_id, friend_id):
+    deleted, _ = FriendList.objects.filter(sender_id__in=[player_id, friend_id],
+                                           receiver_id__in=[player_id, friend_id]).delete()
+    if deleted:
+        invalidate_friend_rankings([player_id, friend_id])
+    return deleted > 0
+
+def are_friends(player_id, friend_id):
+    return FriendList.objects.filter(sender_id=player_id, receiver_id=friend_id).exists()
+
+# Subquery with the ids of the friends of the player
+def friend_ids(player_id):
+    return FriendList.objects.filter(sender_id=player_id).values('receiver_id')
+
+def friends_of(player_id):
+    return Player.objects.filter(id__in=friend_ids(player_id))
+
+def mutual_friends(player_id, other_id):
+    return Player.objects.filter(id__in=friend_ids(player_id)).filter(id__in=friend_ids(other_id))
+
+# Returns the friends of the friends of the player that are not their friends yet,
+# and have not been sent a friend request by them, ranked by the number of mutual
+# friends. Every suggestion is {'id_player', 'username', 'mutual_friends'}, and they
+# are read with a single aggregate query.
+def suggestions(player_id, limit=10):
+    candidates = FriendList.objects.filter(sender_id__in=friend_ids(player_id)) \
+        .exclude(receiver_id=player_id) \
+        .exclude(receiver_id__in=friend_ids(player_id)) \
+        .exclude(receiver_id__in=FriendRequest.objects.filter(sender_id=player_id).values('receiver_id'))
+    ranked = candidates.values('receiver_id', 'receiver__user__username') \
+        .annotate(mutual=Count('sender_id')) \
+        .order_by('-mutual', 'receiver_id')[:limit]
+    return [{'id_player': row['receiver_id'], 'username': row['receiver__user__username'], 'mutual_friends': row['mutual']}
+            for row in ranked]
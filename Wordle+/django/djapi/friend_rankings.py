@@ -0,0 +1,75 @@
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from djapi import friend_graph
+from djapi.leaderboards import player_entry
+from djapi.models import Player
+
+# Rankings of the players among their friends. The ranking of a player and their
+# friends is read with a single query, and it is cached for every player and field.
+#
+# Every player has a version in the cache, which changes when their counters or
+# their friends change. The cached ranking keeps the versions of the players that
+# it contains, and it is read from the database again when any of them has
+# changed, so a change of a player invalidates the rankings of all their friends
+# without knowing who they are. A version lost by the cache also invalidates the
+# rankings. The versions are read before the ranking, so a change committed while
+# it is read invalidates it. Only the first ranking of a new friend could miss
+# one, and the rankings are only cached for FRIEND_RANKING_TIMEOUT seconds.
+
+RANKING_KEY = 'friend_ranking:{}:{}'
+VERSION_KEY = 'friend_ranking:version:{}'
+
+
+def ranking_timeout():
+    return getattr(settings, 'FRIEND_RANKING_TIMEOUT', 300)
+
+# Returns {player_id: version} of the players. The missing versions are created.
+def get_versions(player_ids):
+    keys = {VERSION_KEY.format(player_id): player_id for player_id in player_ids}
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return {keys[key]: version for key, version in versions.items()}
+
+# Invalidates the rankings that contain the players when the current transaction
+# is committed
+def invalidate_friend_rankings(player_ids):
+    player_ids = list(player_ids)
+    transaction.on_commit(lambda: _next_versions(player_ids))
+
+def _next_versions(player_ids):
+    for player_id in player_ids:
+        try:
+            cache.incr(VERSION_KEY.format(player_id))
+        except ValueError:
+            cache.set(VERSION_KEY.format(player_id), time.time_ns(), timeout=None)
+
+
+# Returns the ranking of the player and their friends ordered by the field, with
+# the position of every player in 'rank'
+def get_friend_ranking(player_id, field):
+    key = RANKING_KEY.format(player_id, field)
+    cached = cache.get(key)
+    known = {player_id}
+    if cached is not None:
+        versions = cache.get_many([VERSION_KEY.format(other) for other in cached['versions']])
+        if all(versions.get(VERSION_KEY.format(other)) == version for other, version in cached['versions'].items()):
+            return cached['entries']
+        known |= set(cached['versions'])
+
+    versions = get_versions(known)
+    entries = load_friend_ranking(player_id, field)
+    versions.update(get_versions({entry['id'] for entry in entries} - versions.keys()))
+    cache.set(key, {'entries': entries, 'versions': versions}, timeout=ranking_timeout())
+    return entries
+
+def load_friend_ranking(player_id, field):
+    players = Player.objects.filter(Q(id=player_id) | Q(id__in=friend_graph.friend_ids(player_id))) \
+        .select_related('user').order_by('-' + field, 'id')
+    return [{**player_entry(player, player.user.username), 'rank': position}
+            for position, player in enumerate(players, start=1)]
@@ -0,0 +1,143 @@
+import threading
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from djapi.models import Player
+
+# Leaderboards of the players. The top players of every ranking field are kept
+# in the cache, and they are updated incrementally every time the counters of a
+# player change, so reading a ranking does not query the database.
+
+LEADERBOARD_FIELDS = ('xp', 'wins', 'wins_pvp', 'wins_tournament')
+LEADERBOARD_KEY = 'leaderboard:{}'
+
+_update_lock = threading.Lock()
+
+
+def leaderboard_size():
+    return getattr(settings, 'LEADERBOARD_SIZE', 100)
+
+# The cached lists are rebuilt from time to time, so an update lost by two
+# processes writing the same list at the same time is eventually corrected.
+def leaderboard_timeout():
+    return getattr(settings, 'LEADERBOARD_TIMEOUT', 300)
+
+# Ranking entry of a player, with the same format of PlayerInfoSerializer
+def player_entry(player, username):
+    return {
+        'id': player.id,
+        'user': {'id': player.user_id, 'username': username},
+        'wins': player.wins,
+        'wins_pvp': player.wins_pvp,
+        'wins_tournament': player.wins_tournament,
+        'xp': player.xp,
+    }
+
+# Order of the rankings: highest value first, and the oldest player first in case of tie
+def sort_key(entry, field):
+    return (-entry[field], entry['id'])
+
+
+# Returns the top players ordered by the field. The list is built with a single
+# query if it is not in the cache.
+def get_leaderboard(field):
+    entries = cache.get(LEADERBOARD_KEY.format(field))
+    if entries is None:
+        entries = rebuild_leaderboard(field)
+    return entries
+
+# Returns the leaderboards that are in the cache as {field: entries}, without
+# rebuilding the missing ones
+def cached_leaderboards():
+    cached = cache.get_many([LEADERBOARD_KEY.format(field) for field in LEADERBOARD_FIELDS])
+    return {key.split(':', 1)[1]: entries for key, entries in cached.items()}
+
+# Top players of the field, the ones of its leaderboard
+def top_players(field):
+    return Player.objects.order_by('-' + field, 'id')[:leaderboard_size()]
+
+def rebuild_leaderboard(field):
+    players = top_players(field).select_related('user')
+    entries = [player_entry(player, player.user.username) for player in players]
+    cache.set(LEADERBOARD_KEY.format(field), entries, timeout=leaderboard_timeout())
+    return entries
+
+def invalidate_leaderboards():
+    cache.delete_many([LEADERBOARD_KEY.format(field) for field in LEADERBOARD_FIELDS])
+
+# Updates the cached leaderboards with the current counters of the player
+def update_player(player):
+    deferred_fields = player.get_deferred_fields() & set(LEADERBOARD_FIELDS)
+    if deferred_fields:
+        player.refresh_from_db(fields=list(deferred_fields))
+
+    with _update_lock:
+        cached = cache.get_many([LEADERBOARD_KEY.format(field) for field in LEADERBOARD_FIELDS])
+        if not cached:
+            return
+
+        username = None
+        for entries in cached.values():
+            for entry in entries:
+                if entry['id'] == player.id:
+                    username = entry['user']['username']
+                    break
+        entry = player_entry(player, username)
+
+        updated = {}
+        for key, entries in cached.items():
+            field = key.split(':', 1)[1]
+            entries = _update_entries(entries, entry, field)
+            if entries is None:
+                cache.delete(key)
+            else:
+                updated[key] = entries
+
+        # The username is only read if the player enters a leaderboard
+        if username is None and any(other is entry for entries in updated.values() for other in entries):
+            entry['user']['username'] = player.user.username
+        cache.set_many(updated, timeout=leaderboard_timeout())
+
+# Places the entry in the list. Returns None if the list can not be updated
+# without querying the database: a player of a full list has dropped below the
+# last position, so it is not known who is the next one.
+def _update_entries(entries, entry, field):
+    size = leaderboard_size()
+    previous_count = len(entries)
+    entries = [other for other in entries if other['id'] != entry['id']]
+    was_included = len(entries) != previous_count
+
+    if previous_count >= size and entries and sort_key(entry, field) > sort_key(entries[-1], field):
+        if was_included:
+            return None
+        return entries
+
+    entries.append(entry)
+    entries.sort(key=lambda other: sort_key(other, field))
+    return entries[:size]
+
+# Updates the username of a user in the cached leaderboards
+def update_username(user_id, username):
+    with _update_lock:
+        cached = cache.get_many([LEADERBOARD_KEY.format(field) for field in LEADERBOARD_FIELDS])
+        updated = {}
+        for key, entries in cached.items():
+            for entry in entries:
+                if entry['user']['id'] == user_id and entry['user']['username'] != username:
+                    entry['user']['username'] = username
+                    updated[key] = entries
+        if updated:
+            cache.set_many(updated, timeout=leaderboard_timeout())
+
+# Position of the player in the ranking of the field. It is read from the cached
+# leaderboard, or counted with the index of the field if the player is not there.
+def get_rank(player, field):
+    for position, entry in enumerate(get_leaderboard(field), start=1):
+        if entry['id'] == player.id:
+            return position, entry[field]
+
+    value = Player.objects.filter(pk=player.pk).values_list(field, flat=True).first()
+    if value is None:
+        return None, None
+    ahead = Player.objects.filter(Q(**{field + '__gt': value}) | Q(**{field: value, 'id__lt': player.id})).count()
+    return ahead + 1, value
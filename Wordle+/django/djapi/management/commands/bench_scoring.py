@@ -0,0 +1,46 @@
+import random
+import string
+import time
+from django.core.management.base import BaseCommand
+from djapi.scoring import MAX_GUESSES, score_games, score_guess
+
+# Micro-benchmark of the scoring engine. It scores random games both one guess at
+# a time and in a single batch, and prints the guesses scored per second.
+class Command(BaseCommand):
+    help = 'Measures the number of guesses per second scored by the scoring engine.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--games', type=int, default=5000, help='Number of games to score.')
+        parser.add_argument('--length', type=int, default=5, help='Length of the words.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random games.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        length = options['length']
+
+        def random_word():
+            return ''.join(rng.choice(string.ascii_lowercase) for _ in range(length))
+
+        # Finished games: won with a random number of guesses, or lost after MAX_GUESSES
+        games = []
+        for _ in range(options['games']):
+            word = random_word()
+            won = rng.random() < 0.5
+            guesses = [guess for guess in (random_word() for _ in range(MAX_GUESSES * 2)) if guess != word]
+            guesses = guesses[:rng.randint(0, MAX_GUESSES - 1)] + [word] if won else guesses[:MAX_GUESSES]
+            games.append((word, guesses, rng.randint(10, 300)))
+        num_guesses = sum(len(guesses) for _, guesses, _ in games)
+
+        start = time.perf_counter()
+        for word, guesses, _ in games:
+            for guess in guesses:
+                score_guess(guess, word)
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        score_games(games)
+        batch = time.perf_counter() - start
+
+        self.stdout.write(f'{options["games"]} games, {num_guesses} guesses of {length} letters')
+        self.stdout.write(f'One guess at a time: {single:.3f}s ({num_guesses / single:,.0f} guesses/s)')
+        self.stdout.write(f'Batch:               {batch:.3f}s ({num_guesses / batch:,.0f} guesses/s)')
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from djapi.notifications import compact_notifications, retention_days
+
+# Deletes the old read notifications, so the table only keeps the recent ones.
+# It is meant to be run periodically, e.g. every day with cron:
+#   python manage.py compact_notifications --archive /backups/notifications.jsonl
+class Command(BaseCommand):
+    help = 'Deletes the read notifications older than NOTIFICATION_RETENTION_DAYS, in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Age in days of the deleted notifications (default NOTIFICATION_RETENTION_DAYS).')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Notifications deleted by every query.')
+        parser.add_argument('--archive', help='File where the deleted notifications are appended as JSON lines.')
+
+    def handle(self, *args, **options):
+        days = retention_days() if options['days'] is None else options['days']
+        if days < 0 or options['batch_size'] < 1:
+            raise CommandError('The days and the batch size must be positive.')
+
+        if options['archive']:
+            with open(options['archive'], 'a') as archive:
+                deleted = compact_notifications(days, options['batch_size'], archive)
+        else:
+            deleted = compact_notifications(days, options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(f'{deleted} notifications older than {days} days deleted.'))
@@ -0,0 +1,67 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from djapi import leaderboards
+from djapi.seeding import SEED_PASSWORD, DataSeeder
+
+# Generates synthetic data to measure the capacity of the API. Every row is
+# created with bulk_create in chunks, and the same seed generates the same data.
+# Example: python manage.py seed_load --players 100000 --classic-games 500000 --games 300000
+class Command(BaseCommand):
+    help = 'Generates users, players, friends, notifications, games and tournaments in bulk.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=1000, help='Number of players.')
+        parser.add_argument('--staff', type=int, default=0, help='Number of event managers.')
+        parser.add_argument('--friends', type=int, default=5, help='Friendships started by every player.')
+        parser.add_argument('--friend-requests', type=int, default=1, help='Pending friend requests sent by every player.')
+        parser.add_argument('--notifications', type=int, default=10, help='Notifications of every player.')
+        parser.add_argument('--classic-games', type=int, default=10000, help='Number of classic games.')
+        parser.add_argument('--games', type=int, default=5000, help='Number of PvP games.')
+        parser.add_argument('--tournaments', type=int, default=10, help='Number of closed tournaments.')
+        parser.add_argument('--tournament-size', type=int, default=16, help='Players of every tournament.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random data.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows inserted by every query.')
+
+    # Everything is created in a single transaction, which is much faster than
+    # committing every chunk
+    @transaction.atomic
+    def handle(self, *args, **options):
+        if options['players'] < 2:
+            raise CommandError('At least 2 players are needed.')
+        if options['tournament_size'] not in (2, 4, 8, 16, 32, 64):
+            raise CommandError('The tournament size must be a power of 2 between 2 and 64.')
+
+        seeder = DataSeeder(seed=options['seed'], batch_size=options['batch_size'])
+        start = time.perf_counter()
+        step_start = start
+
+        def report(name, rows):
+            nonlocal step_start
+            now = time.perf_counter()
+            self.stdout.write(f'{name}: {rows} rows in {now - step_start:.1f}s')
+            step_start = now
+
+        players = seeder.create_players(options['players'])
+        report('Users and players', 2 * len(players))
+
+        if options['staff']:
+            seeder.create_staff(options['staff'])
+            report('Event managers', options['staff'])
+
+        report('Friendships and friend requests', sum(seeder.create_friendships(
+            players, options['friends'], options['friend_requests'])))
+
+        report('Notifications', seeder.create_notifications(players, options['notifications']))
+        report('Classic games', seeder.create_classic_games(players, options['classic_games']))
+        report('PvP games', seeder.create_games(players, options['games']))
+
+        seeder.create_tournaments(players, options['tournaments'], options['tournament_size'])
+        report('Tournaments', options['tournaments'])
+
+        # The counters of the players have been written without the signals
+        leaderboards.invalidate_leaderboards()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Data created in {time.perf_counter() - start:.1f}s. The password of the users is "{SEED_PASSWORD}".'
+        ))
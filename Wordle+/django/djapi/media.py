@@ -0,0 +1,51 @@
+from urllib.parse import quote
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
+
+# Responses with the files of MEDIA_ROOT. The views check the permissions and
+# return serve_file(), which depends on MEDIA_SERVING:
+# - 'django': the file is streamed by Django (development, runserver).
+# - 'x-accel': the response only has the X-Accel-Redirect header, with the path of
+#   the file under MEDIA_ACCEL_PREFIX, and nginx sends the file with sendfile. The
+#   prefix must be an internal location of nginx (see ionic/nginx/nginx.conf).
+
+SERVING_MODES = ('django', 'x-accel')
+
+
+def serving_mode():
+    mode = getattr(settings, 'MEDIA_SERVING', 'django')
+    if mode not in SERVING_MODES:
+        raise ValueError(f'MEDIA_SERVING must be one of: {", ".join(SERVING_MODES)}')
+    return mode
+
+def accel_prefix():
+    return getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/')
+
+# Origin of the URLs of the media files (nginx). With 'x-accel', the files must be
+# requested through nginx, as Django only answers with the X-Accel-Redirect header.
+def media_origin():
+    return getattr(settings, 'MEDIA_ORIGIN', None)
+
+# Absolute URL of the path of a media file, on MEDIA_ORIGIN if it is defined, or
+# on the host of the request otherwise
+def media_url(request, path):
+    origin = media_origin()
+    if origin:
+        return origin.rstrip('/') + path
+    return request.build_absolute_uri(path)
+
+# Returns the response with the stored file of the given name. Raises Http404 if
+# the file does not exist and it is served by Django.
+def serve_file(name, content_type, headers=None):
+    if serving_mode() == 'x-accel':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = accel_prefix() + quote(name)
+    else:
+        try:
+            response = FileResponse(default_storage.open(name, 'rb'), content_type=content_type)
+        except FileNotFoundError:
+            raise Http404('File not found.')
+    for header, value in (headers or {}).items():
+        response[header] = value
+    return response
@@ -0,0 +1,208 @@
+# Generated by Django 4.1.6 on 2026-10-18 14:20
+
+import django.contrib.auth.models
+import django.contrib.auth.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('djapi', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Game',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('word', models.CharField(blank=True, max_length=255)),
+                ('player1_time', models.PositiveIntegerField(default=0)),
+                ('player1_attempts', models.PositiveIntegerField(default=0)),
+                ('player1_xp', models.PositiveIntegerField(default=0)),
+                ('player2_time', models.PositiveIntegerField(default=0)),
+                ('player2_attempts', models.PositiveIntegerField(default=0)),
+                ('player2_xp', models.PositiveIntegerField(default=0)),
+                ('timestamp', models.DateTimeField(auto_now_add=True)),
+                ('is_tournament_game', models.BooleanField(default=False)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Round',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Tournament',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=20)),
+                ('description', models.TextField(blank=True)),
+                ('num_players', models.PositiveIntegerField(default=0)),
+                ('max_players', models.PositiveIntegerField()),
+                ('word_length', models.PositiveIntegerField()),
+                ('is_closed', models.BooleanField(default=False)),
+                ('current_round', models.PositiveIntegerField(default=1)),
+            ],
+        ),
+        migrations.AlterModelOptions(
+            name='customuser',
+            options={'verbose_name': 'user', 'verbose_name_plural': 'users'},
+        ),
+        migrations.AlterModelManagers(
+            name='customuser',
+            managers=[
+                ('objects', django.contrib.auth.models.UserManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='groups',
+            field=models.ManyToManyField(blank=True, help_text='The groups this user belongs to. A user will get all permissions granted to each of their groups.', related_name='user_set', related_query_name='user', to='auth.group', verbose_name='groups'),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='is_superuser',
+            field=models.BooleanField(default=False, help_text='Designates that this user has all permissions without explicitly assigning them.', verbose_name='superuser status'),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='user_permissions',
+            field=models.ManyToManyField(blank=True, help_text='Specific permissions for this user.', related_name='user_set', related_query_name='user', to='auth.permission', verbose_name='user permissions'),
+        ),
+        migrations.AddField(
+            model_name='staffcode',
+            name='used',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='customuser',
+            name='avatar',
+            field=models.ImageField(blank=True, null=True, upload_to='avatars/'),
+        ),
+        migrations.AlterField(
+            model_name='customuser',
+            name='date_joined',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AlterField(
+            model_name='customuser',
+            name='id',
+            field=models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID'),
+        ),
+        migrations.AlterField(
+            model_name='customuser',
+            name='last_login',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='customuser',
+            name='username',
+            field=models.CharField(error_messages={'unique': 'A user with that username already exists.'}, help_text='Required. 150 characters or fewer. Letters, digits and @/./+/-/_ only.', max_length=150, unique=True, validators=[django.contrib.auth.validators.UnicodeUsernameValidator()], verbose_name='username'),
+        ),
+        migrations.AlterField(
+            model_name='player',
+            name='id',
+            field=models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID'),
+        ),
+        migrations.AlterField(
+            model_name='staffcode',
+            name='id',
+            field=models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID'),
+        ),
+        migrations.CreateModel(
+            name='RoundGame',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='djapi.game')),
+                ('round', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='djapi.round')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='round',
+            name='tournament',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='djapi.tournament'),
+        ),
+        migrations.CreateModel(
+            name='Participation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField(auto_now_add=True)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='djapi.player')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='djapi.tournament')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.CharField(max_length=200)),
+                ('link', models.URLField(blank=True)),
+                ('timestamp', models.DateTimeField(auto_now_add=True)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='djapi.player')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='player1',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='player1_wordle', to='djapi.player'),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='player2',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='player2_wordle', to='djapi.player'),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='winner',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='winner', to='djapi.player'),
+        ),
+        migrations.CreateModel(
+            name='FriendRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField(auto_now_add=True)),
+                ('receiver', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='requests_received', to='djapi.player')),
+                ('sender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='requests_sent', to='djapi.player')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FriendList',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('receiver', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='friend_requests_received', to='djapi.player')),
+                ('sender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='friend_requests_sent', to='djapi.player')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ClassicWordle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('word', models.CharField(max_length=255)),
+                ('time_consumed', models.PositiveIntegerField()),
+                ('attempts', models.PositiveIntegerField()),
+                ('xp_gained', models.PositiveIntegerField()),
+                ('date_played', models.DateTimeField(default=django.utils.timezone.now)),
+                ('win', models.BooleanField(default=False)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='classic_wordle_games', to='djapi.player')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='participation',
+            constraint=models.UniqueConstraint(fields=('tournament', 'player'), name='unique_participation'),
+        ),
+        migrations.AddConstraint(
+            model_name='friendrequest',
+            constraint=models.UniqueConstraint(fields=('sender', 'receiver'), name='unique_friendrequest'),
+        ),
+        migrations.AddConstraint(
+            model_name='friendlist',
+            constraint=models.UniqueConstraint(fields=('sender', 'receiver'), name='unique_friendship'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.1.6 on 2026-10-18 14:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djapi', '0002_sync_models'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='player',
+            name='wins',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.AlterField(
+            model_name='player',
+            name='wins_pvp',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.AlterField(
+            model_name='player',
+            name='wins_tournament',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.AlterField(
+            model_name='player',
+            name='xp',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+    ]
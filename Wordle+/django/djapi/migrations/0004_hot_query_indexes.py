@@ -0,0 +1,45 @@
+# Generated by Django 4.1.6 on 2026-10-18 14:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djapi', '0003_player_ranking_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='classicwordle',
+            index=models.Index(fields=['player', '-date_played'], name='classic_player_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['-date_joined'], name='user_date_joined_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='friendrequest',
+            index=models.Index(fields=['receiver', 'timestamp'], name='friendrequest_receiver_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(condition=models.Q(('is_tournament_game', False), ('winner__isnull', True)), fields=['player2', 'timestamp'], name='game_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(condition=models.Q(('winner__isnull', False)), fields=['player1', '-timestamp'], name='game_player1_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(condition=models.Q(('winner__isnull', False)), fields=['player2', '-timestamp'], name='game_player2_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['player', '-timestamp'], name='notification_player_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(fields=['word_length', 'max_players'], name='tournament_length_size_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.1.6 on 2026-10-18 14:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djapi', '0004_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='classicwordle',
+            name='classic_player_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='game',
+            name='game_pending_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='game',
+            name='game_player1_completed_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='game',
+            name='game_player2_completed_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='notification_player_time_idx',
+        ),
+        migrations.AddIndex(
+            model_name='classicwordle',
+            index=models.Index(fields=['player', '-date_played', '-id'], name='classic_player_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(condition=models.Q(('is_tournament_game', False), ('winner__isnull', True)), fields=['player2', 'timestamp', 'id'], name='game_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(condition=models.Q(('winner__isnull', False)), fields=['player1', '-timestamp', '-id'], name='game_player1_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(condition=models.Q(('winner__isnull', False)), fields=['player2', '-timestamp', '-id'], name='game_player2_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['player', '-timestamp', '-id'], name='notification_player_time_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.1.6 on 2026-10-18 14:47
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+# The existing notifications are unread, so the counters start with their number
+def count_unread_notifications(apps, schema_editor):
+    Player = apps.get_model('djapi', 'Player')
+    Notification = apps.get_model('djapi', 'Notification')
+    unread = (Notification.objects.filter(player=OuterRef('pk'), read=False)
+              .values('player').annotate(count=Count('id')).values('count'))
+    Player.objects.update(unread_notifications=Coalesce(Subquery(unread, output_field=IntegerField()), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djapi', '0005_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='read',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='unread_notifications',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('read', True)), fields=['timestamp'], name='notification_read_time_idx'),
+        ),
+        migrations.RunPython(count_unread_notifications, migrations.RunPython.noop),
+    ]
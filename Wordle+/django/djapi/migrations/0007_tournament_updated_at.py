@@ -0,0 +1,18 @@
+# Generated by Django 4.1.6 on 2026-10-18 14:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djapi', '0006_notification_read_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations
+
+# Indexes of the search of the players (djapi/player_search.py), only in PostgreSQL.
+# The lookups istartswith and icontains compare UPPER(username), so the indexes are
+# built on that expression: a B-tree with varchar_pattern_ops for the prefixes
+# (LIKE 'TEXT%') and a trigram GIN index for the substrings (LIKE '%TEXT%').
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute('CREATE INDEX IF NOT EXISTS user_username_prefix_idx '
+                          'ON djapi_customuser (UPPER(username::text) varchar_pattern_ops)')
+    schema_editor.execute('CREATE INDEX IF NOT EXISTS user_username_trgm_idx '
+                          'ON djapi_customuser USING gin (UPPER(username::text) gin_trgm_ops)')
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS user_username_prefix_idx')
+    schema_editor.execute('DROP INDEX IF EXISTS user_username_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djapi', '0007_tournament_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+from django.db.models import Exists, F, OuterRef
+
+# Every friendship is stored in both directions (see djapi/friend_graph.py). The
+# missing reverse rows of the existing friendships are created.
+
+BATCH_SIZE = 1000
+
+
+def reverse_row(FriendList):
+    return FriendList.objects.filter(sender_id=OuterRef('receiver_id'), receiver_id=OuterRef('sender_id'))
+
+def add_reverse_rows(apps, schema_editor):
+    FriendList = apps.get_model('djapi', 'FriendList')
+    missing = FriendList.objects.filter(~Exists(reverse_row(FriendList))).values_list('sender_id', 'receiver_id')
+    FriendList.objects.bulk_create([
+        FriendList(sender_id=receiver_id, receiver_id=sender_id) for sender_id, receiver_id in missing.iterator()
+    ], batch_size=BATCH_SIZE)
+
+# Keeps one row of every friendship
+def remove_reverse_rows(apps, schema_editor):
+    FriendList = apps.get_model('djapi', 'FriendList')
+    FriendList.objects.filter(Exists(reverse_row(FriendList)), sender_id__gt=F('receiver_id')).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djapi', '0008_player_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_reverse_rows, remove_reverse_rows),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.6 on 2026-10-18 15:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djapi', '0009_symmetric_friendships'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='is_finished',
+            field=models.BooleanField(default=False),
+        ),
+    ]
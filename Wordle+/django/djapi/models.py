@@ -15,14 +15,23 @@ class CustomUser(AbstractUser):
     last_login = models.DateTimeField(auto_now=True)
     date_joined = models.DateTimeField(auto_now_add=True)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # List of users, from the newest to the oldest
+            models.Index(fields=['-date_joined'], name='user_date_joined_idx'),
+        ]
+
 # Model of the player. Every Player is related to its CustomUser information, and
 # adds to it some new information.
 class Player(models.Model):
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, related_name='player')
-    wins = models.PositiveIntegerField(default=0)
-    wins_pvp = models.PositiveIntegerField(default=0)
-    wins_tournament = models.PositiveIntegerField(default=0)
-    xp = models.PositiveIntegerField(default=0)
+    # The counters are indexed, as they are used to sort the rankings
+    wins = models.PositiveIntegerField(default=0, db_index=True)
+    wins_pvp = models.PositiveIntegerField(default=0, db_index=True)
+    wins_tournament = models.PositiveIntegerField(default=0, db_index=True)
+    xp = models.PositiveIntegerField(default=0, db_index=True)
+    # Number of notifications not read, updated when they are created and read
+    unread_notifications = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.user.username
@@ -48,12 +57,28 @@ class ClassicWordle(models.Model):
     date_played = models.DateTimeField(default=timezone.now)
     win = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Last games of a player. The id is the last column of the key of the
+            # keyset pagination.
+            models.Index(fields=['player', '-date_played', '-id'], name='classic_player_date_idx'),
+        ]
+
 # Model to store the notifications of the players.
 class Notification(models.Model):
     player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='notifications')
     text = models.CharField(max_length=200)
     link = models.URLField(blank=True)
     timestamp = models.DateTimeField(auto_now_add=True)
+    read = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            # Last notifications of a player
+            models.Index(fields=['player', '-timestamp', '-id'], name='notification_player_time_idx'),
+            # Old read notifications, deleted by the compaction
+            models.Index(fields=['timestamp'], name='notification_read_time_idx', condition=models.Q(read=True)),
+        ]
 
 # Model to store the tournaments information.
 class Tournament(models.Model):
@@ -64,6 +89,16 @@ class Tournament(models.Model):
     word_length = models.PositiveIntegerField()
     is_closed = models.BooleanField(default=False)
     current_round = models.PositiveIntegerField(default=1)
+    # Set when the final gets a winner, so the tournament is only ended once
+    is_finished = models.BooleanField(default=False)
+    # Time of the last change of the tournament or its bracket, used as its ETag
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # List of tournaments filtered by the word length and ordered by size
+            models.Index(fields=['word_length', 'max_players'], name='tournament_length_size_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -85,7 +120,9 @@ class Participation(models.Model):
     def __str__(self):
         return f"{self.player.user.username} - {self.tournament.name}"
 
-# Model to store the friend list of the players.
+# Model to store the friend list of the players. Every friendship has two rows,
+# one in each direction, so the friends of a player are the receivers of the rows
+# where the player is the sender (see djapi/friend_graph.py).
 class FriendList(models.Model):
     sender = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='friend_requests_sent')
     receiver = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='friend_requests_received')
@@ -98,8 +135,6 @@ class FriendList(models.Model):
     def clean(self):
         if self.sender == self.receiver:
             raise ValidationError('You can not be friend of yourself.')
-        if FriendList.objects.filter(sender=self.receiver, receiver=self.sender).exists():
-            raise ValidationError('This friend relation already exists.')
         
     def __str__(self):
         return f"{self.sender.user.username} - {self.receiver.user.username}"
@@ -113,6 +148,10 @@ class FriendRequest(models.Model):
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=['sender', 'receiver'], name='unique_friendrequest')        ]
+        indexes = [
+            # Received requests, from the oldest to the newest
+            models.Index(fields=['receiver', 'timestamp'], name='friendrequest_receiver_idx'),
+        ]
 
     def clean(self):
         if self.sender == self.receiver:
@@ -138,6 +177,19 @@ class Game(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     is_tournament_game = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Pending games received by a player. Only the games without a winner
+            # are indexed, which are a small part of the table.
+            models.Index(fields=['player2', 'timestamp', 'id'], name='game_pending_idx',
+                         condition=models.Q(winner__isnull=True, is_tournament_game=False)),
+            # Completed games of a player, as player1 or as player2
+            models.Index(fields=['player1', '-timestamp', '-id'], name='game_player1_completed_idx',
+                         condition=models.Q(winner__isnull=False)),
+            models.Index(fields=['player2', '-timestamp', '-id'], name='game_player2_completed_idx',
+                         condition=models.Q(winner__isnull=False)),
+        ]
+
     def __str__(self):
         return f"{self.player1.user.username} - {self.player2.user.username}"
 
@@ -157,30 +209,35 @@ class RoundGame(models.Model):
     def __str__(self):
         return f"Round: {self.round.number}, Game: {self.game}"
 
+# Returns the 'Staff' group. The first time, it is created with the permissions
+# needed to manage the players and the tournaments.
+def get_staff_group():
+    staff_group, created = Group.objects.get_or_create(name='Staff')
+
+    if created:
+        # Obtain the necessary permissions to manage CustomUser and Player
+        customuser_content_type = ContentType.objects.get(app_label='djapi', model='customuser')
+        player_content_type = ContentType.objects.get(app_label='djapi', model='player')
+        tournament_content_type = ContentType.objects.get(app_label='djapi', model='tournament')
+        round_content_type = ContentType.objects.get(app_label='djapi', model='round')
+        roundgame_content_type = ContentType.objects.get(app_label='djapi', model='roundgame')
+        participation_content_type = ContentType.objects.get(app_label='djapi', model='participation')
+
+        customuser_permissions = Permission.objects.filter(content_type=customuser_content_type)
+        player_permissions = Permission.objects.filter(content_type=player_content_type)
+        tournament_permissions = Permission.objects.filter(content_type=tournament_content_type)
+        round_permissions = Permission.objects.filter(content_type=round_content_type)
+        roundgame_permissions = Permission.objects.filter(content_type=roundgame_content_type)
+        participation_permissions = Permission.objects.filter(content_type=participation_content_type)
+
+        # Assign the permissions to the "Staff" group
+        staff_group.permissions.set(customuser_permissions | player_permissions | tournament_permissions | roundgame_permissions | round_permissions | participation_permissions)
+
+    return staff_group
+
 # Method to add the 'Staff' group automatically when creating an administrator
 @receiver(post_save, sender=CustomUser)
 def assign_permissions(sender, instance, created, **kwargs):
     if created and instance.is_staff:
-        staff_group, created = Group.objects.get_or_create(name='Staff')
-
-        if created:
-            # Obtain the necessary permissions to manage CustomUser and Player
-            customuser_content_type = ContentType.objects.get(app_label='djapi', model='customuser')
-            player_content_type = ContentType.objects.get(app_label='djapi', model='player')
-            tournament_content_type = ContentType.objects.get(app_label='djapi', model='tournament')
-            round_content_type = ContentType.objects.get(app_label='djapi', model='round')
-            roundgame_content_type = ContentType.objects.get(app_label='djapi', model='roundgame')
-            participation_content_type = ContentType.objects.get(app_label='djapi', model='participation')
-
-            customuser_permissions = Permission.objects.filter(content_type=customuser_content_type)
-            player_permissions = Permission.objects.filter(content_type=player_content_type)
-            tournament_permissions = Permission.objects.filter(content_type=tournament_content_type)
-            round_permissions = Permission.objects.filter(content_type=round_content_type)
-            roundgame_permissions = Permission.objects.filter(content_type=roundgame_content_type)
-            participation_permissions = Permission.objects.filter(content_type=participation_content_type)
-
-            # Assign the permissions to the "Staff" group
-            staff_group.permissions.set(customuser_permissions | player_permissions | tournament_permissions | roundgame_permissions | round_permissions | participation_permissions)
-
         # Assign the user to the "Staff" group
-        staff_group.user_set.add(instance)
\ No newline at end of file
+        get_staff_group().user_set.add(instance)
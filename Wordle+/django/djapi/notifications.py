@@ -0,0 +1,62 @@
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from djapi.models import Notification, Player
+
+# Read state of the notifications. Every player keeps the number of unread
+# notifications in Player.unread_notifications, so it is read without counting
+# the rows. The counter is incremented when a notification is created (signal
+# notification_created), and decremented with the number of rows that are
+# really marked as read, so concurrent requests never count a row twice.
+
+
+def add_unread(player_id, count):
+    if count:
+        Player.objects.filter(pk=player_id).update(
+            unread_notifications=Greatest(F('unread_notifications') + count, 0)
+        )
+
+# Returns the number of unread notifications of a player
+def unread_count(player):
+    return Player.objects.filter(pk=player.pk).values_list('unread_notifications', flat=True).first() or 0
+
+# Marks as read the notifications of the player with the given ids, or all of
+# them if ids is None. Returns the number of notifications marked.
+def mark_read(player, ids=None):
+    notifications = Notification.objects.filter(player=player, read=False)
+    if ids is not None:
+        notifications = notifications.filter(id__in=ids)
+
+    with transaction.atomic():
+        marked = notifications.update(read=True)
+        add_unread(player.pk, -marked)
+    return marked
+
+
+def retention_days():
+    return getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 30)
+
+# Deletes the read notifications older than the given days, in batches of
+# batch_size rows, so the table is never locked for long. If archive is a file,
+# the deleted notifications are written to it as JSON lines.
+# Returns the number of deleted notifications.
+def compact_notifications(days=None, batch_size=1000, archive=None):
+    cutoff = timezone.now() - timedelta(days=retention_days() if days is None else days)
+    old_notifications = Notification.objects.filter(read=True, timestamp__lt=cutoff).order_by('timestamp')
+    deleted = 0
+
+    while True:
+        with transaction.atomic():
+            batch = list(old_notifications.values('id', 'player_id', 'text', 'link', 'timestamp')[:batch_size])
+            if not batch:
+                return deleted
+            if archive is not None:
+                for notification in batch:
+                    archive.write(json.dumps(notification, cls=DjangoJSONEncoder) + '\n')
+            Notification.objects.filter(id__in=[notification['id'] for notification in batch]).delete()
+        deleted += len(batch)
@@ -0,0 +1,143 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.db.models import F
+from djapi.events import publish_to_player
+from djapi.models import Notification, Player
+from djapi.serializers import NotificationSerializer
+
+# Outbox of the notifications of the players. The views enqueue the notifications,
+# and they are written with a single bulk_create, the unread counters are updated
+# with one UPDATE per number of notifications, and they are pushed to the event
+# stream of the players. The notifications are only enqueued when the current
+# transaction is committed, so a failed request never notifies anything.
+#
+# If NOTIFICATION_OUTBOX_WRITE_BEHIND is enabled, the notifications are written by
+# a background thread every NOTIFICATION_OUTBOX_FLUSH_INTERVAL seconds, out of the
+# request. Otherwise, they are written when the transaction is committed.
+#
+# The notifications of the players deleted in the meantime are discarded. A
+# notification is never worth failing a request that has already been committed,
+# so the errors are logged and the notifications are dropped, or kept for the next
+# flush in write-behind mode (at most NOTIFICATION_OUTBOX_MAX_SIZE of them).
+#
+# Example: notify([(player.id, 'You have a new friend request!', link)])
+
+logger = logging.getLogger(__name__)
+
+
+# Enqueues notifications, given as (player_id, text, link) tuples
+def notify(notifications):
+    notifications = [Notification(player_id=player_id, text=text, link=link) for player_id, text, link in notifications]
+    if notifications:
+        transaction.on_commit(lambda: enqueue(notifications))
+
+# Enqueues the same notification for several players, like the start of a round
+# of a tournament
+def notify_players(player_ids, text, link=''):
+    notify([(player_id, text, link) for player_id in player_ids])
+
+def enqueue(notifications):
+    if getattr(settings, 'NOTIFICATION_OUTBOX_WRITE_BEHIND', False):
+        notification_outbox.add(notifications)
+        return
+    try:
+        write_notifications(notifications)
+    except Exception:
+        logger.exception('%d notifications could not be written.', len(notifications))
+
+def max_outbox_size():
+    return getattr(settings, 'NOTIFICATION_OUTBOX_MAX_SIZE', 10000)
+
+# Writes the notifications, counts them as unread and pushes them to the players.
+# The notifications of players that no longer exist are discarded. The counters
+# are updated first, so the transaction takes the write lock before reading the
+# players (SQLite can not upgrade a read lock while other transactions write).
+def write_notifications(notifications):
+    with transaction.atomic():
+        # The players with the same number of new notifications are updated together
+        players_by_count = {}
+        for player_id, count in Counter(notification.player_id for notification in notifications).items():
+            players_by_count.setdefault(count, []).append(player_id)
+        for count, player_ids in players_by_count.items():
+            Player.objects.filter(id__in=player_ids).update(unread_notifications=F('unread_notifications') + count)
+
+        existing = set(Player.objects.filter(id__in={notification.player_id for notification in notifications})
+                       .values_list('id', flat=True))
+        discarded = len(notifications) - sum(notification.player_id in existing for notification in notifications)
+        if discarded:
+            logger.warning('%d notifications of deleted players have been discarded.', discarded)
+            notifications = [notification for notification in notifications if notification.player_id in existing]
+        notifications = Notification.objects.bulk_create(notifications)
+
+        for notification in notifications:
+            publish_to_player(notification.player_id, 'notification', NotificationSerializer(notification).data)
+    return len(notifications)
+
+
+# In memory queue of the notifications, written by a background thread
+class NotificationOutbox(object):
+    def __init__(self):
+        self.pending = []
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.thread = None
+
+    def add(self, notifications):
+        with self.lock:
+            self.pending.extend(notifications)
+            self._discard_overflow()
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='notification-outbox', daemon=True)
+                self.thread.start()
+
+    # Writes the queued notifications. Returns the number of written notifications.
+    def flush(self):
+        with self.flush_lock:
+            with self.lock:
+                pending, self.pending = self.pending, []
+            if not pending:
+                return 0
+            try:
+                return write_notifications(pending)
+            except Exception:
+                # The notifications are kept to be written in the next flush
+                with self.lock:
+                    self.pending[:0] = pending
+                    self._discard_overflow()
+                raise
+
+    # The oldest notifications are discarded when the queue is full, so a database
+    # that is not available does not fill the memory of the process
+    def _discard_overflow(self):
+        overflow = len(self.pending) - max_outbox_size()
+        if overflow > 0:
+            del self.pending[:overflow]
+            logger.warning('The notification outbox is full, %d notifications have been discarded.', overflow)
+
+    def run(self):
+        while True:
+            time.sleep(getattr(settings, 'NOTIFICATION_OUTBOX_FLUSH_INTERVAL', 0.5))
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('The notifications could not be written.')
+            finally:
+                connections.close_all()
+
+
+notification_outbox = NotificationOutbox()
+
+# The queued notifications are written when the process ends
+def flush_at_exit():
+    try:
+        notification_outbox.flush()
+    except Exception:
+        logger.exception('The notifications could not be written.')
+
+atexit.register(flush_at_exit)
@@ -0,0 +1,125 @@
+import base64
+import heapq
+import json
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+# Keyset pagination of the histories of the players. The rows are ordered by a
+# unique key, like (-date_played, -id), and every page starts after the last
+# row of the previous page:
+#
+#   WHERE date_played <= last_date AND (date_played < last_date OR id < last_id)
+#   ORDER BY date_played DESC, id DESC LIMIT n
+#
+# The index of the key is read from that position, so the cost of a page does
+# not depend on how deep it is, unlike the OFFSET of the page number pagination.
+#
+# The body of the response is the same list of results as before. The position
+# of the next page is an opaque cursor, sent in the X-Next-Cursor and Link
+# headers, and requested with ?cursor=.
+
+
+class KeysetPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    max_limit = 100
+
+    def __init__(self, ordering, default_limit=15):
+        self.ordering = ordering
+        self.default_limit = default_limit
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get(self.limit_query_param, self.default_limit))
+        except ValueError:
+            raise ValidationError({'error': 'Invalid limit.'})
+        return max(1, min(limit, self.max_limit))
+
+    def encode_cursor(self, obj):
+        values = [getattr(obj, field.lstrip('-')) for field in self.ordering]
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor, model):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            return [model._meta.get_field(field.lstrip('-')).to_python(value)
+                    for field, value in zip(self.ordering, values)]
+        except Exception:
+            raise ValidationError({'error': 'Invalid cursor.'})
+
+    # Condition of the rows after the cursor. The first field is also compared
+    # with <= (or >=), so the database can use it as the start of the index range.
+    def after_cursor(self, values):
+        condition = None
+        for field, value in reversed(list(zip(self.ordering, values))):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            strict = Q(**{f'{name}__{lookup}': value})
+            condition = strict if condition is None else strict | Q(**{name: value}) & condition
+        name = self.ordering[0].lstrip('-')
+        lookup = 'lte' if self.ordering[0].startswith('-') else 'gte'
+        return Q(**{f'{name}__{lookup}': values[0]}) & condition
+
+    def sort_key(self, obj):
+        key = []
+        for field in self.ordering:
+            value = getattr(obj, field.lstrip('-'))
+            key.append(_Descending(value) if field.startswith('-') else value)
+        return tuple(key)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.paginate_querysets([queryset], request)
+
+    # Paginates the union of several querysets of the same model. Every queryset
+    # reads its own index, and the pages are merged, which is faster than
+    # ordering the rows of a single query with OR conditions.
+    def paginate_querysets(self, querysets, request):
+        self.request = request
+        limit = self.get_limit(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+
+        pages = []
+        for queryset in querysets:
+            if cursor:
+                queryset = queryset.filter(self.after_cursor(self.decode_cursor(cursor, queryset.model)))
+            pages.append(queryset.order_by(*self.ordering)[:limit + 1])
+
+        rows = []
+        seen = set()
+        for obj in heapq.merge(*pages, key=self.sort_key):
+            if obj.pk not in seen:
+                seen.add(obj.pk)
+                rows.append(obj)
+
+        self.next_cursor = self.encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+        return rows[:limit]
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        headers = {}
+        if self.next_cursor is not None:
+            headers['X-Next-Cursor'] = self.next_cursor
+            headers['Link'] = f'<{self.get_next_link()}>; rel="next"'
+        return Response(data, headers=headers)
+
+
+# Value that is sorted in the opposite order, for the descending fields
+class _Descending(object):
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return self.value > other.value
+
+    def __eq__(self, other):
+        return self.value == other.value
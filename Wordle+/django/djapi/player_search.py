@@ -0,0 +1,180 @@
+import base64
+import bisect
+import json
+import threading
+import time
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.functions import Upper
+from djapi.models import Player
+
+# Search of the players by username, ignoring the case. The results are ranked:
+# first the usernames that start with the text (the exact match is the first of
+# them), and then the usernames that contain it. Every group is ordered by username.
+#
+# The position of a result is its key (group, upper username, player id), and a
+# page is read from the key of the last result of the previous page, so the cost
+# of a page does not depend on the number of players or on how deep it is.
+#
+# Backends (PLAYER_SEARCH_BACKEND):
+# - 'database': queries with LIKE. In PostgreSQL, they are answered with the
+#   indexes of UPPER(username) created by the migration 0008: a varchar_pattern_ops
+#   B-tree for the prefixes and a trigram GIN index for the substrings.
+# - 'memory': a sorted list of the usernames of every player and a trigram index of
+#   them, kept by each process (see PlayerIndex). The prefixes are found with a
+#   binary search. Used with SQLite and in the tests.
+
+PREFIX = 0
+SUBSTRING = 1
+
+
+def search_backend():
+    backend = getattr(settings, 'PLAYER_SEARCH_BACKEND', None)
+    if backend is None:
+        backend = 'database' if connection.vendor == 'postgresql' else 'memory'
+    return backend
+
+# The substrings are only searched with texts of this length, as shorter texts
+# are in most of the usernames and the trigram index can not filter them
+def min_substring_length():
+    return getattr(settings, 'PLAYER_SEARCH_MIN_SUBSTRING_LENGTH', 3)
+
+# The in-memory index is rebuilt from time to time, so the changes of other
+# processes are eventually seen
+def index_timeout():
+    return getattr(settings, 'PLAYER_SEARCH_INDEX_TIMEOUT', 60)
+
+
+# Returns up to limit results after the given key, as (key, {'id': ..., 'username': ...})
+def search_players(text, after=None, limit=20, exclude_user_id=None):
+    text = text.upper()
+    search = memory_search if search_backend() == 'memory' else database_search
+    results = []
+    for group in (PREFIX, SUBSTRING):
+        if after is not None and group < after[0]:
+            continue
+        if group == SUBSTRING and len(text) < min_substring_length():
+            break
+        start = after[1:] if after is not None and group == after[0] else None
+        for name, player_id, username, user_id in search(text, group, start, limit - len(results), exclude_user_id):
+            results.append(((group, name, player_id), {'username': username, 'id': player_id}))
+        if len(results) >= limit:
+            break
+    return results
+
+# Rows (upper username, player id, username, user id) of the group, ordered by key
+def database_search(text, group, start, limit, exclude_user_id):
+    players = Player.objects.annotate(name=Upper('user__username'))
+    if group == PREFIX:
+        players = players.filter(user__username__istartswith=text)
+    else:
+        players = players.filter(user__username__icontains=text).exclude(user__username__istartswith=text)
+    if start is not None:
+        players = players.filter(Q(name__gt=start[0]) | Q(name=start[0], id__gt=start[1]))
+    if exclude_user_id is not None:
+        players = players.exclude(user_id=exclude_user_id)
+    return list(players.order_by('name', 'id').values_list('name', 'id', 'user__username', 'user_id')[:limit])
+
+def memory_search(text, group, start, limit, exclude_user_id):
+    entries, trigrams = player_index.get()
+    if group == PREFIX:
+        candidates = entries
+        position = bisect.bisect_left(entries, (text,))
+    else:
+        # The candidates are the usernames with the least common trigram of the text
+        candidates = min((trigrams.get(trigram, ()) for trigram in _trigrams(text)), key=len)
+        position = 0
+    if start is not None:
+        position = max(position, bisect.bisect_left(candidates, (start[0], start[1] + 1)))
+
+    rows = []
+    while len(rows) < limit and position < len(candidates):
+        entry = candidates[position]
+        position += 1
+        if group == PREFIX and not entry[0].startswith(text):
+            break
+        if entry[3] == exclude_user_id:
+            continue
+        if group == PREFIX or (text in entry[0] and not entry[0].startswith(text)):
+            rows.append(entry)
+    return rows
+
+def _trigrams(name):
+    return {name[index:index + 3] for index in range(len(name) - 2)}
+
+
+# Sorted list of (upper username, player id, username, user id) of every player,
+# and the sorted lists of the entries that contain each trigram of the usernames.
+# A prefix is read from its position in the list. A substring is searched in the
+# entries of its least common trigram, so its cost grows with the number of
+# usernames that contain that trigram, not with the number of players.
+class PlayerIndex(object):
+    def __init__(self):
+        self._index = None
+        self._built_at = 0
+        self._lock = threading.Lock()
+
+    # Returns (entries, {trigram: entries})
+    def get(self):
+        index = self._index
+        if index is None or time.monotonic() - self._built_at > index_timeout():
+            with self._lock:
+                if self._index is index:
+                    self._index = self.build()
+                    self._built_at = time.monotonic()
+                index = self._index
+        return index
+
+    def build(self):
+        players = Player.objects.values_list('id', 'user__username', 'user_id')
+        entries = sorted((username.upper(), player_id, username, user_id) for player_id, username, user_id in players)
+        trigrams = {}
+        for entry in entries:
+            for trigram in _trigrams(entry[0]):
+                trigrams.setdefault(trigram, []).append(entry)
+        return entries, trigrams
+
+    # Inserts a new player in its position, if the index has been built
+    def add(self, player_id, username, user_id):
+        entry = (username.upper(), player_id, username, user_id)
+        with self._lock:
+            if self._index is None:
+                return
+            entries, trigrams = self._index
+            position = bisect.bisect_left(entries, entry)
+            # The index may have been built after the player was committed
+            if position < len(entries) and entries[position] == entry:
+                return
+            entries.insert(position, entry)
+            for trigram in _trigrams(entry[0]):
+                bisect.insort(trigrams.setdefault(trigram, []), entry)
+
+    def clear(self):
+        self._index = None
+
+player_index = PlayerIndex()
+
+# The new players are inserted in the index when their transaction is committed
+def add_to_player_index(player):
+    player_id, username, user_id = player.id, player.user.username, player.user_id
+    transaction.on_commit(lambda: player_index.add(player_id, username, user_id))
+
+# The index is rebuilt when the transaction that changes the players is committed
+def invalidate_player_index():
+    transaction.on_commit(player_index.clear)
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+# Returns the key of the cursor. Raises ValueError if it is not valid.
+def decode_cursor(cursor):
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError('Invalid cursor.')
+    if (not isinstance(key, list) or len(key) != 3 or key[0] not in (PREFIX, SUBSTRING)
+            or not isinstance(key[1], str) or not isinstance(key[2], int)):
+        raise ValueError('Invalid cursor.')
+    return tuple(key)
@@ -0,0 +1,138 @@
+import numpy as np
+from django.conf import settings
+
+# Scoring engine of the guesses. The words are encoded as arrays of letter codes
+# (0 for 'a' ... 25 for 'z'), so a whole list of guesses, or the guesses of many
+# games at once, are scored in a single vectorized pass.
+
+GREY = 0
+YELLOW = 1
+GREEN = 2
+
+MAX_GUESSES = 6
+ALPHABET_SIZE = 26
+
+
+# Temporary compatibility with the clients that do not send the guesses yet: if
+# enabled, the results computed by the client are accepted when the guesses are
+# missing. Otherwise, the games without guesses are rejected.
+def trust_client_results():
+    return getattr(settings, 'SCORING_TRUST_CLIENT_RESULTS', True)
+
+# Encodes a list of words of the same length into a (N, length) array of letter codes
+def encode_words(words, length):
+    for word in words:
+        if not isinstance(word, str) or len(word) != length:
+            raise ValueError(f'Every word must have {length} letters.')
+
+    data = ''.join(words).lower().encode('ascii', 'replace')
+    encoded = (np.frombuffer(data, dtype=np.uint8) - ord('a')).reshape(len(words), length)
+    if (encoded >= ALPHABET_SIZE).any():
+        invalid_row = int((encoded >= ALPHABET_SIZE).any(axis=1).argmax())
+        raise ValueError(f'Invalid word: {words[invalid_row]}')
+    return encoded
+
+# Scores every guess against its target. Both arguments are arrays of letter codes
+# of shape (N, length); the target may also be a single row that is used for every
+# guess. Returns a (N, length) array with GREY, YELLOW or GREEN for each letter.
+# Repeated letters are coloured as in the client: greens first, then yellows from
+# left to right while the target has unmatched copies of the letter.
+def score_encoded(guesses, targets):
+    guesses = np.atleast_2d(guesses)
+    targets = np.broadcast_to(np.atleast_2d(targets), guesses.shape)
+    rows = np.arange(guesses.shape[0])
+
+    green = guesses == targets
+    feedback = np.where(green, GREEN, GREY).astype(np.int8)
+
+    # Letters of the target that are not matched by a green, per guess
+    remaining = np.zeros((guesses.shape[0], ALPHABET_SIZE), dtype=np.int8)
+    for position in range(guesses.shape[1]):
+        unmatched = ~green[:, position]
+        np.add.at(remaining, (rows[unmatched], targets[unmatched, position]), 1)
+
+    for position in range(guesses.shape[1]):
+        letters = guesses[:, position]
+        yellow = ~green[:, position] & (remaining[rows, letters] > 0)
+        feedback[yellow, position] = YELLOW
+        remaining[rows[yellow], letters[yellow]] -= 1
+
+    return feedback
+
+# Scores a list of guesses against a target word, or against a list of targets
+def score_guesses(guesses, targets):
+    if not guesses:
+        return np.empty((0, 0), dtype=np.int8)
+    length = len(guesses[0])
+    if isinstance(targets, str):
+        targets = [targets]
+    return score_encoded(encode_words(guesses, length), encode_words(targets, length))
+
+# Scores a single guess. Returns a list with the colour of each letter
+def score_guess(guess, target):
+    return score_guesses([guess], target)[0].tolist()
+
+# Experience gained in a game. It is the same formula used by the client, and it
+# works both with numbers and with arrays of values.
+def experience(time_consumed, attempts, word_length, win):
+    base_experience = 300
+    time_experience = base_experience - np.asarray(time_consumed) * 10
+    guesses_experience = base_experience - np.asarray(attempts) * 5
+    length_experience = base_experience + np.asarray(word_length) * 10
+
+    total = time_experience + guesses_experience + length_experience
+    total = np.where(win, total, total * 0.5)
+    return np.maximum(total, 1).astype(np.int64)
+
+# Scores many games at once. Every game is a (word, guesses, time_consumed) tuple.
+# All the guesses of the games with the same word length are scored in one pass.
+# Returns a list with the attempts, win and xp_gained of every game, in order.
+# Raises ValueError if a game has not ended: it must be won with its last guess,
+# or lost after MAX_GUESSES guesses.
+def score_games(games):
+    results = [None] * len(games)
+
+    games_by_length = {}
+    for index, (word, guesses, time_consumed) in enumerate(games):
+        if not guesses or len(guesses) > MAX_GUESSES:
+            raise ValueError(f'A game must have between 1 and {MAX_GUESSES} guesses.')
+        games_by_length.setdefault(len(word), []).append(index)
+
+    for length, indexes in games_by_length.items():
+        guesses = [guess for index in indexes for guess in games[index][1]]
+        targets = [games[index][0] for index in indexes for _ in games[index][1]]
+        solved = (score_encoded(encode_words(guesses, length), encode_words(targets, length)) == GREEN).all(axis=1)
+
+        attempts = np.empty(len(indexes), dtype=np.int64)
+        wins = np.zeros(len(indexes), dtype=bool)
+        times = np.empty(len(indexes), dtype=np.int64)
+        offset = 0
+        for row, index in enumerate(indexes):
+            word, game_guesses, time_consumed = games[index]
+            game_solved = solved[offset:offset + len(game_guesses)]
+            offset += len(game_guesses)
+
+            if game_solved.any():
+                attempts[row] = int(game_solved.argmax()) + 1
+                wins[row] = True
+                if attempts[row] < len(game_guesses):
+                    raise ValueError('No guesses are allowed after the word has been found.')
+            elif len(game_guesses) < MAX_GUESSES:
+                raise ValueError(f'A game that is not won must have {MAX_GUESSES} guesses.')
+            else:
+                attempts[row] = len(game_guesses)
+            times[row] = time_consumed
+
+        xp = experience(times, attempts, length, wins)
+        for row, index in enumerate(indexes):
+            results[index] = {
+                'attempts': int(attempts[row]),
+                'win': bool(wins[row]),
+                'xp_gained': int(xp[row]),
+            }
+
+    return results
+
+# Scores a single game
+def score_game(word, guesses, time_consumed):
+    return score_games([(word, guesses, time_consumed)])[0]
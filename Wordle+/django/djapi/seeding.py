@@ -0,0 +1,233 @@
+import math
+import random
+import string
+from datetime import timedelta
+from itertools import islice
+from django.contrib.auth.hashers import make_password
+from django.db.models import F
+from django.utils import timezone
+from djapi.models import (CustomUser, Player, ClassicWordle, Game, Tournament, Participation,
+                          Round, RoundGame, FriendList, FriendRequest, Notification, get_staff_group)
+from djapi.player_search import invalidate_player_index
+from djapi.tournament_lists import invalidate_tournament_lists
+
+# Generator of synthetic data, used by the benchmarks and the seed_load command.
+# Every row is created with bulk_create in chunks, and the data only depends on
+# the seed, so two runs with the same seed on an empty database create the same
+# dataset.
+#
+# bulk_create does not send the post_save signals, so the receivers that run for
+# every object (models.assign_permissions and signals.game_completed) are not
+# executed. Their results are created in bulk instead: the staff users are added
+# to the 'Staff' group, and the tournaments are created with the games that the
+# completed rounds would have generated.
+
+SEED_PASSWORD = 'password'
+
+
+class DataSeeder(object):
+    def __init__(self, seed=0, batch_size=2000):
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.now = timezone.now()
+        # Hashing a password is slow on purpose, so every user shares the same hash.
+        # The salt has the length of a random one, so it is not updated on login.
+        salt = ''.join(self.random.choices(string.ascii_letters + string.digits, k=22))
+        self.password = make_password(SEED_PASSWORD, salt=salt)
+
+    def random_word(self, length=5):
+        return ''.join(self.random.choices(string.ascii_lowercase, k=length))
+
+    def random_date(self, days=365):
+        return self.now - timedelta(seconds=self.random.randint(0, days * 24 * 3600))
+
+    def bulk_create(self, model, objects):
+        return model.objects.bulk_create(objects, batch_size=self.batch_size)
+
+    # Creates the objects of the iterable in chunks, so they are never all in
+    # memory. Returns the number of created objects.
+    def bulk_create_chunks(self, model, objects):
+        objects = iter(objects)
+        count = 0
+        while True:
+            chunk = list(islice(objects, self.batch_size))
+            if not chunk:
+                return count
+            model.objects.bulk_create(chunk)
+            count += len(chunk)
+
+    def create_users(self, count, prefix, is_staff=False):
+        start = CustomUser.objects.filter(username__startswith=prefix).count()
+        return self.bulk_create(CustomUser, [
+            CustomUser(username=f'{prefix}{start + i}', password=self.password,
+                       email=f'{prefix}{start + i}@wordle.plus', is_staff=is_staff)
+            for i in range(count)
+        ])
+
+    def create_players(self, count, prefix='player'):
+        users = self.create_users(count, prefix)
+        invalidate_player_index()
+        return self.bulk_create(Player, [
+            Player(
+                user=user,
+                wins=self.random.randint(0, 200),
+                wins_pvp=self.random.randint(0, 100),
+                wins_tournament=self.random.randint(0, 10),
+                xp=self.random.randint(0, 100000),
+            )
+            for user in users
+        ])
+
+    # Creates event managers. They are added to the 'Staff' group, as
+    # models.assign_permissions does when they are saved one by one.
+    def create_staff(self, count, prefix='staff'):
+        users = self.create_users(count, prefix, is_staff=True)
+        membership = CustomUser.groups.through
+        staff_group = get_staff_group()
+        self.bulk_create(membership, [membership(customuser_id=user.id, group_id=staff_group.id) for user in users])
+        return users
+
+    # Creates a friend graph where every player has about 2 * per_player friends.
+    # The players are placed in a random circle, and every player is related to
+    # the players at some random distances. Distances up to half of the circle
+    # never generate the same pair twice, so no set of pairs is needed. The
+    # pending friend requests use other distances than the friendships.
+    def create_friendships(self, players, per_player, requests_per_player=0):
+        count = len(players)
+        max_distance = (count - 1) // 2
+        per_player = min(per_player, max_distance)
+        requests_per_player = min(requests_per_player, max_distance - per_player)
+        circle = [player.id for player in players]
+        self.random.shuffle(circle)
+
+        def relations(first, last):
+            for i, player in enumerate(circle):
+                distances = self.random.sample(range(1, max_distance + 1), per_player + requests_per_player)
+                for distance in distances[first:last]:
+                    yield player, circle[(i + distance) % count]
+
+        # The same seed generates the same distances for both relations. The
+        # friendships are stored in both directions, as friend_graph does.
+        state = self.random.getstate()
+        friendships = self.bulk_create_chunks(FriendList, (
+            FriendList(sender_id=sender, receiver_id=receiver)
+            for player, friend in relations(0, per_player)
+            for sender, receiver in ((player, friend), (friend, player))
+        ))
+        self.random.setstate(state)
+        requests = self.bulk_create_chunks(FriendRequest, (
+            FriendRequest(sender_id=player, receiver_id=other) for player, other in relations(per_player, None)
+        ))
+        return friendships, requests
+
+    # Creates the notifications of the players. The first read_ratio of the
+    # notifications of every player are read, and the rest are counted as unread.
+    def create_notifications(self, players, per_player, read_ratio=0.8):
+        texts = ['You have a new friend request.', 'A player has challenged you!', 'A tournament has started.',
+                 'Your game has finished.']
+        read = int(per_player * read_ratio)
+        created = self.bulk_create_chunks(Notification, (
+            Notification(player_id=player.id, text=self.random.choice(texts), read=i < read)
+            for player in players
+            for i in range(per_player)
+        ))
+        player_ids = [player.id for player in players]
+        for start in range(0, len(player_ids), self.batch_size):
+            Player.objects.filter(id__in=player_ids[start:start + self.batch_size]).update(
+                unread_notifications=F('unread_notifications') + per_player - read)
+        return created
+
+    def create_classic_games(self, players, count):
+        player_ids = [player.id for player in players]
+        return self.bulk_create_chunks(ClassicWordle, (
+            ClassicWordle(
+                player_id=self.random.choice(player_ids),
+                word=self.random_word(),
+                time_consumed=self.random.randint(10, 600),
+                attempts=self.random.randint(1, 6),
+                xp_gained=self.random.randint(1, 900),
+                date_played=self.random_date(),
+                win=self.random.random() < 0.6,
+            )
+            for _ in range(count)
+        ))
+
+    # Creates PvP games. A part of them are pending (without a winner).
+    def create_games(self, players, count, pending_ratio=0.2):
+        player_ids = [player.id for player in players]
+
+        def games():
+            for _ in range(count):
+                player1, player2 = self.random.sample(player_ids, 2)
+                pending = self.random.random() < pending_ratio
+                yield Game(
+                    player1_id=player1,
+                    player2_id=player2,
+                    word=self.random_word(),
+                    player1_time=self.random.randint(10, 600),
+                    player1_attempts=self.random.randint(1, 6),
+                    player1_xp=self.random.randint(1, 900),
+                    player2_time=0 if pending else self.random.randint(10, 600),
+                    player2_attempts=0 if pending else self.random.randint(1, 6),
+                    player2_xp=0 if pending else self.random.randint(1, 900),
+                    winner_id=None if pending else self.random.choice([player1, player2]),
+                )
+        return self.bulk_create_chunks(Game, games())
+
+    # Creates closed tournaments with their rounds and games. The rounds before
+    # the current one are completed. The tournaments are created in chunks, and
+    # the first chunk is returned.
+    def create_tournaments(self, players, count, max_players=16, word_length=5):
+        max_players = min(max_players, 2 ** int(math.log2(len(players))))
+        chunk_size = max(1, self.batch_size // max_players)
+        tournaments = []
+        for start in range(0, count, chunk_size):
+            created = self._create_tournaments(players, start, min(chunk_size, count - start), max_players, word_length)
+            tournaments = tournaments or created
+        invalidate_tournament_lists()
+        return tournaments
+
+    def _create_tournaments(self, players, start, count, max_players, word_length):
+        num_rounds = int(math.log2(max_players))
+        tournaments = self.bulk_create(Tournament, [
+            Tournament(
+                name=f'Tournament {start + i}',
+                max_players=max_players,
+                num_players=max_players,
+                word_length=word_length,
+                is_closed=True,
+                current_round=self.random.randint(1, num_rounds),
+            )
+            for i in range(count)
+        ])
+
+        participations = []
+        rounds = []
+        brackets = []
+        for tournament in tournaments:
+            participants = self.random.sample(players, max_players)
+            participations.extend(Participation(tournament=tournament, player=player) for player in participants)
+            tournament_rounds = [Round(tournament=tournament, number=number) for number in range(1, num_rounds + 1)]
+            rounds.extend(tournament_rounds)
+            brackets.append((tournament, participants, tournament_rounds))
+        self.bulk_create(Participation, participations)
+        self.bulk_create(Round, rounds)
+
+        # Games of the rounds, as signals.game_completed creates them when a round ends
+        games = []
+        round_of_game = []
+        for tournament, participants, tournament_rounds in brackets:
+            alive = participants
+            for round in tournament_rounds[:tournament.current_round]:
+                completed = round.number < tournament.current_round
+                winners = []
+                for i in range(0, len(alive), 2):
+                    winner = self.random.choice(alive[i:i + 2]) if completed else None
+                    winners.append(winner)
+                    games.append(Game(player1=alive[i], player2=alive[i + 1], word=self.random_word(word_length),
+                                      winner=winner, is_tournament_game=True))
+                    round_of_game.append(round)
+                alive = winners
+        games = self.bulk_create(Game, games)
+        self.bulk_create(RoundGame, [RoundGame(round=round, game=game) for round, game in zip(round_of_game, games)])
+        return tournaments
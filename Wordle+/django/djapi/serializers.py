@@ -2,6 +2,7 @@ from django.contrib.auth.models import Group
 from .models import CustomUser, Player, StaffCode, ClassicWordle, Notification, Tournament, Participation, FriendList, FriendRequest, Game, Round
 from rest_framework import serializers
 from django.contrib.auth.hashers import make_password
+from .stats import add_player_stats
 
 
 # Serializer related to the CustomUser model. It considers all the fields
@@ -119,17 +120,15 @@ class ClassicWordleSerializer(serializers.ModelSerializer):
         xp = validated_data['xp_gained']
 
         # Increment the number of victories and add the xp_gained
-        if is_winner:
-            player.wins += 1
-        player.xp += xp
-        player.save()
+        add_player_stats(player, wins=1 if is_winner else 0, xp=xp)
 
         return ClassicWordle.objects.create(**validated_data)
 
 class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notification
-        fields = ['text', 'link']
+        fields = ['id', 'text', 'link', 'timestamp', 'read']
+        read_only_fields = ['timestamp', 'read']
 
 class TournamentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -148,15 +147,10 @@ class FriendListSerializer(serializers.ModelSerializer):
         model = FriendList
         fields = ['friend']
 
-    # Return the sender or receiver depending on the friend field.
+    # The rows of the friend list of a player have the friend as receiver.
+    # The friends and their users should be loaded with select_related.
     def get_friend(self, obj):
-        request = self.context.get('request')
-        player = request.user.player
-        if obj.sender == player:
-            friend = obj.receiver
-        else:
-            friend = obj.sender
-        return {'username': friend.user.username, 'id_player': friend.user.player.id}
+        return {'username': obj.receiver.user.username, 'id_player': obj.receiver_id}
 
 class FriendRequestSerializer(serializers.ModelSerializer):
     sender = serializers.SerializerMethodField()
@@ -166,7 +160,7 @@ class FriendRequestSerializer(serializers.ModelSerializer):
         fields = ['id', 'sender']
 
     def get_sender(self, obj):
-        return {'username': obj.sender.user.username, 'id_player': obj.sender.user.player.id}
+        return {'username': obj.sender.user.username, 'id_player': obj.sender_id}
 
 class GameDetailSerializer(serializers.ModelSerializer):
     player1 = serializers.SerializerMethodField()
@@ -184,6 +178,19 @@ class GameDetailSerializer(serializers.ModelSerializer):
     def get_player2(self, obj):
         return obj.player2.user.username
 
+# Game of the bracket of a tournament. The games are read with the usernames of
+# the players, so the username of the winner is taken from them.
+class BracketGameSerializer(GameDetailSerializer):
+    winner_username = serializers.SerializerMethodField()
+
+    class Meta(GameDetailSerializer.Meta):
+        fields = GameDetailSerializer.Meta.fields + ['winner_username']
+
+    def get_winner_username(self, obj):
+        if obj.winner_id is None:
+            return None
+        return obj.player1.user.username if obj.winner_id == obj.player1_id else obj.player2.user.username
+
 class GameCreateSerializer(serializers.ModelSerializer):
     player2 = serializers.SerializerMethodField()
     class Meta:
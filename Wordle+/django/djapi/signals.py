@@ -1,40 +1,107 @@
 from django.dispatch import receiver
-from django.db.models.signals import post_save
-from .models import Game, RoundGame, Round
-import math
+from django.db.models.signals import post_save, post_delete, pre_save
+from rest_framework.authtoken.models import Token
+from django.utils import timezone
+from .models import CustomUser, Player, Game, Notification, Tournament
+from .serializers import NotificationSerializer
+from .token_expire import token_cache
+from . import leaderboards
+from .brackets import advance_round
+from .events import publish_to_player, publish_to_players
+from .friend_rankings import invalidate_friend_rankings
+from .notifications import add_unread
+from .player_search import add_to_player_index, invalidate_player_index
+from .tournament_lists import invalidate_tournament_lists
 
-# Singal executed every time a tournament game is completed
+# The users and players built from a signed token only have the fields of the
+# token, as they were at login, so saving them would write back outdated values
+@receiver(pre_save, sender=CustomUser)
+@receiver(pre_save, sender=Player)
+def token_instance_saved(sender, instance, **kwargs):
+    if getattr(instance, 'from_signed_token', False):
+        raise ValueError(f'{sender.__name__} built from a signed token can not be saved, it must be read from the database.')
+
+# Removes the deleted tokens from the cache of validated tokens
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    token_cache.delete(instance.key)
+
+# The cached tokens include the user and the player, so they are removed
+# from the cache when any of them changes
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def user_changed(sender, instance, **kwargs):
+    token_cache.delete_user(instance.id)
+
+# The leaderboards are updated every time the counters of a player are saved
+@receiver(post_save, sender=CustomUser)
+def user_saved(sender, instance, created, **kwargs):
+    if not created and 'username' not in instance.get_deferred_fields():
+        leaderboards.update_username(instance.id, instance.username)
+
+@receiver(post_save, sender=Player)
+@receiver(post_delete, sender=Player)
+def player_changed(sender, instance, **kwargs):
+    token_cache.delete_user(instance.user_id)
+
+@receiver(post_save, sender=Player)
+def player_saved(sender, instance, **kwargs):
+    leaderboards.update_player(instance)
+    invalidate_friend_rankings([instance.id])
+
+@receiver(post_delete, sender=Player)
+def player_deleted(sender, instance, **kwargs):
+    leaderboards.invalidate_leaderboards()
+    invalidate_player_index()
+    invalidate_friend_rankings([instance.id])
+
+# The new players are added to the search index, and the index is rebuilt when a
+# username may have changed (the logins only save the last_login)
+@receiver(post_save, sender=Player)
+def player_created(sender, instance, created, **kwargs):
+    if created:
+        add_to_player_index(instance)
+
+@receiver(post_save, sender=CustomUser)
+def username_saved(sender, instance, created, update_fields=None, **kwargs):
+    # A new user has no player yet, it is added with the player
+    if not created and (update_fields is None or 'username' in update_fields):
+        invalidate_player_index()
+
+# The new notifications are counted as unread and pushed to the event stream of the player
+@receiver(post_save, sender=Notification)
+def notification_created(sender, instance, created, **kwargs):
+    if created:
+        if not instance.read:
+            add_unread(instance.player_id, 1)
+        publish_to_player(instance.player_id, 'notification', NotificationSerializer(instance).data)
+
+# The players are told when they are challenged and when a game has a winner
+@receiver(post_save, sender=Game)
+def game_saved(sender, instance, created, **kwargs):
+    if created and not instance.is_tournament_game:
+        publish_to_player(instance.player2_id, 'challenge', {'game': instance.id})
+    if instance.winner_id is not None:
+        publish_to_players([instance.player1_id, instance.player2_id], 'game_result', {
+            'game': instance.id,
+            'winner': instance.winner_id,
+            'is_tournament_game': instance.is_tournament_game,
+        })
+
+# The cached lists of tournaments are invalidated when a tournament is edited,
+# e.g. from the admin site
+@receiver(post_save, sender=Tournament)
+@receiver(post_delete, sender=Tournament)
+def tournament_changed(sender, instance, **kwargs):
+    invalidate_tournament_lists()
+
+# The results of the tournament games change the bracket of their tournament
+@receiver(post_save, sender=Game)
+def tournament_game_saved(sender, instance, created, **kwargs):
+    if instance.is_tournament_game and not created:
+        Tournament.objects.filter(round__roundgame__game=instance).update(updated_at=timezone.now())
+
+# Advances the tournament when the last game of a round is completed
 @receiver(post_save, sender=Game)
 def game_completed(sender, instance, created, **kwargs):
-    if instance.is_tournament_game and instance.winner:
-        round = Round.objects.filter(roundgame__game=instance).last()
-        if round:
-            round_games = RoundGame.objects.filter(round=round)
-            if all(game.game.winner for game in round_games):
-                tournament = round.tournament
-                # Get current round
-                current_round_number = tournament.current_round
-                num_rounds = int(math.log2(tournament.max_players))
-
-                # Get winners of current round
-                winners = [game.game.winner for game in round_games]
-
-                # If its the last round, games are not created (tournament end)
-                if current_round_number == num_rounds:
-                    winner = instance.winner
-                    winner.wins_tournament += 1
-                    winner.xp += 1000
-                    winner.save()
-                else:
-                    # Get next round
-                    next_round_number = current_round_number + 1
-                    next_round = Round.objects.get(tournament=tournament, number=next_round_number)
-                    tournament.current_round = next_round_number
-                    tournament.save()
-
-                    # Create games and assign them to the round
-                    for i in range(0, len(winners), 2):
-                        player1 = winners[i]
-                        player2 = winners[i + 1]
-                        new_game = Game.objects.create(player1=player1, player2=player2, is_tournament_game=True)
-                        RoundGame.objects.create(round=next_round, game=new_game)
+    advance_round(instance)
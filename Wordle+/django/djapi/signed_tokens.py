@@ -0,0 +1,68 @@
+import secrets
+import time
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+
+# Stateless access tokens. A signed token carries the identity of the user, its
+# player and the expiration time, signed with HMAC using the SECRET_KEY, so it is
+# verified in memory without querying the database. Revoked tokens (logout) are
+# kept in the cache until they expire, so the cache must be shared by every
+# process that verifies tokens (see CACHES and the check djapi.W001).
+
+SIGNED_TOKEN_SALT = 'djapi.signed_tokens'
+REVOKED_TOKEN_KEY = 'revoked-token:{}'
+
+
+class SignedToken(object):
+    def __init__(self, key, payload):
+        self.key = key
+        self.token_id = payload['jti']
+        self.user_id = payload['uid']
+        self.player_id = payload.get('pid')
+        self.username = payload.get('usr', '')
+        self.is_staff = payload.get('stf', False)
+        self.is_superuser = payload.get('su', False)
+        self.expires = payload['exp']
+
+    def has_expired(self):
+        return self.expires <= time.time()
+
+
+# Creates a new signed token for the user
+def issue_signed_token(user):
+    player = getattr(user, 'player', None)
+    payload = {
+        'jti': secrets.token_hex(8),
+        'uid': user.id,
+        'pid': player.id if player else None,
+        'usr': user.username,
+        'stf': user.is_staff,
+        'su': user.is_superuser,
+        'exp': int(time.time()) + settings.TOKEN_EXPIRED_AFTER_SECONDS,
+    }
+    key = signing.dumps(payload, salt=SIGNED_TOKEN_SALT, compress=True)
+    return SignedToken(key, payload)
+
+# Verifies the signature of a token. Returns None if the token is not valid or
+# has been revoked. Expired tokens are returned, so the caller can report it.
+def verify_signed_token(key):
+    try:
+        payload = signing.loads(key, salt=SIGNED_TOKEN_SALT)
+    except signing.BadSignature:
+        return None
+
+    try:
+        token = SignedToken(key, payload)
+    except (KeyError, TypeError):
+        return None
+
+    if cache.get(REVOKED_TOKEN_KEY.format(token.token_id)):
+        return None
+    return token
+
+# Revokes a token until its expiration time
+def revoke_signed_token(token):
+    timeout = int(token.expires - time.time())
+    if timeout > 0:
+        cache.set(REVOKED_TOKEN_KEY.format(token.token_id), True, timeout=timeout)
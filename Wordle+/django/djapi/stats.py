@@ -0,0 +1,100 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.db.models import F
+from djapi.models import Player
+from djapi import leaderboards
+from djapi.friend_rankings import invalidate_friend_rankings
+
+# Updates of the counters of the players. The counters are incremented with a
+# single UPDATE that only writes the changed columns (UPDATE ... SET xp = xp + n),
+# so concurrent results of the same player are never lost.
+#
+# If PLAYER_STATS_WRITE_BEHIND is enabled, the increments are accumulated in memory
+# and written every PLAYER_STATS_FLUSH_INTERVAL seconds, with one UPDATE per player
+# for all the increments received in that interval.
+
+STAT_FIELDS = ('wins', 'wins_pvp', 'wins_tournament', 'xp')
+
+logger = logging.getLogger(__name__)
+
+
+# Increments the counters of a player. Example: add_player_stats(player, xp=300, wins=1)
+def add_player_stats(player, **increments):
+    for field in increments:
+        if field not in STAT_FIELDS:
+            raise ValueError(f'{field} is not a counter of the player.')
+
+    increments = {field: value for field, value in increments.items() if value}
+    if not increments:
+        return
+
+    if getattr(settings, 'PLAYER_STATS_WRITE_BEHIND', False):
+        stats_buffer.add(player.pk, increments)
+    else:
+        write_player_stats({player.pk: increments})
+
+# Writes the increments of every player, {player_id: {field: value}}, and updates
+# the leaderboards and the rankings of their friends with the new values
+def write_player_stats(increments_by_player):
+    for player_id, increments in increments_by_player.items():
+        Player.objects.filter(pk=player_id).update(
+            **{field: F(field) + value for field, value in increments.items()}
+        )
+
+    for player in Player.objects.filter(pk__in=increments_by_player.keys()):
+        leaderboards.update_player(player)
+    invalidate_friend_rankings(increments_by_player.keys())
+
+
+# In memory accumulation of the increments of the players
+class StatsBuffer(object):
+    def __init__(self):
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.thread = None
+
+    def add(self, player_id, increments):
+        with self.lock:
+            self.pending.setdefault(player_id, Counter()).update(increments)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='player-stats-flusher', daemon=True)
+                self.thread.start()
+
+    # Writes the accumulated increments. Returns the number of updated players.
+    def flush(self):
+        with self.flush_lock:
+            with self.lock:
+                pending, self.pending = self.pending, {}
+            if pending:
+                try:
+                    write_player_stats(pending)
+                except Exception:
+                    # The increments are kept to be written in the next flush
+                    with self.lock:
+                        for player_id, increments in pending.items():
+                            self.pending.setdefault(player_id, Counter()).update(increments)
+                    raise
+            return len(pending)
+
+    def run(self):
+        while True:
+            time.sleep(getattr(settings, 'PLAYER_STATS_FLUSH_INTERVAL', 1.0))
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('The player stats could not be written.')
+            finally:
+                connections.close_all()
+
+
+stats_buffer = StatsBuffer()
+
+# The pending increments are written when the process ends
+atexit.register(stats_buffer.flush)
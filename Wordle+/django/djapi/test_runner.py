@@ -0,0 +1,12 @@
+from django.test.runner import DiscoverRunner
+
+# Tags of the tests that only run when they are requested with --tag
+OPT_IN_TAGS = {'benchmark'}
+
+
+# Test runner of the project. The benchmark is slow and depends on the machine,
+# so it is excluded unless it is requested: python manage.py test djapi --tag benchmark
+class TestRunner(DiscoverRunner):
+    def __init__(self, tags=None, exclude_tags=None, **kwargs):
+        excluded = OPT_IN_TAGS - set(tags or ())
+        super().__init__(tags=tags, exclude_tags=set(exclude_tags or ()) | excluded, **kwargs)
@@ -0,0 +1,136 @@
+import time
+from datetime import timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from djapi.checks import check_signed_token_cache
+from djapi.models import CustomUser
+from djapi.token_expire import ExpiringTokenAuthentication, token_cache, token_is_active
+from djapi.tests.utils import create_player
+
+
+class ExpiringTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.player = create_player('player')
+        self.token = Token.objects.create(user=self.player.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_token_user_and_player_are_obtained_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/check-token-expiration/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_cached_token_does_not_query_the_database(self):
+        self.client.get('/check-token-expiration/')
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/check-token-expiration/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_expired_token_is_rejected_and_deleted(self):
+        Token.objects.filter(key=self.token.key).update(created=timezone.now() - timedelta(days=1))
+
+        response = self.client.get('/check-token-expiration/')
+
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(Token.objects.filter(key=self.token.key).exists())
+
+    def test_deleted_token_is_removed_from_the_cache(self):
+        self.client.get('/check-token-expiration/')
+        self.token.delete()
+
+        response = self.client.get('/check-token-expiration/')
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_player_changes_remove_the_cached_token(self):
+        self.client.get('/check-token-expiration/')
+        self.player.xp = 100
+        self.player.save()
+
+        with self.assertNumQueries(1):
+            self.client.get('/check-token-expiration/')
+
+
+@override_settings(TOKEN_MODE='signed')
+class SignedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.player = create_player('player')
+        self.client = APIClient()
+        response = self.client.post('/api-token-auth/', {'username': 'player', 'password': 'password'})
+        self.token = response.data['token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+
+    def test_login_does_not_store_a_token(self):
+        self.assertFalse(Token.objects.exists())
+
+    def test_signed_token_is_verified_without_queries(self):
+        with self.assertNumQueries(0):
+            response = self.client.get('/check-token-expiration/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_player_is_available_in_the_views(self):
+        response = self.client.post('/api/notifications/', {'text': 'Hello', 'link': ''})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.player.notifications.count(), 1)
+
+    def test_tampered_token_is_rejected(self):
+        payload, signature = self.token.rsplit(':', 1)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {payload}:{"A" * len(signature)}')
+
+        response = self.client.get('/check-token-expiration/')
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_expired_token_is_rejected(self):
+        expired = time.time() + 3601
+        with mock.patch('djapi.signed_tokens.time.time', return_value=expired):
+            response = self.client.get('/check-token-expiration/')
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_logout_revokes_the_token(self):
+        _, token = ExpiringTokenAuthentication().authenticate_credentials(self.token)
+        self.assertTrue(token_is_active(token))
+
+        response = self.client.post('/api-token-logout/')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(token_is_active(token))
+
+        response = self.client.get('/check-token-expiration/')
+        self.assertEqual(response.status_code, 401)
+
+    def test_user_info_update_does_not_restore_the_token_fields(self):
+        self.player.user.is_staff = True
+        self.player.user.save()
+        response = self.client.post('/api-token-auth/', {'username': 'player', 'password': 'password'})
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {response.data["token"]}')
+        CustomUser.objects.filter(id=self.player.user_id).update(is_staff=False, username='renamed')
+
+        response = self.client.patch('/api/users-info/', {'first_name': 'Name'})
+
+        self.assertEqual(response.status_code, 200)
+        user = CustomUser.objects.get(id=self.player.user_id)
+        self.assertEqual((user.username, user.is_staff, user.first_name), ('renamed', False, 'Name'))
+
+    def test_token_user_can_not_be_saved(self):
+        user, _ = ExpiringTokenAuthentication().authenticate_credentials(self.token)
+
+        with self.assertRaises(ValueError):
+            user.save()
+        with self.assertRaises(ValueError):
+            user.player.save()
+
+    def test_process_local_cache_is_reported(self):
+        self.assertEqual([message.id for message in check_signed_token_cache(None)], ['djapi.W001'])
+
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://redis:6379/0'}}
+        with override_settings(CACHES=redis):
+            self.assertEqual(check_signed_token_cache(None), [])
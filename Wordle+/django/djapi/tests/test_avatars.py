@@ -0,0 +1,304 @@
+import base64
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+from djapi.avatars import AvatarError, avatar_path, file_name, parse_name, save_avatar
+from djapi.checks import check_media_origin
+from djapi.media import serve_file
+from djapi.friend_graph import add_friendship
+from djapi.leaderboards import LEADERBOARD_FIELDS, get_leaderboard
+from djapi.models import Game, Participation, Tournament
+from djapi.tests.utils import create_player, image_bytes
+
+
+def data_url(content, content_type='image/png'):
+    return f'data:{content_type};base64,' + base64.b64encode(content).decode()
+
+
+class AvatarTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+        self.player = create_player('player')
+        self.user = self.player.user
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/avatar/{self.user.id}/'
+
+    def stored_size(self, name):
+        with default_storage.open(name, 'rb') as stored:
+            return Image.open(stored).size
+
+    def test_upload_data_url(self):
+        response = self.client.post(self.url, {'avatar': data_url(image_bytes())}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.user.refresh_from_db()
+        digest, extension = parse_name(self.user.avatar.name)
+        self.assertEqual(extension, 'png')
+        self.assertEqual(self.stored_size(file_name(digest, 'png')), (400, 300))
+        self.assertEqual(self.stored_size(file_name(digest, 'png', 'medium')), (256, 192))
+        self.assertEqual(self.stored_size(file_name(digest, 'png', 'small')), (64, 48))
+        self.assertTrue(response.data['small'].startswith(f'http://testserver/api/avatar/{self.user.id}/{digest}/small/?'))
+
+    def test_upload_file(self):
+        upload = SimpleUploadedFile('photo.jpg', image_bytes(format='JPEG'), content_type='image/jpeg')
+        response = self.client.post(self.url, {'avatar': upload}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+
+        self.user.refresh_from_db()
+        digest, extension = parse_name(self.user.avatar.name)
+        self.assertEqual(extension, 'jpg')
+        self.assertTrue(default_storage.exists(file_name(digest, 'jpg', 'small')))
+
+    def test_invalid_images(self):
+        for avatar in ['not base64!', data_url(b'not an image'), data_url(b'GIF89a' + b'\0' * 20)]:
+            response = self.client.post(self.url, {'avatar': avatar}, format='json')
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.post(self.url, {}, format='json').status_code, 400)
+
+        with override_settings(AVATAR_MAX_PIXELS=100 * 100), self.assertRaises(AvatarError):
+            save_avatar(self.user, image_bytes())
+        with override_settings(AVATAR_MAX_UPLOAD_SIZE=100), self.assertRaises(AvatarError):
+            save_avatar(self.user, data_url(image_bytes()))
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.avatar)
+
+    def test_other_players_cannot_upload(self):
+        other = create_player('other')
+        response = self.client.post(f'/api/avatar/{other.user.id}/', {'avatar': data_url(image_bytes())}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_previous_avatar_is_deleted(self):
+        first = save_avatar(self.user, image_bytes())
+        save_avatar(self.user, image_bytes(color=(0, 0, 255)))
+        self.assertFalse(default_storage.exists(file_name(first, 'png')))
+        self.assertFalse(default_storage.exists(file_name(first, 'png', 'small')))
+
+    def test_equal_avatars_are_stored_once(self):
+        other = create_player('other').user
+        digest = save_avatar(self.user, image_bytes())
+        self.assertEqual(save_avatar(other, image_bytes()), digest)
+
+        # The files are kept while another user has them
+        save_avatar(other, image_bytes(color=(0, 0, 255)))
+        self.assertTrue(default_storage.exists(file_name(digest, 'png')))
+
+    def test_get_urls(self):
+        digest = save_avatar(self.user, image_bytes())
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['avatar'], 'http://testserver' + avatar_path(self.user.id, digest, 'original'))
+        self.assertIn('medium', response.data)
+
+        with override_settings(MEDIA_ORIGIN='http://localhost/'):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['avatar'], 'http://localhost' + avatar_path(self.user.id, digest, 'original'))
+
+        self.client.force_authenticate(create_player('other').user)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_legacy_avatar_is_converted(self):
+        legacy = default_storage.save(f'{self.user.id}_avatar.png', ContentFile(data_url(image_bytes()).encode()))
+        self.user.avatar.name = legacy
+        self.user.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertIsNotNone(parse_name(self.user.avatar.name))
+        self.assertFalse(default_storage.exists(legacy))
+
+    def test_invalid_legacy_avatar(self):
+        self.user.avatar.name = default_storage.save('broken.png', ContentFile(b'broken'))
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_stream_file(self):
+        digest = save_avatar(self.user, image_bytes())
+        client = APIClient()
+        url = avatar_path(self.user.id, digest, 'small')
+
+        with self.assertNumQueries(1):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(Image.open(BytesIO(b''.join(response.streaming_content))).size, (64, 48))
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_stream_unknown_file(self):
+        digest = save_avatar(self.user, image_bytes())
+        client = APIClient()
+        self.assertEqual(client.get(avatar_path(self.user.id, digest, 'huge')).status_code, 404)
+        self.assertEqual(client.get(avatar_path(self.user.id, '0' * 64, 'small')).status_code, 404)
+
+        # The URLs of the previous avatar stop working
+        url = avatar_path(self.user.id, digest, 'original')
+        save_avatar(self.user, image_bytes(color=(0, 0, 255)))
+        self.assertEqual(client.get(url).status_code, 404)
+
+    def test_unsigned_urls_are_rejected(self):
+        digest = save_avatar(self.user, image_bytes())
+        client = APIClient()
+        url = avatar_path(self.user.id, digest, 'small')
+        path, _, query = url.partition('?')
+        other = create_player('other').user
+        invalid_urls = [
+            path,
+            path + '?' + query.replace('signature=', 'signature=A'),
+            # Signatures of other files
+            url.replace('/small/', '/medium/'),
+            url.replace(f'/{self.user.id}/', f'/{other.id}/'),
+        ]
+        with self.assertNumQueries(0):
+            for invalid_url in invalid_urls:
+                self.assertEqual(client.get(invalid_url).status_code, 403)
+
+    @override_settings(AVATAR_URL_TIMEOUT=60)
+    def test_signed_urls_expire(self):
+        digest = save_avatar(self.user, image_bytes())
+        with mock.patch('time.time', return_value=1000):
+            url = avatar_path(self.user.id, digest, 'small')
+        # The URL does not change during AVATAR_URL_TIMEOUT seconds
+        with mock.patch('time.time', return_value=1019):
+            self.assertEqual(avatar_path(self.user.id, digest, 'small'), url)
+
+        with mock.patch('time.time', return_value=1079):
+            response = APIClient().get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('max-age=1,', response['Cache-Control'])
+        with mock.patch('time.time', return_value=1080):
+            self.assertEqual(APIClient().get(url).status_code, 403)
+
+
+@override_settings(MEDIA_SERVING='x-accel')
+class AcceleratedAvatarTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.user = create_player('player').user
+
+    # The file is sent by nginx, so Django never opens it
+    def test_no_body_goes_through_django(self):
+        digest = save_avatar(self.user, image_bytes())
+        with mock.patch.object(default_storage, 'open') as storage_open:
+            response = APIClient().get(avatar_path(self.user.id, digest, 'small'))
+
+        storage_open.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/avatars/{digest}_small.png')
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_permissions_are_checked(self):
+        digest = save_avatar(self.user, image_bytes())
+        response = APIClient().get(f'/api/avatar/{self.user.id}/{digest}/small/')
+        self.assertEqual(response.status_code, 403)
+        self.assertNotIn('X-Accel-Redirect', response)
+
+        response = APIClient().get(avatar_path(self.user.id, '0' * 64, 'small'))
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('X-Accel-Redirect', response)
+
+        response = APIClient().get(avatar_path(self.user.id, digest, 'huge'))
+        self.assertNotIn('X-Accel-Redirect', response)
+
+    def test_media_origin_is_required(self):
+        self.assertEqual([message.id for message in check_media_origin(None)], ['djapi.E001'])
+        with override_settings(MEDIA_ORIGIN='http://localhost'):
+            self.assertEqual(check_media_origin(None), [])
+
+    def test_invalid_mode(self):
+        with override_settings(MEDIA_SERVING='apache'), self.assertRaises(ValueError):
+            serve_file('avatars/avatar.png', 'image/png')
+
+
+class AvatarBatchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        media = override_settings(MEDIA_ROOT=self.media_root, LEADERBOARD_SIZE=1)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+        self.player = create_player('player')
+        self.players = [create_player(f'player{index}') for index in range(6)]
+        self.digests = {}
+        for index, player in enumerate([self.player] + self.players[:5]):
+            self.digests[player.user.id] = save_avatar(player.user, image_bytes(color=(index, 0, 0)))
+        self.client = APIClient()
+        self.client.force_authenticate(self.player.user)
+
+    def get(self, players, **params):
+        ids = ','.join(str(player.user.id) for player in players)
+        return self.client.get('/api/avatars/', {'ids': ids, **params})
+
+    def test_visible_avatars(self):
+        friend, opponent, rival, stranger, ranked, without_avatar = self.players
+        add_friendship(friend.id, self.player.id)
+        Game.objects.create(player1=self.player, player2=opponent, word='apple')
+        tournament = Tournament.objects.create(name='Cup', max_players=4, word_length=5)
+        Participation.objects.bulk_create([Participation(tournament=tournament, player=player) for player in [self.player, rival]])
+        ranked.xp = 1000
+        ranked.save()
+
+        # The rankings are read from the cache, or queried with the avatars if they are not cached
+        players = [self.player, friend, opponent, rival, ranked, stranger, without_avatar]
+        cache.clear()
+        for cached_fields in ([], ['wins'], LEADERBOARD_FIELDS):
+            for field in cached_fields:
+                get_leaderboard(field)
+            with self.assertNumQueries(1):
+                response = self.get(players)
+            self.assertEqual(response.status_code, 200)
+            avatars = response.data['avatars']
+            for player in [self.player, friend, opponent, rival, ranked]:
+                digest = self.digests[player.user.id]
+                self.assertEqual(avatars[player.user.id], 'http://testserver' + avatar_path(player.user.id, digest, 'small'))
+            self.assertIsNone(avatars[stranger.user.id])
+            self.assertIsNone(avatars[without_avatar.user.id])
+
+    def test_staff_see_every_avatar(self):
+        self.player.user.is_staff = True
+        self.player.user.save()
+        stranger = self.players[3]
+        response = self.get([stranger], size='medium')
+        self.assertIn('/medium/?', response.data['avatars'][stranger.user.id])
+
+    def test_inline_thumbnails(self):
+        add_friendship(self.player.id, self.players[0].id)
+        response = self.get([self.player, self.players[0]], inline='true')
+        for user_id, thumbnail in response.data['avatars'].items():
+            self.assertTrue(thumbnail.startswith('data:image/png;base64,'))
+            image = Image.open(BytesIO(base64.b64decode(thumbnail.partition(',')[2])))
+            self.assertEqual(image.size, (64, 48))
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get('/api/avatars/', {'ids': '1,a'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/avatars/').status_code, 400)
+        self.assertEqual(self.client.get('/api/avatars/', {'ids': ','.join(['1'] * 101)}).status_code, 400)
+        self.assertEqual(self.get([self.player], size='huge').status_code, 400)
+        self.assertEqual(self.get([self.player], size='original', inline='true').status_code, 400)
+        self.assertEqual(self.get([self.player], size='original').status_code, 200)
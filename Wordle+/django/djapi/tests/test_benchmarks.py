@@ -0,0 +1,288 @@
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, resolve
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from djapi.avatars import avatar_path, save_avatar
+from djapi.dictionary import reset_dictionary
+from djapi.friend_graph import add_friendship
+from djapi.models import FriendRequest, Game, Notification, Participation, Tournament
+from djapi.player_search import player_index
+from djapi.seeding import SEED_PASSWORD, DataSeeder
+from djapi.tests.utils import WORDS_FILE, image_bytes
+from djapi.token_expire import token_cache
+
+# Benchmark of the API endpoints. A realistic dataset is generated, every route of
+# djangoproject/urls.py is requested, and the number of queries, the SQL time and
+# the latency of each endpoint are compared with the baseline file.
+#
+# Environment variables:
+# - BENCH_PLAYERS, BENCH_CLASSIC_GAMES, BENCH_GAMES, BENCH_TOURNAMENTS: size of the dataset.
+# - BENCH_REPEAT: number of requests measured per endpoint.
+# - BENCH_LATENCY_BUDGET: max ratio between the latency and the baseline latency.
+#   The latency is only checked if it is set, as it depends on the machine.
+# - BENCH_QUERY_BUDGET: max number of queries over the baseline.
+# - BENCH_OUTPUT: file where the results are written.
+# - BENCH_UPDATE_BASELINE: if set, the baseline file is replaced with the results.
+#
+# The benchmark is excluded from the test runs (see djapi/test_runner.py). Run it with:
+#   python manage.py test djapi --tag benchmark
+
+BASELINE_FILE = Path(__file__).resolve().parent / 'benchmark_baseline.json'
+
+# Routes that are not part of the API
+EXCLUDED_NAMESPACES = ('admin', 'rest_framework')
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+def env_float(name, default):
+    return float(os.environ.get(name, default))
+
+# Measures the time spent in the database. The times reported by
+# CaptureQueriesContext are rounded to milliseconds, which hides fast queries.
+class SQLTimer(object):
+    def __init__(self):
+        self.elapsed = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.elapsed += time.perf_counter() - start
+
+# Routes of the URL configuration, as they are reported by resolve()
+def api_routes(patterns=None, prefix=''):
+    routes = set()
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace in EXCLUDED_NAMESPACES:
+                continue
+            routes |= api_routes(pattern.url_patterns, prefix + str(pattern.pattern))
+        elif isinstance(pattern, URLPattern):
+            route = prefix + str(pattern.pattern)
+            # The format suffixes and the API root are not benchmarked
+            if '(?P<format>' in route or pattern.name == 'api-root':
+                continue
+            routes.add(route)
+    return routes
+
+
+@tag('benchmark')
+class EndpointBenchmarkTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.results = {}
+        # The avatars of the benchmark are stored out of the project
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root, WORDS_FILE=WORDS_FILE)
+        cls.media_settings.enable()
+        try:
+            super().setUpClass()
+        except Exception:
+            cls.media_settings.disable()
+            shutil.rmtree(cls.media_root, ignore_errors=True)
+            raise
+
+    @classmethod
+    def setUpTestData(cls):
+        seeder = DataSeeder(seed=1)
+        players = seeder.create_players(env_int('BENCH_PLAYERS', 2000))
+        seeder.create_classic_games(players, env_int('BENCH_CLASSIC_GAMES', 20000))
+        seeder.create_games(players, env_int('BENCH_GAMES', 10000))
+        tournaments = seeder.create_tournaments(players, env_int('BENCH_TOURNAMENTS', 20))
+
+        # The benchmarked player takes part in a tournament and has a long history
+        cls.tournament = tournaments[0]
+        cls.player = Participation.objects.filter(tournament=cls.tournament).first().player
+        cls.others = [player for player in players if player.id != cls.player.id]
+        seeder.create_classic_games([cls.player], 500)
+        Game.objects.bulk_create([Game(player1=other, player2=cls.player, word='apple', winner=other)
+                                  for other in cls.others[:200]])
+        Game.objects.bulk_create([Game(player1=other, player2=cls.player, word='apple', player1_xp=100)
+                                  for other in cls.others[200:300]])
+        for index, other in enumerate(cls.others[:50]):
+            add_friendship(cls.player.id, other.id)
+            # Friends of friends, for the suggestions
+            add_friendship(other.id, cls.others[-1 - index % 20].id)
+        cls.notifications = Notification.objects.bulk_create([Notification(player=cls.player, text='Notification') for _ in range(200)])
+        cls.group = Group.objects.create(name='Players')
+        cls.avatar = save_avatar(cls.player.user, image_bytes())
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        if os.environ.get('BENCH_UPDATE_BASELINE'):
+            BASELINE_FILE.write_text(json.dumps(cls.results, indent=2, sort_keys=True) + '\n')
+        if os.environ.get('BENCH_OUTPUT'):
+            Path(os.environ['BENCH_OUTPUT']).write_text(json.dumps(cls.results, indent=2, sort_keys=True) + '\n')
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        player_index.clear()
+        reset_dictionary()
+        self.addCleanup(reset_dictionary)
+        self.token = Token.objects.create(user=self.player.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        # The token is cached by the first request, so every endpoint is measured
+        # with the authentication already cached
+        self.client.get('/check-token-expiration/')
+        self.other_index = 300
+
+    def next_other(self):
+        self.other_index += 1
+        return self.others[self.other_index]
+
+    # Every endpoint is (name, method, prepare). prepare() runs before each measured
+    # request, and returns the URL and the data of the request.
+    def endpoints(self):
+        player = self.player
+        user = player.user
+        tournament = self.tournament
+
+        def get(url):
+            return lambda: (url, None)
+
+        def pending_game():
+            game = Game.objects.create(player1=self.next_other(), player2=player, word='apple', player1_xp=100, player1_time=50)
+            return f'/api/games/{game.id}/', {'player2_xp': 200, 'player2_time': 40, 'player2_attempts': 3}
+
+        def tournament_game():
+            game = Game.objects.create(player1=player, player2=self.next_other(), is_tournament_game=True)
+            return f'/api/games/{game.id}/tournament/', {'player1_xp': 200, 'player1_time': 40, 'player1_attempts': 3, 'word': 'apple'}
+
+        def friend_request():
+            friend_request = FriendRequest.objects.create(sender=self.next_other(), receiver=player)
+            return friend_request.id
+
+        def open_tournament():
+            tournament = Tournament.objects.create(name='Open', max_players=16, word_length=5)
+            return '/api/participations/', {'tournament_id': tournament.id}
+
+        def friend():
+            other = self.next_other()
+            add_friendship(player.id, other.id)
+            return f'/api/friendlist/{other.id}/', None
+
+        return [
+            ('users', 'get', get('/api/users/')),
+            ('users-detail', 'get', get(f'/api/users/{user.id}/')),
+            ('users-create', 'post', lambda: ('/api/users/', {'username': f'new{self.next_other().id}', 'password': SEED_PASSWORD})),
+            ('users-info', 'get', get('/api/users-info/')),
+            ('users-info-update', 'patch', lambda: ('/api/users-info/', {'first_name': 'Name'})),
+            ('players', 'get', get('/api/players/')),
+            ('players-detail', 'get', get(f'/api/players/{player.id}/')),
+            ('players-ranking', 'get', get('/api/players/ranking/?filter=xp')),
+            ('players-ranking-me', 'get', get('/api/players/ranking/me/?filter=wins')),
+            ('players-ranking-friends', 'get', get('/api/players/ranking/friends/?filter=xp')),
+            ('list-players', 'get', get('/api/list-players/')),
+            ('list-players-search', 'get', get('/api/list-players/?search=ayer1')),
+            ('groups', 'get', get('/api/groups/')),
+            ('groups-detail', 'get', get(f'/api/groups/{self.group.id}/')),
+            ('classicwordles', 'get', get('/api/classicwordles/')),
+            ('classicwordles-create', 'post', lambda: ('/api/classicwordles/', {'word': 'apple', 'time_consumed': 30, 'attempts': 3, 'xp_gained': 500, 'win': True})),
+            ('notifications', 'get', get('/api/notifications/')),
+            ('notifications-detail', 'get', get(f'/api/notifications/{self.notifications[0].id}/')),
+            ('notifications-unread-count', 'get', get('/api/notifications/unread_count/')),
+            ('notifications-mark-read', 'post', lambda: ('/api/notifications/mark_read/', {'ids': [self.notifications[1].id]})),
+            ('notifications-create', 'post', lambda: ('/api/notifications/', {'text': 'Hello', 'link': ''})),
+            ('games', 'get', get('/api/games/')),
+            ('games-completed', 'get', get('/api/games/completed_games/')),
+            ('games-pending', 'get', get('/api/games/pending_games/')),
+            ('games-detail', 'get', lambda: (pending_game()[0], None)),
+            ('games-create', 'post', lambda: ('/api/games/', {'player2': self.next_other().id, 'player1_xp': 100, 'player1_time': 60, 'player1_attempts': 4, 'word': 'apple'})),
+            ('games-result', 'patch', pending_game),
+            ('games-tournament-result', 'patch', tournament_game),
+            ('tournaments', 'get', get('/api/tournaments/?word_length=5')),
+            ('tournaments-detail', 'get', get(f'/api/tournaments/{tournament.id}/')),
+            ('tournaments-info', 'get', get(f'/api/tournaments/{tournament.id}/tournament_info/')),
+            ('tournaments-player', 'get', get('/api/tournaments/player_tournaments/')),
+            ('tournaments-rounds', 'get', get(f'/api/tournaments/{tournament.id}/tournament_rounds/')),
+            ('tournaments-round-games', 'get', get(f'/api/tournaments/{tournament.id}/round_games/1/')),
+            ('tournaments-bracket', 'get', get(f'/api/tournaments/{tournament.id}/bracket/')),
+            ('participations', 'get', get(f'/api/participations/?tournament_id={tournament.id}')),
+            ('participations-create', 'post', open_tournament),
+            ('words-validate', 'get', get('/api/words/validate/?word=apple')),
+            ('words-random', 'get', get('/api/words/random/?length=5')),
+            ('friendlist', 'get', get('/api/friendlist/')),
+            ('friendlist-delete', 'delete', friend),
+            ('friendlist-suggestions', 'get', get('/api/friendlist/suggestions/')),
+            ('friendrequests', 'get', get('/api/friendrequest/')),
+            ('friendrequests-detail', 'get', lambda: (f'/api/friendrequest/{friend_request()}/', None)),
+            ('friendrequests-create', 'post', lambda: ('/api/friendrequest/', {'receiver_id': self.next_other().id})),
+            ('friendrequests-accept', 'post', lambda: (f'/api/friendrequest/{friend_request()}/accept/', None)),
+            ('friendrequests-reject', 'post', lambda: (f'/api/friendrequest/{friend_request()}/reject/', None)),
+            ('avatar', 'get', get(f'/api/avatar/{user.id}/')),
+            ('avatar-file', 'get', get(avatar_path(user.id, self.avatar, 'small'))),
+            ('avatars', 'get', get('/api/avatars/?ids=' + ','.join(str(other.user_id) for other in self.others[:16]))),
+            ('token-login', 'post', lambda: ('/api-token-auth/', {'username': user.username, 'password': SEED_PASSWORD})),
+            ('token-check', 'get', get('/check-token-expiration/')),
+            ('events-ticket', 'post', lambda: ('/api/events/ticket/', None)),
+        ]
+
+    def measure(self, method, prepare):
+        repeat = env_int('BENCH_REPEAT', 5)
+        queries = []
+        sql_times = []
+        wall_times = []
+
+        for _ in range(repeat):
+            url, data = prepare()
+            timer = SQLTimer()
+            with CaptureQueriesContext(connection) as captured, connection.execute_wrapper(timer):
+                start = time.perf_counter()
+                response = getattr(self.client, method)(url, data, format='json')
+                wall_times.append(time.perf_counter() - start)
+            self.assertLess(response.status_code, 500, f'{method.upper()} {url}')
+            queries.append(len(captured.captured_queries))
+            sql_times.append(timer.elapsed)
+
+        return url, {
+            'queries': max(queries),
+            'sql_ms': round(statistics.median(sql_times) * 1000, 2),
+            'wall_ms': round(statistics.median(wall_times) * 1000, 2),
+        }
+
+    def test_endpoints_stay_within_budget(self):
+        baseline = json.loads(BASELINE_FILE.read_text()) if BASELINE_FILE.exists() else {}
+        latency_budget = env_float('BENCH_LATENCY_BUDGET', 0)
+        query_budget = env_int('BENCH_QUERY_BUDGET', 0)
+
+        covered_routes = set()
+        regressions = []
+        for name, method, prepare in self.endpoints():
+            url, result = self.measure(method, prepare)
+            covered_routes.add(resolve(url.split('?')[0]).route)
+            self.results[name] = result
+
+            expected = baseline.get(name)
+            if expected is None or os.environ.get('BENCH_UPDATE_BASELINE'):
+                continue
+            if result['queries'] > expected['queries'] + query_budget:
+                regressions.append(f'{name}: {result["queries"]} queries, baseline {expected["queries"]}')
+            # A small absolute margin avoids failing on the noise of the fastest endpoints
+            if latency_budget and result['wall_ms'] > expected['wall_ms'] * latency_budget + 10:
+                regressions.append(f'{name}: {result["wall_ms"]}ms, baseline {expected["wall_ms"]}ms')
+
+        # The logout is measured the last, as it invalidates the token
+        self.results['token-logout'] = self.measure('post', lambda: ('/api-token-logout/', None))[1]
+        covered_routes.add(resolve('/api-token-logout/').route)
+
+        self.assertEqual(api_routes() - covered_routes, set(), 'Routes without benchmark')
+        self.assertEqual(regressions, [])
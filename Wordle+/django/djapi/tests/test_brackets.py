@@ -0,0 +1,116 @@
+import math
+from django.test import TestCase
+from djapi.brackets import advance_round, create_round_games
+from djapi.models import Game, Notification, Participation, Player, Round, RoundGame, Tournament
+from djapi.seeding import DataSeeder
+
+
+class BracketTests(TestCase):
+    # Creates a full tournament with its rounds and the games of the first round
+    def create_tournament(self, size):
+        players = DataSeeder(seed=size).create_players(size, prefix=f'bracket{size}_')
+        tournament = Tournament.objects.create(name=f'Cup {size}', max_players=size, word_length=5,
+                                               num_players=size, is_closed=True)
+        Participation.objects.bulk_create([Participation(tournament=tournament, player=player) for player in players])
+        rounds = Round.objects.bulk_create([
+            Round(tournament=tournament, number=number) for number in range(1, int(math.log2(size)) + 1)
+        ])
+        create_round_games(rounds[0], [(players[i].id, players[i + 1].id) for i in range(0, size, 2)])
+        return tournament, players
+
+    def round_games(self, tournament, number):
+        return list(Game.objects.filter(roundgame__round__tournament=tournament, roundgame__round__number=number)
+                    .order_by('roundgame__id'))
+
+    # The player1 of every game wins
+    def complete_round(self, tournament, number):
+        for game in self.round_games(tournament, number):
+            game.winner_id = game.player1_id
+            game.save()
+
+    def test_plays_the_whole_bracket(self):
+        for size in (2, 16, 64, 128, 256):
+            tournament, players = self.create_tournament(size)
+            xp = players[0].xp
+            rounds = int(math.log2(size))
+
+            for number in range(1, rounds + 1):
+                self.assertEqual(len(self.round_games(tournament, number)), size // 2 ** number)
+                self.complete_round(tournament, number)
+                tournament.refresh_from_db()
+                self.assertEqual(tournament.current_round, min(number + 1, rounds))
+
+            # The first player has won every game
+            self.assertEqual(Player.objects.get(pk=players[0].pk).xp, xp + 1000)
+            self.assertEqual(Game.objects.filter(roundgame__round__tournament=tournament).count(), size - 1)
+
+    def test_winners_are_paired_in_order(self):
+        tournament, players = self.create_tournament(8)
+        self.complete_round(tournament, 1)
+
+        pairs = [(game.player1_id, game.player2_id) for game in self.round_games(tournament, 2)]
+        self.assertEqual(pairs, [(players[0].id, players[2].id), (players[4].id, players[6].id)])
+
+    def test_queries_do_not_depend_on_the_size(self):
+        queries = []
+        for size in (64, 256):
+            tournament, _ = self.create_tournament(size)
+            games = self.round_games(tournament, 1)
+            for game in games:
+                game.winner_id = game.player1_id
+            Game.objects.bulk_update(games, ['winner'])
+
+            with self.assertNumQueries(10) as context:
+                self.assertEqual(advance_round(games[-1]), 2)
+            queries.append(len(context.captured_queries))
+        self.assertEqual(queries[0], queries[1])
+
+    def test_incomplete_round_is_not_advanced(self):
+        tournament, _ = self.create_tournament(4)
+        game = self.round_games(tournament, 1)[0]
+        game.winner_id = game.player1_id
+        game.save()
+
+        self.assertIsNone(advance_round(game))
+        self.assertEqual(RoundGame.objects.filter(round__tournament=tournament).count(), 2)
+
+    def test_round_is_advanced_once(self):
+        tournament, _ = self.create_tournament(4)
+        self.complete_round(tournament, 1)
+        final = self.round_games(tournament, 2)
+
+        # Saving again a result of the finished round does not create other games
+        game = self.round_games(tournament, 1)[0]
+        self.assertIsNone(advance_round(game))
+        game.save()
+        self.assertEqual(self.round_games(tournament, 2), final)
+
+    def test_tournament_is_ended_once(self):
+        tournament, players = self.create_tournament(4)
+        self.complete_round(tournament, 1)
+        self.complete_round(tournament, 2)
+        winner = Player.objects.get(pk=players[0].pk)
+        tournament.refresh_from_db()
+        self.assertTrue(tournament.is_finished)
+
+        # Saving again the result of the final does not reward the winner again
+        final = self.round_games(tournament, 2)[0]
+        self.assertIsNone(advance_round(final))
+        final.save()
+        self.assertEqual(Player.objects.get(pk=winner.pk).wins_tournament, winner.wins_tournament)
+        self.assertEqual(Player.objects.get(pk=winner.pk).xp, winner.xp)
+
+    def test_round_start_is_notified_to_every_participant(self):
+        tournament, players = self.create_tournament(4)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.complete_round(tournament, 1)
+
+        notified = Notification.objects.filter(text__startswith='Round 2').values_list('player_id', flat=True)
+        self.assertCountEqual(notified, [player.id for player in players])
+
+    def test_other_games_are_skipped_without_queries(self):
+        players = DataSeeder().create_players(2)
+        game = Game(player1=players[0], player2=players[1], winner_id=players[0].id)
+
+        with self.assertNumQueries(0):
+            self.assertIsNone(advance_round(game))
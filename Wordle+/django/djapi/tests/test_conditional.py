@@ -0,0 +1,110 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from djapi.friend_graph import add_friendship
+from djapi.models import ClassicWordle, Game, Notification, Participation, Tournament
+from djapi.notifications import mark_read
+from djapi.tests.utils import create_player
+from djapi.tournaments import join_tournament
+from djapi.views import RANKING_SIZE
+
+
+class ConditionalResponseTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.player = create_player('player')
+        self.other = create_player('other')
+        self.client = APIClient()
+        self.client.force_authenticate(self.player.user)
+
+    # Checks that the response is not sent again while it does not change, with
+    # the given number of queries, and returns its ETag
+    def assertNotModified(self, url, num_queries=1):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        with self.assertNumQueries(num_queries):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        return etag
+
+    def assertModified(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_notifications(self):
+        notification = Notification.objects.create(player=self.player, text='Hello')
+        etag = self.assertNotModified('/api/notifications/')
+
+        mark_read(self.player, [notification.id])
+        self.assertModified('/api/notifications/', etag)
+
+    def test_classic_wordles(self):
+        etag = self.assertNotModified('/api/classicwordles/')
+
+        ClassicWordle.objects.create(player=self.player, word='apple', time_consumed=60, attempts=3, xp_gained=100)
+        self.assertModified('/api/classicwordles/', etag)
+
+    def test_completed_games(self):
+        game = Game.objects.create(player1=self.player, player2=self.other, word='apple')
+        etag = self.assertNotModified('/api/games/completed_games/')
+
+        game.winner = self.player
+        game.save()
+        self.assertModified('/api/games/completed_games/', etag)
+
+    def test_friend_list(self):
+        etag = self.assertNotModified('/api/friendlist/')
+
+        add_friendship(self.other.id, self.player.id)
+        self.assertModified('/api/friendlist/', etag)
+
+    def test_tournaments(self):
+        tournament = Tournament.objects.create(name='Cup', max_players=4, word_length=5)
+        list_etag = self.assertNotModified('/api/tournaments/?word_length=5', num_queries=0)
+        player_etag = self.assertNotModified('/api/tournaments/player_tournaments/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            join_tournament(Participation(tournament=tournament, player=self.player))
+        self.assertModified('/api/tournaments/?word_length=5', list_etag)
+        self.assertModified('/api/tournaments/player_tournaments/', player_etag)
+
+    def test_ranking_is_read_from_the_cache(self):
+        etag = self.assertNotModified('/api/players/ranking/?filter=xp', num_queries=0)
+
+        self.other.xp = 1000
+        self.other.save()
+        self.assertModified('/api/players/ranking/?filter=xp', etag)
+
+    def test_ranking_changes_below_the_returned_players(self):
+        players = [create_player(f'player{index}') for index in range(RANKING_SIZE)]
+        for index, player in enumerate(players):
+            player.xp = 100 + index
+            player.save()
+        etag = self.assertNotModified('/api/players/ranking/?filter=xp', num_queries=0)
+
+        # The players below the ones returned do not change the ETag
+        self.other.xp = 50
+        self.other.save()
+        self.assertNotModified('/api/players/ranking/?filter=xp', num_queries=0)
+        self.assertEqual(self.client.get('/api/players/ranking/?filter=xp')['ETag'], etag)
+
+        self.other.xp = 1000
+        self.other.save()
+        self.assertModified('/api/players/ranking/?filter=xp', etag)
+
+    def test_etag_depends_on_the_url_and_the_user(self):
+        etag = self.client.get('/api/notifications/')['ETag']
+        self.assertNotEqual(self.client.get('/api/notifications/?limit=5')['ETag'], etag)
+
+        self.client.force_authenticate(self.other.user)
+        response = self.client.get('/api/notifications/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_errors_have_no_etag(self):
+        response = self.client.get('/api/players/ranking/?filter=name')
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn('ETag', response)
@@ -0,0 +1,159 @@
+import os
+import tempfile
+from unittest import mock
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from djapi.dictionary import PackedWords, WordDictionary, get_dictionary, is_valid_word, reset_dictionary
+from djapi.models import ClassicWordle, Game
+from djapi.tests.utils import WORDS_FILE, create_player
+
+
+class PackedWordsTests(SimpleTestCase):
+    def test_words_are_sorted_without_duplicates(self):
+        words = PackedWords(5, ['paper', 'apple', 'crane', 'apple'])
+
+        self.assertEqual(len(words), 3)
+        self.assertEqual([words[index] for index in range(len(words))], ['apple', 'crane', 'paper'])
+        self.assertEqual(words[-1], 'paper')
+        with self.assertRaises(IndexError):
+            words[3]
+
+    def test_words_are_found(self):
+        words = PackedWords(5, ['paper', 'apple', 'crane'])
+
+        self.assertIn('apple', words)
+        self.assertIn('paper', words)
+        self.assertNotIn('applf', words)
+        self.assertNotIn('apples', words)
+        self.assertNotIn('applé', words)
+        self.assertNotIn(None, words)
+
+    def test_random_word(self):
+        self.assertIn(PackedWords(5, ['paper', 'apple']).random_word(), ('paper', 'apple'))
+        self.assertIsNone(PackedWords(5, []).random_word())
+
+
+class WordDictionaryTests(SimpleTestCase):
+    def test_words_are_grouped_by_length(self):
+        dictionary = WordDictionary({'4': ['bird', 'planet'], '5': [' Apple ', 'crane'], '6': []})
+
+        self.assertEqual(dictionary.lengths(), [4, 5])
+        self.assertIn('bird', dictionary)
+        self.assertIn('APPLE', dictionary)
+        self.assertNotIn('planet', dictionary)
+        self.assertNotIn(5, dictionary)
+        self.assertEqual(dictionary.validate(['crane', 'zzzzz']), {'crane': True, 'zzzzz': False})
+
+    def test_random_word_of_a_length(self):
+        dictionary = WordDictionary.from_file(WORDS_FILE)
+
+        self.assertEqual(len(dictionary.random_word(6)), 6)
+        self.assertIn(dictionary.random_word(6), dictionary)
+        self.assertIsNone(dictionary.random_word(9))
+
+    def test_missing_file_is_an_empty_dictionary(self):
+        with override_settings(WORDS_FILE=os.path.join(tempfile.gettempdir(), 'missing-words.json')):
+            reset_dictionary()
+            self.addCleanup(reset_dictionary)
+
+            self.assertFalse(get_dictionary())
+            # Without dictionary, the games can still be played
+            self.assertTrue(is_valid_word('zzzzz'))
+
+    def test_dictionary_is_loaded_once(self):
+        with override_settings(WORDS_FILE=WORDS_FILE):
+            reset_dictionary()
+            self.addCleanup(reset_dictionary)
+
+            with mock.patch.object(WordDictionary, 'from_file', wraps=WordDictionary.from_file) as from_file:
+                self.assertIs(get_dictionary(), get_dictionary())
+                self.assertTrue(is_valid_word('crane'))
+                self.assertFalse(is_valid_word('zzzzz'))
+            self.assertEqual(from_file.call_count, 1)
+
+
+@override_settings(WORDS_FILE=WORDS_FILE)
+class WordsAPITests(TestCase):
+    def setUp(self):
+        reset_dictionary()
+        self.addCleanup(reset_dictionary)
+        self.player = create_player('player')
+        self.client = APIClient()
+        self.client.force_authenticate(self.player.user)
+
+    def test_validate_a_word(self):
+        response = self.client.get('/api/words/validate/', {'word': 'crane'})
+        self.assertEqual(response.data, {'word': 'crane', 'valid': True})
+
+        response = self.client.get('/api/words/validate/', {'word': 'zzzzz'})
+        self.assertEqual(response.data, {'word': 'zzzzz', 'valid': False})
+
+        response = self.client.get('/api/words/validate/')
+        self.assertEqual(response.status_code, 400)
+
+    def test_validate_a_batch_of_words(self):
+        response = self.client.post('/api/words/validate/', {'words': ['crane', 'bird', 'zzzzz']}, format='json')
+        self.assertEqual(response.data, {'results': {'crane': True, 'bird': True, 'zzzzz': False}})
+
+        response = self.client.post('/api/words/validate/', {'words': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post('/api/words/validate/', {'words': ['crane'] * 101}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_items_must_be_words(self):
+        for words in ([['abc']], [{'a': 1}], ['crane', 5], ['crane', None]):
+            response = self.client.post('/api/words/validate/', {'words': words}, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.data, {'error': 'words field must be a list of strings.'})
+
+        response = self.client.post('/api/words/validate/', ['crane'], format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_random_word(self):
+        response = self.client.get('/api/words/random/', {'length': 6})
+        self.assertIn(response.data['word'], ('planet', 'rocket'))
+
+        response = self.client.get('/api/words/random/', {'length': 9})
+        self.assertEqual(response.status_code, 404)
+
+        response = self.client.get('/api/words/random/', {'length': 'five'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_dictionary_not_available(self):
+        with override_settings(WORDS_FILE=os.path.join(tempfile.gettempdir(), 'missing-words.json')):
+            reset_dictionary()
+
+            self.assertEqual(self.client.get('/api/words/validate/', {'word': 'crane'}).status_code, 503)
+            self.assertEqual(self.client.post('/api/words/validate/', {'words': ['crane']}, format='json').status_code, 503)
+            self.assertEqual(self.client.get('/api/words/random/', {'length': 5}).status_code, 503)
+
+    def test_classic_game_word_must_be_in_the_list(self):
+        game = {'time_consumed': 30, 'attempts': 3, 'xp_gained': 500, 'win': True}
+
+        response = self.client.post('/api/classicwordles/', {**game, 'word': 'zzzzz'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': 'Word not in list.'})
+
+        response = self.client.post('/api/classicwordles/', {**game, 'word': 'crane'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(ClassicWordle.objects.get().word, 'crane')
+
+    def test_guesses_must_be_in_the_list(self):
+        response = self.client.post('/api/classicwordles/', {
+            'word': 'crane', 'time_consumed': 30, 'guesses': ['zzzzz', 'crane'],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_game_word_must_be_in_the_list(self):
+        opponent = create_player('opponent')
+        game = {'player2': opponent.id, 'player1_xp': 100, 'player1_time': 60, 'player1_attempts': 4}
+
+        response = self.client.post('/api/games/', {**game, 'word': 'zzzzz'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': 'Word not in list.'})
+        self.assertFalse(Game.objects.exists())
+
+        response = self.client.post('/api/games/', {**game, 'word': 'crane'})
+        self.assertEqual(response.status_code, 201)
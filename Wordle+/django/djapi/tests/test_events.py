@@ -0,0 +1,179 @@
+import asyncio
+import threading
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.db import transaction
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from djapi.event_stream import EventStreamRouter, issue_ticket
+from djapi.events import LocalBackend, get_backend, reset_backend
+from djapi.models import Game, Notification
+from djapi.tests.utils import create_player
+
+
+class LocalBackendTests(SimpleTestCase):
+    async def test_events_published_from_other_threads_are_delivered(self):
+        backend = LocalBackend()
+        subscription = await backend.subscribe('player:1')
+        other = await backend.subscribe('player:2')
+
+        thread = threading.Thread(target=backend.publish, args=('player:1', {'event': 'test', 'data': 1}))
+        thread.start()
+        thread.join()
+
+        self.assertEqual(await asyncio.wait_for(subscription.get(), 1), {'event': 'test', 'data': 1})
+        self.assertTrue(other.queue.empty())
+
+        subscription.close()
+        other.close()
+        self.assertEqual(backend.subscriber_count(), 0)
+
+
+async def not_found(scope, receive, send):
+    await send({'type': 'http.response.start', 'status': 404, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+@override_settings(EVENTS_BACKEND='djapi.events.LocalBackend', EVENT_STREAM_KEEPALIVE=0.2,
+                   CORS_ALLOWED_ORIGINS=['http://localhost:8100'])
+# The stream closes its database connections like a request, so the tests
+# can not run inside a transaction
+class EventStreamTests(TransactionTestCase):
+    def setUp(self):
+        reset_backend()
+        self.player = create_player('player')
+        self.rival = create_player('rival')
+        self.token = Token.objects.create(user=self.player.user)
+
+    def tearDown(self):
+        reset_backend()
+
+    def connect(self, query_string='', headers=()):
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': '/api/events/',
+            'query_string': query_string.encode(),
+            'headers': [(b'origin', b'http://localhost:8100'), *headers],
+        }
+        return ApplicationCommunicator(EventStreamRouter(not_found), scope)
+
+    async def open_stream(self, communicator=None):
+        communicator = communicator or self.connect(f'ticket={issue_ticket(self.token.key)}')
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+        start = await communicator.receive_output(1)
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'text/event-stream'), start['headers'])
+        self.assertIn((b'access-control-allow-origin', b'http://localhost:8100'), start['headers'])
+        self.assertEqual((await communicator.receive_output(1))['body'], b'retry: 5000\n\n')
+        return communicator
+
+    async def commit(self, function):
+        await sync_to_async(transaction.atomic(function))()
+
+    async def close(self, communicator):
+        await communicator.send_input({'type': 'http.disconnect'})
+        await communicator.wait(1)
+        self.assertEqual(get_backend().subscriber_count(), 0)
+
+    async def test_notification_is_pushed(self):
+        communicator = await self.open_stream()
+
+        await self.commit(lambda: Notification.objects.create(player=self.player, text='Hello', link=''))
+
+        body = (await communicator.receive_output(1))['body']
+        self.assertTrue(body.startswith(b'event: notification\ndata: {"id": '))
+        self.assertIn(b'"text": "Hello", "link": ""', body)
+        self.assertIn(b'"read": false', body)
+        await self.close(communicator)
+
+    async def test_challenge_and_result_are_pushed(self):
+        communicator = await self.open_stream()
+        game = await sync_to_async(Game.objects.create)(player1=self.rival, player2=self.player, word='apple')
+        body = (await communicator.receive_output(1))['body']
+        self.assertEqual(body, f'event: challenge\ndata: {{"game": {game.id}}}\n\n'.encode())
+
+        game.winner = self.player
+        await self.commit(game.save)
+
+        body = (await communicator.receive_output(1))['body']
+        self.assertIn(b'event: game_result\n', body)
+        self.assertIn(f'"winner": {self.player.id}'.encode(), body)
+        await self.close(communicator)
+
+    async def test_keepalive(self):
+        communicator = await self.open_stream()
+
+        self.assertEqual((await communicator.receive_output(1))['body'], b': keepalive\n\n')
+        await self.close(communicator)
+
+    async def test_events_are_not_sent_without_commit(self):
+        communicator = await self.open_stream()
+
+        def rolled_back():
+            Notification.objects.create(player=self.player, text='Hello', link='')
+            transaction.set_rollback(True)
+        await self.commit(rolled_back)
+
+        self.assertEqual((await communicator.receive_output(1))['body'], b': keepalive\n\n')
+        await self.close(communicator)
+
+    async def test_invalid_token(self):
+        communicator = self.connect(f'ticket={issue_ticket("invalid")}')
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+
+        self.assertEqual((await communicator.receive_output(1))['status'], 401)
+        self.assertEqual((await communicator.receive_output(1))['body'], b'{"error": "Invalid token."}')
+
+    async def test_token_is_not_accepted_in_the_url(self):
+        for query_string in (f'token={self.token.key}', 'ticket=invalid'):
+            communicator = self.connect(query_string)
+            await communicator.send_input({'type': 'http.request', 'body': b''})
+            self.assertEqual((await communicator.receive_output(1))['status'], 401)
+
+    async def test_ticket_is_used_once(self):
+        ticket = issue_ticket(self.token.key)
+        communicator = await self.open_stream(self.connect(f'ticket={ticket}'))
+        await self.close(communicator)
+
+        communicator = self.connect(f'ticket={ticket}')
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+        self.assertEqual((await communicator.receive_output(1))['status'], 401)
+
+    async def test_authorization_header(self):
+        communicator = self.connect(headers=[(b'authorization', f'Token {self.token.key}'.encode())])
+        communicator = await self.open_stream(communicator)
+        await self.close(communicator)
+
+    async def test_stream_ends_when_the_token_is_revoked(self):
+        communicator = await self.open_stream()
+
+        await sync_to_async(self.token.delete)()
+
+        # The token is checked every EVENT_STREAM_KEEPALIVE seconds, so a keepalive
+        # may be sent before
+        body = (await communicator.receive_output(1))['body']
+        if body == b': keepalive\n\n':
+            body = (await communicator.receive_output(1))['body']
+        self.assertEqual(body, b'event: revoked\ndata: {}\n\n')
+        await communicator.wait(1)
+        self.assertEqual(get_backend().subscriber_count(), 0)
+
+    def test_ticket_endpoint(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        response = client.post('/api/events/ticket/')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['expires_in'], 60)
+        self.assertNotIn(self.token.key, response.data['ticket'])
+        self.assertEqual(APIClient().post('/api/events/ticket/').status_code, 401)
+
+    async def test_other_paths_go_to_django(self):
+        scope = {'type': 'http', 'method': 'GET', 'path': '/api/players/', 'query_string': b'', 'headers': []}
+        communicator = ApplicationCommunicator(EventStreamRouter(not_found), scope)
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+
+        self.assertEqual((await communicator.receive_output(1))['status'], 404)
@@ -0,0 +1,109 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from djapi.friend_graph import (add_friendship, are_friends, friends_of, mutual_friends, remove_friendship,
+                                suggestions)
+from djapi.models import FriendList, FriendRequest
+from djapi.tests.utils import create_player
+
+
+class FriendGraphTests(TestCase):
+    def setUp(self):
+        self.player = create_player('player')
+        self.friends = [create_player(f'friend{index}') for index in range(3)]
+        self.others = [create_player(f'other{index}') for index in range(4)]
+        for friend in self.friends:
+            add_friendship(self.player.id, friend.id)
+
+    def test_friendships_are_symmetric(self):
+        friend = self.friends[0]
+        self.assertTrue(are_friends(self.player.id, friend.id))
+        self.assertTrue(are_friends(friend.id, self.player.id))
+        self.assertFalse(are_friends(self.player.id, self.others[0].id))
+        self.assertEqual(set(friends_of(friend.id)), {self.player})
+
+        self.assertTrue(remove_friendship(friend.id, self.player.id))
+        self.assertFalse(are_friends(self.player.id, friend.id))
+        self.assertFalse(FriendList.objects.filter(sender=friend).exists())
+        self.assertFalse(remove_friendship(friend.id, self.player.id))
+
+    def test_mutual_friends(self):
+        other = self.others[0]
+        add_friendship(other.id, self.friends[0].id)
+        add_friendship(other.id, self.friends[1].id)
+        self.assertEqual(set(mutual_friends(self.player.id, other.id)), set(self.friends[:2]))
+
+    def test_suggestions(self):
+        first, second, third, requested = self.others
+        # first has 3 mutual friends, second 1 and third 2. The requested player is not suggested.
+        for friend in self.friends:
+            add_friendship(first.id, friend.id)
+        add_friendship(second.id, self.friends[0].id)
+        add_friendship(third.id, self.friends[1].id)
+        add_friendship(third.id, self.friends[2].id)
+        add_friendship(requested.id, self.friends[0].id)
+        FriendRequest.objects.create(sender=self.player, receiver=requested)
+        # Friends of friends that are already friends are not suggested
+        add_friendship(self.friends[0].id, self.friends[1].id)
+
+        with self.assertNumQueries(1):
+            results = suggestions(self.player.id)
+        self.assertEqual(results, [
+            {'id_player': first.id, 'username': 'other0', 'mutual_friends': 3},
+            {'id_player': third.id, 'username': 'other2', 'mutual_friends': 2},
+            {'id_player': second.id, 'username': 'other1', 'mutual_friends': 1},
+        ])
+        self.assertEqual(len(suggestions(self.player.id, limit=1)), 1)
+
+
+class FriendEndpointTests(TestCase):
+    def setUp(self):
+        self.player = create_player('player')
+        self.other = create_player('other')
+        self.client = APIClient()
+        self.client.force_authenticate(self.player.user)
+
+    def test_accept_creates_both_edges(self):
+        friend_request = FriendRequest.objects.create(sender=self.other, receiver=self.player)
+        response = self.client.post(f'/api/friendrequest/{friend_request.id}/accept/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(are_friends(self.player.id, self.other.id))
+        self.assertTrue(are_friends(self.other.id, self.player.id))
+
+        response = self.client.get('/api/friendlist/')
+        self.assertEqual(response.data, [{'friend': {'username': 'other', 'id_player': self.other.id}}])
+        response = self.client.post('/api/friendrequest/', {'receiver_id': self.other.id})
+        self.assertEqual(response.data, {'error': 'Friendship already exists'})
+
+    def test_accept_twice(self):
+        # The players have sent a request to each other, and both are accepted
+        received = FriendRequest.objects.create(sender=self.other, receiver=self.player)
+        sent = FriendRequest.objects.create(sender=self.player, receiver=self.other)
+        response = self.client.post(f'/api/friendrequest/{received.id}/accept/')
+        self.assertEqual(response.status_code, 200)
+        self.client.force_authenticate(self.other.user)
+        response = self.client.post(f'/api/friendrequest/{sent.id}/accept/')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(FriendList.objects.count(), 2)
+        self.assertFalse(FriendRequest.objects.exists())
+        add_friendship(self.player.id, self.other.id)
+        self.assertEqual(FriendList.objects.count(), 2)
+
+    def test_delete_friend(self):
+        add_friendship(self.other.id, self.player.id)
+        with self.assertNumQueries(1):
+            response = self.client.delete(f'/api/friendlist/{self.other.id}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(FriendList.objects.exists())
+
+        self.assertEqual(self.client.delete(f'/api/friendlist/{self.other.id}/').status_code, 403)
+        self.assertEqual(self.client.delete('/api/friendlist/999/').status_code, 404)
+
+    def test_suggestions(self):
+        friend = create_player('friend')
+        add_friendship(self.player.id, friend.id)
+        add_friendship(friend.id, self.other.id)
+        response = self.client.get('/api/friendlist/suggestions/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [{'id_player': self.other.id, 'username': 'other', 'mutual_friends': 1}])
+        self.assertEqual(self.client.get('/api/friendlist/suggestions/?limit=all').status_code, 400)
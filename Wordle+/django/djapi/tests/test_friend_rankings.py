@@ -0,0 +1,87 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from djapi.friend_graph import add_friendship, remove_friendship
+from djapi.friend_rankings import get_friend_ranking
+from djapi.models import Player
+from djapi.stats import add_player_stats
+from djapi.tests.utils import create_player
+
+
+class FriendRankingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.player = create_player('player')
+        self.friends = [create_player(f'friend{index}') for index in range(3)]
+        self.stranger = create_player('stranger')
+        with self.captureOnCommitCallbacks(execute=True):
+            for xp, player in zip([300, 100, 500, 200], [self.player] + self.friends):
+                Player.objects.filter(id=player.id).update(xp=xp)
+            for friend in self.friends:
+                add_friendship(self.player.id, friend.id)
+            Player.objects.filter(id=self.stranger.id).update(xp=1000)
+        self.client = APIClient()
+        self.client.force_authenticate(self.player.user)
+
+    def ranking(self, player=None, field='xp'):
+        return [(entry['rank'], entry['user']['username'], entry[field])
+                for entry in get_friend_ranking((player or self.player).id, field)]
+
+    def test_ranking_in_a_single_query(self):
+        with self.assertNumQueries(1):
+            ranking = self.ranking()
+        self.assertEqual(ranking, [(1, 'friend1', 500), (2, 'player', 300), (3, 'friend2', 200), (4, 'friend0', 100)])
+        with self.assertNumQueries(0):
+            self.ranking()
+
+    def test_endpoint(self):
+        response = self.client.get('/api/players/ranking/friends/?filter=xp')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['rank'], 2)
+        self.assertEqual([entry['id'] for entry in response.data['results']],
+                         [self.friends[1].id, self.player.id, self.friends[2].id, self.friends[0].id])
+
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/players/ranking/friends/?filter=xp', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_invalid_filter(self):
+        self.assertEqual(self.client.get('/api/players/ranking/friends/?filter=name').status_code, 400)
+
+    def test_player_without_friends(self):
+        self.client.force_authenticate(self.stranger.user)
+        response = self.client.get('/api/players/ranking/friends/?filter=wins')
+        self.assertEqual(response.data['rank'], 1)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_stats_of_a_friend_invalidate_the_ranking(self):
+        self.ranking()
+        with self.captureOnCommitCallbacks(execute=True):
+            add_player_stats(self.friends[0], xp=1000)
+        self.assertEqual(self.ranking()[0], (1, 'friend0', 1100))
+
+    def test_stats_of_a_stranger_keep_the_ranking(self):
+        self.ranking()
+        with self.captureOnCommitCallbacks(execute=True):
+            add_player_stats(self.stranger, xp=10)
+        with self.assertNumQueries(0):
+            self.ranking()
+
+    def test_friendships_invalidate_the_ranking(self):
+        self.ranking()
+        self.ranking(self.friends[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            add_friendship(self.player.id, self.stranger.id)
+        self.assertEqual(self.ranking()[0], (1, 'stranger', 1000))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            remove_friendship(self.friends[0].id, self.player.id)
+        self.assertNotIn('friend0', [username for _, username, _ in self.ranking()])
+        self.assertEqual(self.ranking(self.friends[0]), [(1, 'friend0', 100)])
+
+    def test_lost_version_invalidates_the_ranking(self):
+        self.ranking()
+        cache.delete(f'friend_ranking:version:{self.friends[0].id}')
+        with self.assertNumQueries(1):
+            self.ranking()
@@ -0,0 +1,82 @@
+import re
+from django.db import connection
+from django.test import TestCase
+from djapi.models import ClassicWordle, CustomUser, FriendRequest, Game, Notification, Participation, Tournament
+from djapi.seeding import DataSeeder
+
+
+# Checks that the hot queries of the API are answered with an index. The query
+# plans are read with EXPLAIN, in SQLite and in PostgreSQL.
+class HotQueryIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seeder = DataSeeder(seed=0)
+        players = seeder.create_players(50)
+        seeder.create_classic_games(players, 500)
+        seeder.create_games(players, 500)
+        seeder.create_tournaments(players, 4)
+        seeder.create_friendships(players, 2, 2)
+        seeder.create_notifications(players, 5)
+        cls.player = players[0]
+        cls.tournament = Tournament.objects.first()
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            # With small tables PostgreSQL prefers to read the whole table
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+
+    def query_plan(self, queryset):
+        return queryset.explain()
+
+    def assertUsesIndex(self, queryset, index=None, sorted_by_index=True):
+        plan = self.query_plan(queryset)
+        if connection.vendor == 'sqlite':
+            # "SCAN table" reads the whole table. "SCAN table USING INDEX" reads a whole index.
+            self.assertIsNone(re.search(r'SCAN \w+\s*$', plan, re.MULTILINE), plan)
+            if sorted_by_index:
+                self.assertNotIn('TEMP B-TREE', plan)
+        else:
+            self.assertNotIn('Seq Scan', plan)
+            if sorted_by_index:
+                self.assertNotIn('Sort', plan)
+        if index:
+            self.assertIn(index, plan)
+
+    def test_classic_games_of_a_player(self):
+        queryset = ClassicWordle.objects.filter(player=self.player).order_by('-date_played', '-id')[:16]
+        self.assertUsesIndex(queryset, 'classic_player_date_idx')
+
+    def test_notifications_of_a_player(self):
+        queryset = Notification.objects.filter(player=self.player).order_by('-timestamp', '-id')[:11]
+        self.assertUsesIndex(queryset, 'notification_player_time_idx')
+
+    def test_pending_games(self):
+        queryset = Game.objects.select_related('player1__user', 'player2__user').filter(
+            player2=self.player, winner=None, is_tournament_game=False).order_by('timestamp', 'id')[:16]
+        self.assertUsesIndex(queryset, 'game_pending_idx')
+
+    def test_completed_games(self):
+        # The games as player1 and as player2 are read with a query each
+        completed = Game.objects.select_related('player1__user', 'player2__user').filter(winner__isnull=False)
+        self.assertUsesIndex(completed.filter(player1=self.player).order_by('-timestamp', '-id')[:16],
+                             'game_player1_completed_idx')
+        self.assertUsesIndex(completed.filter(player2=self.player).order_by('-timestamp', '-id')[:16],
+                             'game_player2_completed_idx')
+
+    def test_received_friend_requests(self):
+        queryset = FriendRequest.objects.select_related('sender__user').filter(receiver=self.player).order_by('timestamp')
+        self.assertUsesIndex(queryset, 'friendrequest_receiver_idx')
+
+    def test_participation_of_a_player(self):
+        # The index is the one of the unique constraint (tournament, player)
+        queryset = Participation.objects.filter(tournament=self.tournament, player=self.player)
+        self.assertUsesIndex(queryset)
+
+    def test_tournaments_by_word_length(self):
+        queryset = Tournament.objects.filter(word_length=5).order_by('max_players')
+        self.assertUsesIndex(queryset, 'tournament_length_size_idx')
+
+    def test_newest_users(self):
+        queryset = CustomUser.objects.order_by('-date_joined')[:10]
+        self.assertUsesIndex(queryset, 'user_date_joined_idx')
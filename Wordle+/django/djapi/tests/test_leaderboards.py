@@ -0,0 +1,59 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from djapi.tests.utils import create_player
+
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.players = [create_player(f'player{i}') for i in range(5)]
+        for i, player in enumerate(self.players):
+            player.xp = i * 100
+            player.wins = 5 - i
+            player.save()
+        self.client = APIClient()
+        self.client.force_authenticate(self.players[0].user)
+
+    def ranking(self, filter_param):
+        return self.client.get(f'/api/players/ranking/?filter={filter_param}').data
+
+    def test_ranking_is_ordered_by_the_filter(self):
+        self.assertEqual([entry['user']['username'] for entry in self.ranking('xp')],
+                         ['player4', 'player3', 'player2', 'player1', 'player0'])
+        self.assertEqual([entry['id'] for entry in self.ranking('wins')],
+                         [player.id for player in self.players])
+
+    def test_cached_ranking_does_not_query_the_database(self):
+        self.ranking('xp')
+
+        with self.assertNumQueries(0):
+            self.ranking('xp')
+
+    def test_ranking_is_updated_when_a_game_is_saved(self):
+        self.ranking('xp')
+        self.client.post('/api/classicwordles/', {'word': 'apple', 'time_consumed': 10, 'attempts': 2, 'xp_gained': 1000, 'win': True})
+
+        with self.assertNumQueries(0):
+            ranking = self.ranking('xp')
+        self.assertEqual(ranking[0]['id'], self.players[0].id)
+        self.assertEqual(ranking[0]['xp'], 1000)
+
+    def test_invalid_filter_is_rejected(self):
+        response = self.client.get('/api/players/ranking/?filter=password')
+
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(LEADERBOARD_SIZE=2)
+    def test_player_dropping_out_of_the_leaderboard(self):
+        self.ranking('xp')
+        self.players[4].xp = 0
+        self.players[4].save()
+
+        self.assertEqual([entry['id'] for entry in self.ranking('xp')], [self.players[3].id, self.players[2].id])
+
+    @override_settings(LEADERBOARD_SIZE=2)
+    def test_rank_of_a_player_outside_the_leaderboard(self):
+        response = self.client.get('/api/players/ranking/me/?filter=xp')
+
+        self.assertEqual(response.data, {'rank': 5, 'xp': 0})
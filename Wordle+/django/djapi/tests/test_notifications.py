@@ -0,0 +1,114 @@
+import io
+import json
+from datetime import timedelta
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from djapi.models import Notification
+from djapi.notifications import compact_notifications
+from djapi.tests.utils import create_player
+
+
+class UnreadNotificationTests(TestCase):
+    def setUp(self):
+        self.player = create_player('player')
+        self.client = APIClient()
+        self.client.force_authenticate(self.player.user)
+
+    def notify(self, count=1):
+        return [Notification.objects.create(player=self.player, text=f'Notification {i}') for i in range(count)]
+
+    def unread(self):
+        return self.client.get('/api/notifications/unread_count/').data['unread']
+
+    def test_new_notifications_are_counted(self):
+        self.notify(3)
+        self.client.post('/api/notifications/', {'text': 'Hello', 'link': ''})
+
+        self.assertEqual(self.unread(), 4)
+
+    def test_unread_count_reads_the_counter(self):
+        self.notify(3)
+
+        with self.assertNumQueries(1):
+            self.unread()
+
+    def test_mark_read(self):
+        notifications = self.notify(4)
+        ids = [notifications[0].id, notifications[1].id]
+
+        response = self.client.post('/api/notifications/mark_read/', {'ids': ids}, format='json')
+        self.assertEqual(response.data, {'marked': 2, 'unread': 2})
+        # Notifications that are already read are not counted again
+        response = self.client.post('/api/notifications/mark_read/', {'ids': ids}, format='json')
+        self.assertEqual(response.data, {'marked': 0, 'unread': 2})
+
+        response = self.client.post('/api/notifications/mark_read/')
+        self.assertEqual(response.data, {'marked': 2, 'unread': 0})
+        self.assertFalse(Notification.objects.filter(read=False).exists())
+
+    def test_mark_read_only_marks_own_notifications(self):
+        other = Notification.objects.create(player=create_player('other'), text='Other')
+
+        response = self.client.post('/api/notifications/mark_read/', {'ids': [other.id]}, format='json')
+
+        self.assertEqual(response.data['marked'], 0)
+        other.refresh_from_db()
+        self.assertFalse(other.read)
+
+    def test_mark_read_validates_ids(self):
+        response = self.client.post('/api/notifications/mark_read/', {'ids': 'all'}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_deleting_an_unread_notification(self):
+        notification, read = self.notify(2)
+        self.client.post('/api/notifications/mark_read/', {'ids': [read.id]}, format='json')
+
+        self.client.delete(f'/api/notifications/{notification.id}/')
+        self.client.delete(f'/api/notifications/{read.id}/')
+
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(self.unread(), 0)
+
+    def test_list_includes_the_read_state(self):
+        notification = self.notify()[0]
+
+        self.assertEqual(self.client.get('/api/notifications/').data[0]['id'], notification.id)
+        self.assertFalse(self.client.get('/api/notifications/').data[0]['read'])
+
+
+class CompactNotificationsTests(TestCase):
+    def setUp(self):
+        self.player = create_player('player')
+        old = timezone.now() - timedelta(days=40)
+        Notification.objects.bulk_create(
+            [Notification(player=self.player, text='Old read', read=True) for _ in range(25)]
+            + [Notification(player=self.player, text='Old unread') for _ in range(5)]
+            + [Notification(player=self.player, text='New read', read=True) for _ in range(5)]
+        )
+        # The timestamp is set when the notifications are created
+        Notification.objects.exclude(text='New read').update(timestamp=old)
+
+    def test_deletes_old_read_notifications_in_batches(self):
+        archive = io.StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            deleted = compact_notifications(days=30, batch_size=10, archive=archive)
+
+        self.assertEqual(deleted, 25)
+        deletes = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 3)
+        self.assertEqual(set(Notification.objects.values_list('text', flat=True)), {'Old unread', 'New read'})
+        archived = [json.loads(line) for line in archive.getvalue().splitlines()]
+        self.assertEqual(len(archived), 25)
+        self.assertEqual(archived[0]['text'], 'Old read')
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('compact_notifications', days=30, stdout=out)
+
+        self.assertIn('25 notifications', out.getvalue())
+        self.assertEqual(Notification.objects.count(), 10)
@@ -0,0 +1,117 @@
+from unittest import mock
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from djapi.models import FriendRequest, Notification, Player
+from djapi.outbox import NotificationOutbox, notification_outbox, notify, notify_players, write_notifications
+from djapi.tests.utils import create_player
+
+
+class NotificationOutboxTests(TestCase):
+    def setUp(self):
+        self.players = [create_player(f'player{i}') for i in range(4)]
+
+    def unread(self, player):
+        return Player.objects.get(pk=player.pk).unread_notifications
+
+    def test_notifications_are_written_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            notify_players([player.id for player in self.players], 'Round 2 started', 'link')
+            self.assertFalse(Notification.objects.exists())
+
+        with self.assertNumQueries(5):
+            for callback in callbacks:
+                callback()
+
+        self.assertEqual(Notification.objects.filter(text='Round 2 started').count(), 4)
+        self.assertEqual([self.unread(player) for player in self.players], [1, 1, 1, 1])
+
+    def test_batch_updates_the_counters_of_every_player(self):
+        player1, player2 = self.players[:2]
+        with self.captureOnCommitCallbacks(execute=True):
+            notify([(player1.id, 'First', ''), (player1.id, 'Second', ''), (player2.id, 'Third', '')])
+
+        self.assertEqual(self.unread(player1), 2)
+        self.assertEqual(self.unread(player2), 1)
+
+    def test_notifications_are_pushed(self):
+        with mock.patch('djapi.outbox.publish_to_player') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                notify([(self.players[0].id, 'Hello', 'link')])
+
+        player_id, event, data = publish.call_args.args
+        self.assertEqual((player_id, event, data['text'], data['read']), (self.players[0].id, 'notification', 'Hello', False))
+
+    def test_accepting_a_friend_request_notifies_both_players(self):
+        sender, receiver = self.players[:2]
+        friend_request = FriendRequest.objects.create(sender=sender, receiver=receiver)
+        client = APIClient()
+        client.force_authenticate(receiver.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post(f'/api/friendrequest/{friend_request.id}/accept/')
+
+        self.assertEqual(Notification.objects.filter(player=sender).count(), 1)
+        self.assertEqual(Notification.objects.filter(player=receiver).count(), 1)
+
+    @override_settings(NOTIFICATION_OUTBOX_WRITE_BEHIND=True)
+    def test_write_behind_writes_on_flush(self):
+        with mock.patch.object(notification_outbox, 'thread', object()):
+            with self.captureOnCommitCallbacks(execute=True):
+                notify_players([player.id for player in self.players], 'Hello')
+            self.assertFalse(Notification.objects.exists())
+
+            self.assertEqual(notification_outbox.flush(), 4)
+        self.assertEqual(Notification.objects.count(), 4)
+
+    def test_failed_flush_keeps_the_notifications(self):
+        outbox = NotificationOutbox()
+        outbox.thread = object()
+        outbox.add([Notification(player_id=self.players[0].id, text='Hello', link='')])
+
+        with mock.patch('djapi.outbox.write_notifications', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                outbox.flush()
+        self.assertEqual(len(outbox.pending), 1)
+
+        self.assertEqual(outbox.flush(), 1)
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_notifications_of_deleted_players_are_discarded(self):
+        outbox = NotificationOutbox()
+        outbox.thread = object()
+        outbox.add([Notification(player_id=player.id, text='Hello', link='') for player in self.players[:2]])
+        self.players[0].user.delete()
+
+        with self.assertLogs('djapi.outbox', 'WARNING'):
+            self.assertEqual(outbox.flush(), 1)
+        self.assertEqual(outbox.pending, [])
+        self.assertEqual(list(Notification.objects.values_list('player_id', flat=True)), [self.players[1].id])
+
+        # The notifications enqueued later are written
+        outbox.add([Notification(player_id=self.players[2].id, text='Hello', link='')])
+        self.assertEqual(outbox.flush(), 1)
+
+    def test_full_outbox_discards_the_oldest_notifications(self):
+        outbox = NotificationOutbox()
+        outbox.thread = object()
+        with override_settings(NOTIFICATION_OUTBOX_MAX_SIZE=2), self.assertLogs('djapi.outbox', 'WARNING'):
+            outbox.add([Notification(player_id=player.id, text='Hello', link='') for player in self.players[:3]])
+        self.assertEqual([notification.player_id for notification in outbox.pending],
+                         [self.players[1].id, self.players[2].id])
+
+    def test_failed_write_does_not_fail_the_request(self):
+        with mock.patch('djapi.outbox.write_notifications', side_effect=IntegrityError):
+            with self.assertLogs('djapi.outbox', 'ERROR'):
+                with self.captureOnCommitCallbacks(execute=True):
+                    notify([(self.players[0].id, 'Hello', '')])
+
+        # The player is deleted before the transaction of the request is committed
+        with self.assertLogs('djapi.outbox', 'WARNING'), self.captureOnCommitCallbacks(execute=True):
+            notify([(self.players[0].id, 'Hello', ''), (self.players[1].id, 'Hello', '')])
+            self.players[0].user.delete()
+        self.assertEqual(list(Notification.objects.values_list('player_id', flat=True)), [self.players[1].id])
+
+    def test_write_notifications_returns_the_number_written(self):
+        notifications = [Notification(player_id=player.id, text='Hello', link='') for player in self.players]
+        self.assertEqual(write_notifications(notifications), 4)
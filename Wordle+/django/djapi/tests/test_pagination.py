@@ -0,0 +1,88 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from djapi.models import ClassicWordle, Game, Notification
+from djapi.pagination import KeysetPagination
+from djapi.tests.utils import create_player
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.player = create_player('player')
+        cls.rival = create_player('rival')
+        now = timezone.now()
+        # Groups of games played at the same time, so the id breaks the ties
+        ClassicWordle.objects.bulk_create([
+            ClassicWordle(player=cls.player, word='apple', time_consumed=10, attempts=3, xp_gained=i,
+                          date_played=now - timedelta(minutes=i // 3))
+            for i in range(40)
+        ])
+        Game.objects.bulk_create([Game(player1=cls.player, player2=cls.rival, winner=cls.player) for _ in range(12)])
+        Game.objects.bulk_create([Game(player1=cls.rival, player2=cls.player, winner=cls.rival) for _ in range(12)])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.player.user)
+
+    # Follows the cursors until the last page. Returns the ids of every page.
+    def read_pages(self, url, key='id'):
+        pages = []
+        while True:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([row[key] for row in response.data])
+            cursor = response.headers.get('X-Next-Cursor')
+            if cursor is None:
+                self.assertNotIn('Link', response.headers)
+                return pages
+            self.assertIn(f'cursor={cursor}', response.headers['Link'])
+            url = response.headers['Link'][1:response.headers['Link'].index('>')]
+
+    def test_classic_games_pages(self):
+        # The classic games are identified by their experience, as they have no id in the API
+        pages = self.read_pages('/api/classicwordles/?limit=7', key='xp_gained')
+
+        self.assertEqual([len(page) for page in pages], [7, 7, 7, 7, 7, 5])
+        expected = ClassicWordle.objects.order_by('-date_played', '-id').values_list('xp_gained', flat=True)
+        self.assertEqual(sum(pages, []), list(expected))
+
+    def test_completed_games_merge_both_players(self):
+        pages = self.read_pages('/api/games/completed_games/?limit=5')
+
+        expected = Game.objects.order_by('-timestamp', '-id').values_list('id', flat=True)
+        self.assertEqual(sum(pages, []), list(expected))
+
+    def test_pending_games_from_the_oldest(self):
+        pending = Game.objects.bulk_create([Game(player1=self.rival, player2=self.player) for _ in range(4)])
+
+        pages = self.read_pages('/api/games/pending_games/?limit=3')
+
+        self.assertEqual(pages, [[game.id for game in pending[:3]], [pending[3].id]])
+
+    def test_notifications_default_limit(self):
+        Notification.objects.bulk_create([Notification(player=self.player, text=str(i)) for i in range(12)])
+
+        response = self.client.get('/api/notifications/')
+
+        self.assertEqual(len(response.data), 10)
+        self.assertIn('X-Next-Cursor', response.headers)
+
+    def test_invalid_cursor(self):
+        for cursor in ('invalid', 'WzFd', 'WyJub3QgYSBkYXRlIiwgMV0'):
+            response = self.client.get(f'/api/classicwordles/?cursor={cursor}')
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.data, {'error': 'Invalid cursor.'})
+
+    def test_deep_page_reads_from_the_cursor(self):
+        paginator = KeysetPagination(ordering=('-date_played', '-id'))
+        last = ClassicWordle.objects.order_by('-date_played', '-id')[30]
+        queryset = ClassicWordle.objects.filter(player=self.player).filter(
+            paginator.after_cursor([last.date_played, last.id])).order_by('-date_played', '-id')[:16]
+
+        self.assertNotIn('OFFSET', str(queryset.query))
+        plan = queryset.explain()
+        self.assertIn('classic_player_date_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+        self.assertEqual(len(queryset), 9)
@@ -0,0 +1,127 @@
+from unittest import mock
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from djapi.models import Player
+from djapi.player_search import PlayerIndex, player_index, search_players
+from djapi.tests.utils import create_player
+
+USERNAMES = ['ana', 'Anabel', 'anastasia', 'banana', 'Diana', 'juan', 'mariana', 'Susana', 'zana']
+
+
+class PlayerSearchTests(TestCase):
+    backend = 'memory'
+
+    def setUp(self):
+        settings = override_settings(PLAYER_SEARCH_BACKEND=self.backend)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        player_index.clear()
+
+        self.player = create_player('player')
+        for username in USERNAMES:
+            create_player(username)
+        player_index.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.player.user)
+
+    def usernames(self, text, **kwargs):
+        return [player['username'] for _, player in search_players(text, **kwargs)]
+
+    def test_ranking(self):
+        # The prefixes (the exact match first) and then the substrings, ignoring the case
+        self.assertEqual(self.usernames('ANA'), ['ana', 'Anabel', 'anastasia', 'banana', 'Diana', 'mariana', 'Susana', 'zana'])
+        self.assertEqual(self.usernames('anab'), ['Anabel'])
+
+    def test_short_texts_only_search_prefixes(self):
+        self.assertEqual(self.usernames('an'), ['ana', 'Anabel', 'anastasia'])
+
+    def test_special_characters(self):
+        self.assertEqual(self.usernames('%'), [])
+        self.assertEqual(self.usernames('a_a'), [])
+
+    def test_pagination(self):
+        client_usernames = []
+        url = '/api/list-players/?search=ana&limit=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data), 2)
+            client_usernames += [player['username'] for player in response.data]
+            url = response.get('Link', '')[1:].partition('>')[0]
+        self.assertEqual(client_usernames, self.usernames('ana'))
+
+    def test_caller_is_excluded(self):
+        response = self.client.get('/api/list-players/')
+        usernames = [player['username'] for player in response.data]
+        self.assertEqual(len(usernames), len(USERNAMES))
+        self.assertNotIn('player', usernames)
+        self.assertEqual(set(response.data[0]), {'id', 'username'})
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get('/api/list-players/?cursor=abc').status_code, 400)
+        self.assertEqual(self.client.get('/api/list-players/?limit=many').status_code, 400)
+
+    def test_new_and_renamed_players(self):
+        self.usernames('ana')
+        with self.captureOnCommitCallbacks(execute=True):
+            create_player('ananas')
+            user = Player.objects.get(user__username='zana').user
+            user.username = 'anakin'
+            user.save()
+        self.assertEqual(self.usernames('ana')[:4], ['ana', 'Anabel', 'anakin', 'ananas'])
+
+    def test_substrings_of_several_trigrams(self):
+        self.assertEqual(self.usernames('IANA'), ['Diana', 'mariana'])
+        self.assertEqual(self.usernames('nab'), ['Anabel'])
+        self.assertEqual(self.usernames('anx'), [])
+        self.assertEqual(self.usernames('anaxana'), [])
+
+
+@override_settings(PLAYER_SEARCH_BACKEND='memory')
+class PlayerIndexTests(TestCase):
+    def setUp(self):
+        for username in USERNAMES:
+            create_player(username)
+        player_index.clear()
+
+    def usernames(self, text):
+        return [player['username'] for _, player in search_players(text)]
+
+    def test_new_players_are_inserted_without_rebuilding(self):
+        self.usernames('ana')
+        with mock.patch.object(PlayerIndex, 'build') as build:
+            with self.captureOnCommitCallbacks(execute=True):
+                create_player('ananas')
+                create_player('Lana')
+        build.assert_not_called()
+        self.assertEqual(self.usernames('ana'), ['ana', 'Anabel', 'ananas', 'anastasia', 'banana', 'Diana', 'Lana', 'mariana', 'Susana', 'zana'])
+        self.assertEqual(self.usernames('nas'), ['ananas', 'anastasia'])
+
+    def test_player_of_a_rolled_back_transaction_is_not_inserted(self):
+        self.usernames('ana')
+        with self.captureOnCommitCallbacks(execute=False):
+            create_player('ananas')
+        self.assertNotIn('ananas', self.usernames('ana'))
+
+    def test_index_built_after_the_commit_has_no_duplicates(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            create_player('ananas')
+        self.usernames('ana')
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.usernames('ananas'), ['ananas'])
+
+
+class DatabasePlayerSearchTests(PlayerSearchTests):
+    backend = 'database'
+
+    def test_uses_the_indexes(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest('The search indexes only exist in PostgreSQL')
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+        prefix = Player.objects.filter(user__username__istartswith='ANA').explain()
+        substring = Player.objects.filter(user__username__icontains='ANA').explain()
+        self.assertIn('user_username_prefix_idx', prefix)
+        self.assertIn('user_username_trgm_idx', substring)
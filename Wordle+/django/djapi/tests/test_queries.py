@@ -0,0 +1,84 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from djapi.friend_graph import add_friendship
+from djapi.models import FriendRequest, Game, Participation, Round, RoundGame, Tournament
+from djapi.tests.utils import create_player
+
+
+class ListQueryCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.player = create_player('player')
+        self.others = []
+        self.client = APIClient()
+        self.client.force_authenticate(self.player.user)
+
+    def add_player(self):
+        other = create_player(f'other{len(self.others)}')
+        self.others.append(other)
+        return other
+
+    # Checks that the endpoint runs the same number of queries with 1 and 5 rows
+    def assertConstantQueries(self, url, num_queries, add_row):
+        add_row()
+        with self.assertNumQueries(num_queries):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        for _ in range(4):
+            add_row()
+        with self.assertNumQueries(num_queries):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_friend_list(self):
+        def add_friend():
+            other = self.add_player()
+            if len(self.others) % 2:
+                add_friendship(self.player.id, other.id)
+            else:
+                add_friendship(other.id, self.player.id)
+
+        # The stamp of the ETag and the friends
+        response = self.assertConstantQueries('/api/friendlist/', 2, add_friend)
+        self.assertEqual(len(response.data), 5)
+
+    def test_friend_requests(self):
+        def add_request():
+            FriendRequest.objects.create(sender=self.add_player(), receiver=self.player)
+
+        self.assertConstantQueries('/api/friendrequest/', 1, add_request)
+
+    def test_completed_games(self):
+        def add_game():
+            Game.objects.create(player1=self.player, player2=self.add_player(), winner=self.player)
+
+        # The stamp of the ETag, the games as player1 and the games as player2
+        self.assertConstantQueries('/api/games/completed_games/', 3, add_game)
+
+    def test_pending_games(self):
+        def add_game():
+            Game.objects.create(player1=self.add_player(), player2=self.player)
+
+        self.assertConstantQueries('/api/games/pending_games/', 1, add_game)
+
+    def test_round_games(self):
+        tournament = Tournament.objects.create(name='Tournament', max_players=16, word_length=5)
+        round = Round.objects.create(tournament=tournament, number=1)
+        Participation.objects.create(tournament=tournament, player=self.player)
+
+        def add_game():
+            game = Game.objects.create(player1=self.add_player(), player2=self.add_player(), is_tournament_game=True)
+            RoundGame.objects.create(round=round, game=game)
+
+        self.assertConstantQueries(f'/api/tournaments/{tournament.id}/round_games/1/', 4, add_game)
+
+    @override_settings(PLAYER_SEARCH_BACKEND='database')
+    def test_list_players(self):
+        self.assertConstantQueries('/api/list-players/', 1, self.add_player)
+
+    def test_players(self):
+        # Count of the pagination and the players of the page
+        self.assertConstantQueries('/api/players/', 2, self.add_player)
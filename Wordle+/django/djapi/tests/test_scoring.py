@@ -0,0 +1,108 @@
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from djapi.models import ClassicWordle
+from djapi.scoring import GREEN, GREY, MAX_GUESSES, YELLOW, experience, score_game, score_games, score_guess
+from djapi.tests.utils import create_player
+
+
+# calculateExperience of the client (wordle-dashboard.component.ts)
+def client_experience(time_consumed, attempts, word_length, win):
+    total = (300 - time_consumed * 10) + (300 - attempts * 5) + (300 + word_length * 10)
+    if not win:
+        total *= 0.5
+    return total if total > 0 else 1
+
+
+class ScoringTests(SimpleTestCase):
+    def test_letters_are_coloured(self):
+        self.assertEqual(score_guess('apple', 'apple'), [GREEN] * 5)
+        self.assertEqual(score_guess('paper', 'apple'), [YELLOW, YELLOW, GREEN, YELLOW, GREY])
+        self.assertEqual(score_guess('APPLE', 'apple'), [GREEN] * 5)
+
+    def test_repeated_letters_are_coloured_once_per_copy(self):
+        # The greens are matched first, so the first 'l' has no copy left
+        self.assertEqual(score_guess('lolly', 'hello'), [GREY, YELLOW, GREEN, GREEN, GREY])
+        # Only the first of the two 'e' is yellow, as the target has one
+        self.assertEqual(score_guess('speed', 'abide'), [GREY, GREY, YELLOW, GREY, YELLOW])
+        self.assertEqual(score_guess('eerie', 'there'), [YELLOW, GREY, YELLOW, GREY, GREEN])
+
+    def test_games_of_different_lengths_are_scored_in_order(self):
+        games = [
+            ('apple', ['crane', 'apple'], 30),
+            ('tower', ['crane', 'bloke', 'fight', 'lumpy', 'sword', 'vowel'], 90),
+            ('planet', ['planet'], 10),
+            ('bird', ['bard', 'bird'], 20),
+        ]
+
+        results = score_games(games)
+
+        self.assertEqual(results, [score_game(*game) for game in games])
+        self.assertEqual([(result['attempts'], result['win']) for result in results],
+                         [(2, True), (6, False), (1, True), (2, True)])
+
+    def test_experience_is_the_one_of_the_client(self):
+        for time_consumed in (0, 15, 40, 120):
+            for attempts in range(1, MAX_GUESSES + 1):
+                for word_length in (4, 5, 6, 7):
+                    for win in (True, False):
+                        self.assertEqual(experience(time_consumed, attempts, word_length, win),
+                                         int(client_experience(time_consumed, attempts, word_length, win)))
+
+    def test_result_uses_the_experience_of_the_game(self):
+        result = score_game('apple', ['crane', 'apple'], 20)
+        self.assertEqual(result, {'attempts': 2, 'win': True, 'xp_gained': 740})
+
+        result = score_game('apple', ['crane'] * MAX_GUESSES, 20)
+        self.assertEqual(result, {'attempts': MAX_GUESSES, 'win': False, 'xp_gained': 360})
+
+    def test_unfinished_games_are_rejected(self):
+        invalid_games = [
+            ('apple', [], 10),
+            ('apple', ['crane'] * (MAX_GUESSES + 1), 10),
+            # Lost before using every guess
+            ('apple', ['zzzzz'], 10),
+            # Guesses after the word has been found
+            ('apple', ['apple', 'crane'], 10),
+            ('apple', ['crane', 'apples'], 10),
+            ('apple', ['cr4ne', 'apple'], 10),
+        ]
+        for game in invalid_games:
+            with self.assertRaises(ValueError):
+                score_game(*game)
+
+        with self.assertRaises(ValueError):
+            score_games([('apple', ['apple'], 10), ('apple', ['zzzzz'], 10)])
+
+
+class SubmittedGuessesTests(TestCase):
+    def setUp(self):
+        self.player = create_player('player')
+        self.client = APIClient()
+        self.client.force_authenticate(self.player.user)
+
+    def test_result_is_computed_from_the_guesses(self):
+        response = self.client.post('/api/classicwordles/', {
+            'word': 'apple', 'time_consumed': 20, 'guesses': ['crane', 'apple'],
+            'attempts': 1, 'win': True, 'xp_gained': 5000,
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        game = ClassicWordle.objects.get()
+        self.assertEqual((game.attempts, game.win, game.xp_gained), (2, True, 740))
+
+    def test_unfinished_game_is_rejected(self):
+        response = self.client.post('/api/classicwordles/', {
+            'word': 'apple', 'time_consumed': 20, 'guesses': ['zzzzz'],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ClassicWordle.objects.exists())
+
+    @override_settings(SCORING_TRUST_CLIENT_RESULTS=False)
+    def test_client_results_are_rejected_without_guesses(self):
+        response = self.client.post('/api/classicwordles/', {
+            'word': 'apple', 'time_consumed': 20, 'attempts': 1, 'win': True, 'xp_gained': 5000,
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ClassicWordle.objects.exists())
@@ -0,0 +1,69 @@
+from io import StringIO
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models import F, Q
+from django.test import TestCase
+from djapi.models import (ClassicWordle, CustomUser, FriendList, FriendRequest, Game, Notification, Player,
+                          RoundGame, Tournament)
+
+
+class SeedLoadCommandTests(TestCase):
+    options = {'players': 50, 'staff': 2, 'friends': 3, 'friend_requests': 2, 'notifications': 4,
+               'classic_games': 300, 'games': 200, 'tournaments': 3, 'tournament_size': 8, 'batch_size': 64}
+
+    def seed(self, **options):
+        call_command('seed_load', stdout=StringIO(), **{**self.options, **options})
+
+    # Data generated by the seed, without the ids of the rows
+    def snapshot(self):
+        return (
+            list(Player.objects.order_by('id').values_list('user__username', 'xp', 'wins')),
+            list(ClassicWordle.objects.order_by('id').values_list('player__user__username', 'word', 'attempts')),
+            list(FriendList.objects.order_by('id').values_list('sender__user__username', 'receiver__user__username')),
+            list(Game.objects.order_by('id').values_list('player1__user__username', 'word', 'winner__user__username')),
+        )
+
+    def test_creates_the_requested_rows(self):
+        self.seed()
+
+        self.assertEqual(Player.objects.count(), 50)
+        self.assertEqual(CustomUser.objects.filter(groups__name='Staff').count(), 2)
+        # Every friendship is stored in both directions
+        self.assertEqual(FriendList.objects.count(), 50 * 3 * 2)
+        self.assertEqual(FriendRequest.objects.count(), 50 * 2)
+        self.assertEqual(Notification.objects.count(), 50 * 4)
+        self.assertEqual(ClassicWordle.objects.count(), 300)
+        self.assertEqual(Tournament.objects.count(), 3)
+        self.assertEqual(Game.objects.filter(is_tournament_game=False).count(), 200)
+        self.assertEqual(Game.objects.filter(is_tournament_game=True).count(), RoundGame.objects.count())
+
+    def test_friend_graph_has_no_repeated_pairs(self):
+        self.seed()
+
+        # The friendships are stored in both directions
+        friendships = {frozenset(pair) for pair in FriendList.objects.values_list('sender_id', 'receiver_id')}
+        self.assertEqual(len(friendships) * 2, FriendList.objects.count())
+        pairs = list(friendships) + [frozenset(pair) for pair in FriendRequest.objects.values_list('sender_id', 'receiver_id')]
+        self.assertEqual(len(pairs), len(set(pairs)))
+        self.assertFalse(FriendList.objects.filter(sender=F('receiver')).exists())
+
+    def test_tournament_rounds_are_consistent(self):
+        self.seed()
+
+        for tournament in Tournament.objects.all():
+            games = Game.objects.filter(roundgame__round__tournament=tournament)
+            completed = games.filter(roundgame__round__number__lt=tournament.current_round)
+            self.assertFalse(completed.filter(winner__isnull=True).exists())
+            self.assertFalse(games.filter(roundgame__round__number=tournament.current_round, winner__isnull=False).exists())
+            self.assertFalse(completed.exclude(Q(winner=F('player1')) | Q(winner=F('player2'))).exists())
+
+    def test_same_seed_generates_the_same_data(self):
+        snapshots = []
+        for seed in (1, 1, 2):
+            with transaction.atomic():
+                self.seed(seed=seed)
+                snapshots.append(self.snapshot())
+                transaction.set_rollback(True)
+
+        self.assertEqual(snapshots[0], snapshots[1])
+        self.assertNotEqual(snapshots[0], snapshots[2])
@@ -0,0 +1,70 @@
+import threading
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from djapi.stats import add_player_stats, stats_buffer
+from djapi.tests.utils import create_player
+
+
+class PlayerStatsTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.player = create_player('player')
+
+    # Runs the function in many threads at the same time
+    def run_in_threads(self, function, num_threads=8):
+        barrier = threading.Barrier(num_threads)
+        errors = []
+
+        def run():
+            try:
+                barrier.wait()
+                function()
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run) for _ in range(num_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_increments_only_write_the_changed_columns(self):
+        with self.assertNumQueries(2) as queries:
+            add_player_stats(self.player, xp=10, wins=1)
+
+        update = queries.captured_queries[0]['sql']
+        self.assertIn('"xp" = ("djapi_player"."xp" + 10)', update)
+        self.assertNotIn('wins_pvp', update)
+
+    def test_concurrent_increments_are_not_lost(self):
+        def play():
+            for _ in range(25):
+                add_player_stats(self.player, xp=10, wins=1)
+
+        self.run_in_threads(play)
+
+        self.player.refresh_from_db()
+        self.assertEqual(self.player.xp, 8 * 25 * 10)
+        self.assertEqual(self.player.wins, 8 * 25)
+
+    @override_settings(PLAYER_STATS_WRITE_BEHIND=True, PLAYER_STATS_FLUSH_INTERVAL=3600)
+    def test_write_behind_coalesces_the_increments(self):
+        def play():
+            for _ in range(25):
+                add_player_stats(self.player, xp=10, wins_pvp=1)
+
+        self.run_in_threads(play)
+        self.player.refresh_from_db()
+        self.assertEqual(self.player.xp, 0)
+
+        # One UPDATE for all the increments, and one query to update the leaderboards
+        with self.assertNumQueries(2):
+            stats_buffer.flush()
+
+        self.player.refresh_from_db()
+        self.assertEqual(self.player.xp, 8 * 25 * 10)
+        self.assertEqual(self.player.wins_pvp, 8 * 25)
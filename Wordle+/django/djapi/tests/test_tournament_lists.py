@@ -0,0 +1,97 @@
+import tempfile
+import threading
+import time
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from djapi import tournament_lists
+from djapi.models import Participation, Tournament
+from djapi.tests.utils import create_player
+from djapi.tournament_lists import get_tournament_list
+from djapi.tournaments import join_tournament
+
+
+class TournamentListCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.player = create_player('player')
+        self.tournament = Tournament.objects.create(name='Cup', max_players=4, word_length=5)
+        Tournament.objects.create(name='Long cup', max_players=2, word_length=6)
+        self.client = APIClient()
+        self.client.force_authenticate(self.player.user)
+
+    def names(self, word_length=None):
+        return [tournament['name'] for tournament in get_tournament_list(word_length)]
+
+    def test_lists_are_read_once(self):
+        self.assertEqual(self.names(), ['Long cup', 'Cup'])
+        self.assertEqual(self.names('5'), ['Cup'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names(), ['Long cup', 'Cup'])
+            self.assertEqual(self.client.get('/api/tournaments/?word_length=5').data['results'][0]['name'], 'Cup')
+
+    def test_join_invalidates_the_lists(self):
+        self.names('5')
+        with self.captureOnCommitCallbacks(execute=True):
+            join_tournament(Participation(tournament=self.tournament, player=self.player))
+
+        self.assertEqual(get_tournament_list('5')[0]['num_players'], 1)
+
+    def test_admin_edit_invalidates_the_lists(self):
+        self.names()
+        self.tournament.name = 'Big cup'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tournament.save()
+
+        self.assertEqual(self.names(), ['Long cup', 'Big cup'])
+
+    def test_lists_are_not_invalidated_before_commit(self):
+        self.names()
+        with self.captureOnCommitCallbacks() as callbacks:
+            Tournament.objects.create(name='New cup', max_players=8, word_length=5)
+        self.assertNotIn('New cup', self.names())
+
+        for callback in callbacks:
+            callback()
+        self.assertIn('New cup', self.names())
+
+    def test_lost_generation_is_not_reused(self):
+        self.names()
+        cache.delete(tournament_lists.GENERATION_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            Tournament.objects.create(name='New cup', max_players=8, word_length=5)
+        self.assertIn('New cup', self.names())
+
+    def test_invalid_word_length(self):
+        response = self.client.get('/api/tournaments/?word_length=five')
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': tempfile.mkdtemp(),
+    }})
+    def test_file_based_cache(self):
+        self.assertEqual(self.names('6'), ['Long cup'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names('6'), ['Long cup'])
+
+    # Many requests miss the list at the same time, and only one reads it
+    def test_single_flight(self):
+        loads = []
+
+        def load_tournaments(word_length):
+            loads.append(word_length)
+            time.sleep(0.2)
+            return [{'name': 'Cup'}]
+
+        results = []
+        with mock.patch('djapi.tournament_lists.load_tournaments', side_effect=load_tournaments):
+            threads = [threading.Thread(target=lambda: results.append(get_tournament_list('7'))) for _ in range(20)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(loads), 1)
+        self.assertEqual(results, [[{'name': 'Cup'}]] * 20)
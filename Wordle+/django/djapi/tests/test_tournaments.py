@@ -0,0 +1,153 @@
+import threading
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from djapi.models import Game, Notification, Participation, Round, RoundGame, Tournament
+from djapi.seeding import DataSeeder
+from djapi.tournaments import JoinError, join_tournament
+
+
+class JoinTournamentTests(TestCase):
+    def setUp(self):
+        self.players = DataSeeder().create_players(8)
+        self.tournament = Tournament.objects.create(name='Cup', max_players=8, word_length=5)
+
+    def join(self, player, tournament=None):
+        return join_tournament(Participation(tournament=tournament or self.tournament, player=player))
+
+    def test_filling_the_tournament_creates_the_bracket(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for player in self.players:
+                self.join(player)
+
+        self.tournament.refresh_from_db()
+        self.assertEqual((self.tournament.num_players, self.tournament.is_closed), (8, True))
+        self.assertEqual(list(Round.objects.filter(tournament=self.tournament).values_list('number', flat=True)), [1, 2, 3])
+
+        # The players are paired in the order they joined
+        games = Game.objects.filter(roundgame__round__tournament=self.tournament).order_by('roundgame__id')
+        self.assertEqual([(game.player1_id, game.player2_id) for game in games],
+                         [(self.players[i].id, self.players[i + 1].id) for i in range(0, 8, 2)])
+        self.assertEqual(Notification.objects.filter(text__startswith='Round 1').count(), 8)
+        self.assertEqual(Notification.objects.filter(text__startswith='You were assigned').count(), 8)
+
+    def test_seeding_queries_do_not_depend_on_the_size(self):
+        players = DataSeeder(seed=1).create_players(256, prefix='big')
+        tournament = Tournament.objects.create(name='Big cup', max_players=256, word_length=5, num_players=255)
+        Participation.objects.bulk_create([Participation(tournament=tournament, player=player) for player in players[:-1]])
+
+        with CaptureQueriesContext(connection) as context:
+            self.join(players[-1], tournament)
+        # SQLite limits the parameters of a query, so the games are inserted in two queries
+        self.assertLessEqual(len(context), 12)
+        self.assertEqual(RoundGame.objects.filter(round__tournament=tournament).count(), 128)
+
+    def test_rejected_joins(self):
+        self.join(self.players[0])
+        with self.assertRaisesMessage(JoinError, 'You are participating in this tournament.'):
+            self.join(self.players[0])
+
+        closed = Tournament.objects.create(name='Closed', max_players=2, word_length=5, is_closed=True)
+        with self.assertRaisesMessage(JoinError, 'Tournament is closed for participation'):
+            self.join(self.players[1], closed)
+
+        # A full tournament that was not closed is closed
+        full = Tournament.objects.create(name='Full', max_players=2, word_length=5, num_players=2)
+        with self.assertRaisesMessage(JoinError, 'Tournament is already full'):
+            self.join(self.players[1], full)
+        full.refresh_from_db()
+        self.assertTrue(full.is_closed)
+
+        with self.assertRaisesMessage(JoinError, 'Invalid tournament ID'):
+            join_tournament(Participation(tournament_id=0, player=self.players[1]))
+
+    def test_join_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.players[0].user)
+
+        response = client.post('/api/participations/', {'tournament_id': self.tournament.id})
+        self.assertEqual(response.status_code, 201)
+        response = client.post('/api/participations/', {'tournament_id': self.tournament.id})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': 'You are participating in this tournament.'})
+
+
+# Hundreds of players join at the same time, each one with its own connection
+class ConcurrentJoinTests(TransactionTestCase):
+    def test_simultaneous_joins_never_overfill(self):
+        players = DataSeeder().create_players(300)
+        tournament = Tournament.objects.create(name='Rush', max_players=256, word_length=5)
+        barrier = threading.Barrier(len(players))
+        results = []
+
+        def join(player):
+            try:
+                barrier.wait()
+                join_tournament(Participation(tournament=tournament, player=player))
+                results.append('joined')
+            except JoinError as error:
+                results.append(str(error))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=join, args=(player,)) for player in players]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        tournament.refresh_from_db()
+        self.assertEqual(results.count('joined'), 256)
+        self.assertEqual(len(results), 300)
+        self.assertEqual((tournament.num_players, tournament.is_closed), (256, True))
+        self.assertEqual(Participation.objects.filter(tournament=tournament).count(), 256)
+        self.assertEqual(Round.objects.filter(tournament=tournament).count(), 8)
+        self.assertEqual(RoundGame.objects.filter(round__tournament=tournament, round__number=1).count(), 128)
+
+
+class BracketEndpointTests(TestCase):
+    def setUp(self):
+        self.players = DataSeeder().create_players(8)
+        self.tournament = Tournament.objects.create(name='Cup', max_players=8, word_length=5)
+        for player in self.players:
+            join_tournament(Participation(tournament=self.tournament, player=player))
+        self.client = APIClient()
+        self.client.force_authenticate(self.players[0].user)
+        self.url = f'/api/tournaments/{self.tournament.id}/bracket/'
+
+    def test_bracket_has_every_round_and_game(self):
+        game = Game.objects.filter(player1=self.players[0]).get()
+        game.winner = self.players[0]
+        game.save()
+
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.data['tournament']['id'], self.tournament.id)
+        self.assertEqual([round['number'] for round in response.data['rounds']], [1, 2, 3])
+        self.assertEqual([len(round['games']) for round in response.data['rounds']], [4, 0, 0])
+        first = response.data['rounds'][0]['games'][0]
+        self.assertEqual((first['player1'], first['player2']), (self.players[0].user.username, self.players[1].user.username))
+        self.assertEqual(first['winner_username'], self.players[0].user.username)
+
+    def test_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        # A result changes the bracket
+        game = Game.objects.filter(player1=self.players[0]).get()
+        game.player1_xp = 100
+        game.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_only_participants_see_the_bracket(self):
+        self.client.force_authenticate(DataSeeder(seed=1).create_players(1, prefix='other')[0].user)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.get('/api/tournaments/0/bracket/').status_code, 404)
@@ -0,0 +1,17 @@
+from io import BytesIO
+from pathlib import Path
+from PIL import Image
+from djapi.models import CustomUser, Player
+
+# Small word list used as WORDS_FILE in the tests
+WORDS_FILE = Path(__file__).resolve().parent / 'fixtures' / 'words.json'
+
+
+def create_player(username):
+    user = CustomUser.objects.create_user(username=username, password='password')
+    return Player.objects.create(user=user)
+
+def image_bytes(size=(400, 300), format='PNG', color=(200, 30, 30)):
+    output = BytesIO()
+    Image.new('RGB', size, color).save(output, format)
+    return output.getvalue()
@@ -1,30 +1,172 @@
-from rest_framework.authtoken.models import Token
+import copy
+import threading
+import time
+from collections import OrderedDict
 from datetime import timedelta
-from rest_framework import status
+from django.conf import settings
 from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
 from rest_framework.authtoken.models import Token
-from django.http import JsonResponse
-from django.conf import settings
+from djapi.models import CustomUser, Player
+from djapi.signed_tokens import SignedToken, revoke_signed_token, verify_signed_token
+
+# Checks if a token has expired. A database token expires TOKEN_EXPIRED_AFTER_SECONDS
+# seconds after its creation, and a signed token carries its expiration time.
+def token_has_expired(token):
+    if isinstance(token, SignedToken):
+        return token.has_expired()
+    return token.created < timezone.now() - timedelta(seconds=settings.TOKEN_EXPIRED_AFTER_SECONDS)
+
+# Checks if a token is still valid without the token cache: it has not expired
+# and it has not been revoked, maybe by another process
+def token_is_active(token):
+    if token_has_expired(token):
+        return False
+    if isinstance(token, SignedToken):
+        return verify_signed_token(token.key) is not None
+    return Token.objects.filter(key=token.key).exists()
+
+# Invalidates a token. Database tokens are deleted and signed tokens are revoked.
+def revoke_token(token):
+    if isinstance(token, SignedToken):
+        revoke_signed_token(token)
+    else:
+        token.delete()
+
+# Builds an instance of a model as if it had been read from the database with
+# only the given fields. The rest of the fields are deferred.
+def deferred_instance(model, values):
+    field_names = [field.attname for field in model._meta.concrete_fields if field.attname in values]
+    return model.from_db('default', field_names, [values[name] for name in field_names])
+
+# Checks if the signed tokens are used instead of the database tokens
+def signed_tokens_enabled():
+    return getattr(settings, 'TOKEN_MODE', 'database') == 'signed'
+
+
+# Bounded cache of the tokens validated recently in this process. Every entry
+# lives at most TOKEN_CACHE_TIMEOUT seconds, and the least recently used entries
+# are discarded when there are more than TOKEN_CACHE_MAX_SIZE.
+class TokenCache(object):
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.keys_by_user = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            token, cached_until = entry
+            if cached_until < time.monotonic():
+                self._remove(key)
+                return None
+            self.entries.move_to_end(key)
+            return token
+
+    def set(self, token):
+        timeout = getattr(settings, 'TOKEN_CACHE_TIMEOUT', 60)
+        max_size = getattr(settings, 'TOKEN_CACHE_MAX_SIZE', 10000)
+        if timeout <= 0 or max_size <= 0:
+            return
+
+        with self.lock:
+            self._remove(token.key)
+            self.entries[token.key] = (token, time.monotonic() + timeout)
+            self.keys_by_user.setdefault(token.user_id, set()).add(token.key)
+            while len(self.entries) > max_size:
+                self._remove(next(iter(self.entries)))
+
+    def delete(self, key):
+        with self.lock:
+            self._remove(key)
+
+    # Removes the tokens of a user, used when its information changes
+    def delete_user(self, user_id):
+        with self.lock:
+            for key in list(self.keys_by_user.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.keys_by_user.clear()
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            user_keys = self.keys_by_user.get(entry[0].user_id)
+            if user_keys is not None:
+                user_keys.discard(key)
+                if not user_keys:
+                    del self.keys_by_user[entry[0].user_id]
+
+
+token_cache = TokenCache()
+
+
+# Token authentication that also checks if the token has expired. The token, the
+# user and its player are obtained with a single query, and the validated tokens
+# are kept in the token cache, so most of the requests do not query the database
+# to be authenticated. Expired tokens are deleted.
+# If TOKEN_MODE is 'signed', the tokens are signed tokens verified in memory.
+class ExpiringTokenAuthentication(TokenAuthentication):
+    model = Token
+
+    def authenticate_credentials(self, key):
+        if signed_tokens_enabled():
+            return self.authenticate_signed_token(key)
+
+        token = token_cache.get(key)
+
+        if token is None:
+            try:
+                token = self.model.objects.select_related('user__player').get(key=key)
+            except self.model.DoesNotExist:
+                raise exceptions.AuthenticationFailed('Invalid token.')
+
+            if not token.user.is_active:
+                raise exceptions.AuthenticationFailed('User inactive or deleted.')
+
+            if not token_has_expired(token):
+                token_cache.set(token)
+
+        if token_has_expired(token):
+            token_cache.delete(key)
+            self.model.objects.filter(key=key).delete()
+            raise exceptions.AuthenticationFailed('Token has expired.')
+
+        # Every request works with its own copy, so the changes made while handling
+        # a request do not modify the cached objects
+        token = copy.deepcopy(token)
+        return (token.user, token)
+
+    # The user and the player are built from the token, with only the fields of
+    # the token loaded. The rest of the fields are deferred, so they are only
+    # read from the database if a view uses them. The loaded fields are the ones
+    # of the login, which may be outdated, so these objects can not be saved: the
+    # views that change the user or the player must read them from the database.
+    def authenticate_signed_token(self, key):
+        token = verify_signed_token(key)
+        if token is None:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+        if token.has_expired():
+            raise exceptions.AuthenticationFailed('Token has expired.')
+
+        user = deferred_instance(CustomUser, {
+            'id': token.user_id,
+            'username': token.username,
+            'is_staff': token.is_staff,
+            'is_superuser': token.is_superuser,
+            'is_active': True,
+        })
+        user.from_signed_token = True
+        if token.player_id is not None:
+            user.player = deferred_instance(Player, {'id': token.player_id, 'user_id': token.user_id})
+            user.player.from_signed_token = True
+        else:
+            CustomUser.player.related.set_cached_value(user, None)
 
-# Middleware to check if the token has expired. The middleware
-# is executed everytime an API endpoint is used.
-class TokenExpirationMiddleware(object):
-    def __init__(self, get_response):
-        self.get_response = get_response
-
-    def __call__(self, request):
-        auth_header = request.META.get('HTTP_AUTHORIZATION')
-        if auth_header:
-            _, token_key = auth_header.split()
-            token = Token.objects.filter(key=token_key).first()
-            if token and token.created < timezone.now() - timedelta(seconds=settings.TOKEN_EXPIRED_AFTER_SECONDS):
-                token.delete()
-
-                response_data = {
-                    'message': 'Token has expired.'
-                }
-                response = JsonResponse(response_data, status=status.HTTP_401_UNAUTHORIZED)
-                return response
-
-        response = self.get_response(request)
-        return response
+        return (user, token)
@@ -0,0 +1,79 @@
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from djapi.models import Tournament
+from djapi.serializers import TournamentSerializer
+
+# Cached lists of the tournaments, one for every word length and another one with
+# all of them. The lists are only read from the database when they change.
+#
+# The keys of the lists include a generation number, and the lists are invalidated
+# by changing the generation when a tournament changes. A list read from the
+# database while a tournament was changing is stored with the old generation, so
+# it is never read. Only one request reads a missing list from the database; the
+# others wait for it to be stored (single-flight).
+
+GENERATION_KEY = 'tournaments:generation'
+LIST_KEY = 'tournaments:{}:{}'
+
+
+def list_timeout():
+    return getattr(settings, 'TOURNAMENT_LIST_TIMEOUT', 300)
+
+# Max number of seconds that a request waits for a list that is being read by another one
+def lock_timeout():
+    return getattr(settings, 'TOURNAMENT_LIST_LOCK_TIMEOUT', 5)
+
+# The generation starts with the time, so a generation lost by the cache is never reused
+def get_generation():
+    return cache.get_or_set(GENERATION_KEY, time.time_ns(), timeout=None)
+
+# Invalidates every list when the current transaction is committed, so the lists
+# are never read again from the database before the change is visible
+def invalidate_tournament_lists():
+    transaction.on_commit(_next_generation)
+
+def _next_generation():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+# Returns the serialized tournaments with the word length, or all of them if it is None
+def get_tournament_list(word_length=None):
+    key = LIST_KEY.format(get_generation(), word_length or 'all')
+    tournaments = cache.get(key)
+    if tournaments is None:
+        tournaments = _load_once(key, word_length)
+    return tournaments
+
+def load_tournaments(word_length=None):
+    tournaments = Tournament.objects.order_by('max_players', 'id')
+    if word_length:
+        tournaments = tournaments.filter(word_length=word_length)
+    return TournamentSerializer(tournaments, many=True).data
+
+# Reads the list from the database if no other request is reading it. Otherwise,
+# waits for the list of the other request.
+def _load_once(key, word_length):
+    lock_key = key + ':lock'
+    deadline = time.monotonic() + lock_timeout()
+    while not cache.add(lock_key, True, timeout=lock_timeout()):
+        time.sleep(0.01)
+        tournaments = cache.get(key)
+        if tournaments is not None:
+            return tournaments
+        # The other request has failed or it is too slow
+        if time.monotonic() > deadline:
+            return load_tournaments(word_length)
+
+    try:
+        tournaments = cache.get(key)
+        if tournaments is None:
+            tournaments = load_tournaments(word_length)
+            cache.set(key, tournaments, timeout=list_timeout())
+        return tournaments
+    finally:
+        cache.delete(lock_key)
@@ -0,0 +1,79 @@
+import math
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from djapi.brackets import TOURNAMENTS_LINK, create_round_games
+from djapi.events import publish_to_players
+from djapi.models import Participation, Round, Tournament
+from djapi.outbox import notify, notify_players
+from djapi.tournament_lists import invalidate_tournament_lists
+
+# Participations of the tournaments, used by the API and the admin site.
+#
+# A player takes a place with a single conditional UPDATE, which only increments
+# num_players if the tournament is open and not full. The row stays locked until
+# the transaction ends, so the players that join at the same time are serialized
+# and the tournament is never overfilled. The player that fills the tournament
+# creates the whole bracket with bulk_create.
+
+
+# Error of a participation that is not allowed, with the message for the player
+class JoinError(Exception):
+    pass
+
+
+# Adds the participation of a player to its tournament. The participation is
+# saved and returned, or JoinError is raised if the player can not join.
+def join_tournament(participation):
+    if Participation.objects.filter(tournament_id=participation.tournament_id, player_id=participation.player_id).exists():
+        raise JoinError('You are participating in this tournament.')
+
+    try:
+        with transaction.atomic():
+            # The UPDATE is the first statement, so the lock of the row is taken
+            # before anything is read
+            joined = Tournament.objects.filter(
+                pk=participation.tournament_id, is_closed=False, num_players__lt=F('max_players')
+            ).update(num_players=F('num_players') + 1, updated_at=timezone.now())
+            if joined:
+                participation.save()
+                tournament = Tournament.objects.get(pk=participation.tournament_id)
+                if tournament.num_players >= tournament.max_players:
+                    start_tournament(tournament)
+    except IntegrityError:
+        raise JoinError('You are participating in this tournament.')
+    if not joined:
+        reject_join(participation.tournament_id)
+
+    invalidate_tournament_lists()
+
+    notify([(participation.player_id, f"You were assigned in {tournament.name}. Good luck!", TOURNAMENTS_LINK)])
+    return participation
+
+# Raises the JoinError of a tournament that can not be joined
+def reject_join(tournament_id):
+    tournament = Tournament.objects.filter(pk=tournament_id).first()
+    if tournament is None:
+        raise JoinError('Invalid tournament ID')
+    if tournament.is_closed:
+        raise JoinError('Tournament is closed for participation')
+
+    # The full tournaments are closed
+    Tournament.objects.filter(pk=tournament_id).update(is_closed=True, updated_at=timezone.now())
+    invalidate_tournament_lists()
+    raise JoinError('Tournament is already full')
+
+# Closes a full tournament, creates its rounds and the games of the first round,
+# and tells the participants that the first round has started
+def start_tournament(tournament):
+    tournament.is_closed = True
+    Tournament.objects.filter(pk=tournament.pk).update(is_closed=True, updated_at=timezone.now())
+
+    rounds = Round.objects.bulk_create([
+        Round(tournament=tournament, number=number) for number in range(1, int(math.log2(tournament.max_players)) + 1)
+    ])
+    participants = list(Participation.objects.filter(tournament=tournament).order_by('id').values_list('player_id', flat=True))
+    create_round_games(rounds[0], zip(participants[0::2], participants[1::2]))
+
+    publish_to_players(participants, 'round', {'tournament': tournament.id, 'round': 1})
+    notify_players(participants, f"Round 1 of {tournament.name} started. Good luck!", TOURNAMENTS_LINK)
@@ -1,7 +1,7 @@
-import math
+import time
 from django.contrib.auth.models import Group
 from djapi.models import *
-from rest_framework import viewsets, permissions, status, generics
+from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from djapi.serializers import *
 from djapi.permissions import IsOwnerOrAdminPermission, IsOwnerPermission
@@ -9,14 +9,82 @@ from rest_framework.permissions import IsAdminUser
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.authtoken.models import Token
 from rest_framework.views import APIView
-from datetime import timedelta
-from django.utils import timezone
-from django.conf import settings
 from django.shortcuts import get_object_or_404
-from django.core.files.base import ContentFile
-from django.http import JsonResponse
-from django.db.models import Q
+from django.utils.http import parse_etags
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Q
 from rest_framework.decorators import action
+from rest_framework.utils.urls import replace_query_param
+from djapi.avatars import (CONTENT_TYPES, AvatarError, avatar_path, avatar_paths, avatar_sizes,
+                           check_url_signature, convert_legacy_avatar, file_name as avatar_file_name,
+                           inline_thumbnail, parse_name, save_avatar, visible_avatars)
+from djapi.conditional import check_etag, conditional, etag_headers, queryset_stamp
+from djapi.dictionary import get_dictionary, is_valid_word
+from djapi.event_stream import issue_ticket, ticket_timeout
+from djapi.friend_graph import add_friendship, are_friends, remove_friendship, suggestions
+from djapi.friend_rankings import get_friend_ranking
+from djapi.notifications import add_unread, mark_read, unread_count
+from djapi.outbox import notify
+from djapi.leaderboards import LEADERBOARD_FIELDS, get_leaderboard, get_rank
+from djapi.media import media_url, serve_file
+from djapi.pagination import KeysetPagination
+from djapi.player_search import decode_cursor, encode_cursor, search_players
+from djapi.scoring import score_game, trust_client_results
+from djapi.signed_tokens import issue_signed_token
+from djapi.stats import add_player_stats
+from djapi.tournament_lists import get_tournament_list
+from djapi.tournaments import JoinError, join_tournament
+from djapi.token_expire import revoke_token, signed_tokens_enabled, token_has_expired
+
+
+# Scores the guesses sent by the client, so the attempts, the victory and the
+# experience of the game are computed by the server. Returns None if the
+# guesses are not valid.
+def score_submitted_guesses(word, guesses, time_consumed):
+    if not word or not isinstance(guesses, list):
+        return None
+    if not all(isinstance(guess, str) and is_valid_word(guess) for guess in guesses):
+        return None
+    try:
+        return score_game(word, guesses, int(time_consumed or 0))
+    except (TypeError, ValueError):
+        return None
+
+# Checks if the guesses are required but they have not been sent
+def missing_guesses(guesses):
+    return guesses is None and not trust_client_results()
+
+
+# Stamp of the rows of the player returned by rows(player), or None if the user
+# is not a player
+def player_stamp(request, rows, field, **aggregates):
+    player = getattr(request.user, 'player', None)
+    if not player:
+        return None
+    return queryset_stamp(rows(player), field, **aggregates)
+
+def tournament_list_stamp(request):
+    word_length = request.query_params.get('word_length')
+    if word_length and not word_length.isdigit():
+        return None
+    return get_tournament_list(word_length)
+
+# Players returned by the ranking endpoint
+RANKING_SIZE = 15
+
+# The rankings are read from the cache, so the returned players are their own stamp
+def ranking_stamp(request):
+    filter_param = request.GET.get('filter') or 'xp'
+    if filter_param not in LEADERBOARD_FIELDS:
+        return None
+    return get_leaderboard(filter_param)[:RANKING_SIZE]
+
+def friend_ranking_stamp(request):
+    filter_param = request.GET.get('filter') or 'xp'
+    player = getattr(request.user, 'player', None)
+    if not player or filter_param not in LEADERBOARD_FIELDS:
+        return None
+    return get_friend_ranking(player.id, filter_param)
 
 
 class CustomUserViewSet(viewsets.ModelViewSet):
@@ -56,8 +124,10 @@ class UserInfoAPIView(APIView):
         serializer = UserInfoPartialSerializer(user)
         return Response(serializer.data)
 
+    # The user is read from the database, as the authenticated user may be
+    # outdated (cached or built from a signed token)
     def patch(self, request):
-        user = request.user
+        user = CustomUser.objects.get(pk=request.user.pk)
         serializer = UserInfoPartialSerializer(user, data=request.data)
         if serializer.is_valid():
             serializer.save()
@@ -65,7 +135,7 @@ class UserInfoAPIView(APIView):
         return Response(serializer.errors, status=400)
 
 class PlayerViewSet(viewsets.ModelViewSet):
-    queryset = Player.objects.all()
+    queryset = Player.objects.select_related('user').order_by('id')
     serializer_class = PlayerSerializer
     
     def get_serializer_class(self):
@@ -105,34 +175,77 @@ class PlayerViewSet(viewsets.ModelViewSet):
         self.perform_destroy(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
     
-    # Method to get the ranking players
+    # Method to get the ranking players. The rankings are read from the cached leaderboards.
     @action(detail=False, methods=['get'])
+    @conditional(lambda view, request: ranking_stamp(request))
     def ranking(self, request):
-        filter_param = request.GET.get('filter')
-        limit = 15
-        queryset = Player.objects.all()
+        filter_param = request.GET.get('filter') or 'xp'
 
-        if filter_param:
-            queryset = queryset.order_by('-'+filter_param)[:limit]
+        if filter_param not in LEADERBOARD_FIELDS:
+            return Response({'error': f'filter must be one of: {", ".join(LEADERBOARD_FIELDS)}.'}, status=400)
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return Response(get_leaderboard(filter_param)[:RANKING_SIZE])
 
+    # Method to get the position of the player in a ranking
+    @action(detail=False, methods=['get'], url_path='ranking/me')
+    def my_rank(self, request):
+        filter_param = request.GET.get('filter') or 'xp'
+        player = getattr(request.user, 'player', None)
+        if not player:
+            return Response({'error': 'Player not found'}, status=404)
 
-class PlayerListAPIView(generics.ListAPIView):
-    queryset = Player.objects.all()
-    serializer_class = PlayerListSerializer
-    permission_classes = [permissions.IsAuthenticated]
+        if filter_param not in LEADERBOARD_FIELDS:
+            return Response({'error': f'filter must be one of: {", ".join(LEADERBOARD_FIELDS)}.'}, status=400)
 
-    def get_queryset(self):
-        queryset = Player.objects.exclude(user=self.request.user)
-        return queryset
+        rank, value = get_rank(player, filter_param)
+        return Response({'rank': rank, filter_param: value})
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        usernames = serializer.data
-        return Response(usernames)
+    # Method to get the ranking of the player among their friends, with the
+    # position of the player. It is cached until the player or a friend changes.
+    @action(detail=False, methods=['get'], url_path='ranking/friends')
+    @conditional(lambda view, request: friend_ranking_stamp(request))
+    def friends_ranking(self, request):
+        filter_param = request.GET.get('filter') or 'xp'
+        player = getattr(request.user, 'player', None)
+        if not player:
+            return Response({'error': 'Player not found'}, status=404)
+
+        if filter_param not in LEADERBOARD_FIELDS:
+            return Response({'error': f'filter must be one of: {", ".join(LEADERBOARD_FIELDS)}.'}, status=400)
+
+        ranking = get_friend_ranking(player.id, filter_param)
+        rank = next(entry['rank'] for entry in ranking if entry['id'] == player.id)
+        return Response({'rank': rank, 'results': ranking})
+
+
+class PlayerListAPIView(APIView):
+    """
+    API endpoint that searches the other players by username, with ?search=.
+    The results are ranked (see djapi/player_search.py) and paginated: the next
+    page is requested with the cursor of the X-Next-Cursor and Link headers.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    default_limit = 20
+    max_limit = 100
+
+    def get(self, request):
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', self.default_limit)), self.max_limit))
+        except ValueError:
+            return Response({'error': 'Invalid limit.'}, status=400)
+        cursor = request.query_params.get('cursor')
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError as error:
+            return Response({'error': str(error)}, status=400)
+
+        results = search_players(request.query_params.get('search', '').strip(), after, limit + 1, request.user.id)
+        headers = {}
+        if len(results) > limit:
+            next_cursor = encode_cursor(results[limit - 1][0])
+            headers['X-Next-Cursor'] = next_cursor
+            headers['Link'] = f'<{replace_query_param(request.build_absolute_uri(), "cursor", next_cursor)}>; rel="next"'
+        return Response([player for _, player in results[:limit]], headers=headers)
 
 class GroupViewSet(viewsets.ModelViewSet):
     queryset = Group.objects.all()
@@ -148,12 +261,17 @@ class CustomObtainAuthToken(ObtainAuthToken):
         serializer.is_valid(raise_exception=True)
 
         user = serializer.validated_data['user']
-        token, created = Token.objects.get_or_create(user=user)
 
-        if not created and token.created < timezone.now() - timedelta(seconds=settings.TOKEN_EXPIRED_AFTER_SECONDS):
-            # Token expired, generate a new one
-            token.delete()
-            token = Token.objects.create(user=user)
+        if signed_tokens_enabled():
+            # Signed tokens are not stored, a new one is issued in every login
+            token = issue_signed_token(user)
+        else:
+            token, created = Token.objects.get_or_create(user=user)
+
+            if not created and token_has_expired(token):
+                # Token expired, generate a new one
+                token.delete()
+                token = Token.objects.create(user=user)
 
         response_data = {
             'token': token.key,
@@ -170,14 +288,30 @@ class CustomObtainAuthToken(ObtainAuthToken):
     
 class CheckTokenExpirationView(APIView):
     def get(self, request):
-        token = request.user.auth_token
+        token = request.auth
 
-        if token.created < timezone.now() - timedelta(seconds=settings.TOKEN_EXPIRED_AFTER_SECONDS):
+        if token_has_expired(token):
             # The token has expired
-            token.delete()
+            revoke_token(token)
             return Response({'message': 'Token has expired.'}, status=status.HTTP_401_UNAUTHORIZED)
 
         return Response({'message': 'Token is valid.'}, status=status.HTTP_200_OK)
+
+class EventTicketView(APIView):
+    """
+    API endpoint that returns a short-lived ticket to open the event stream
+    (/api/events/?ticket=...), so the API token is not sent in the URL.
+    """
+    def post(self, request):
+        return Response({'ticket': issue_ticket(request.auth.key), 'expires_in': ticket_timeout()}, status=201)
+
+class LogoutView(APIView):
+    """
+    API endpoint that invalidates the token used in the request.
+    """
+    def post(self, request):
+        revoke_token(request.auth)
+        return Response(status=status.HTTP_204_NO_CONTENT)
    
 class ClassicWordleViewSet(viewsets.GenericViewSet):
     """
@@ -187,16 +321,18 @@ class ClassicWordleViewSet(viewsets.GenericViewSet):
     queryset = ClassicWordle.objects.all()
     serializer_class = ClassicWordleSerializer
 
-    # Gets limited number of classic worldes from most recent to oldest
+    # Gets the classic wordles from most recent to oldest, in pages of ?limit= games.
+    # The next page is requested with the cursor of the X-Next-Cursor header.
+    @conditional(lambda view, request: player_stamp(request, lambda player: ClassicWordle.objects.filter(player=player), 'id'))
     def list(self, request):
         player = getattr(request.user, 'player', None)
         if not player:
             return Response({'error': 'Player not found'}, status=404)
 
-        limit = 15
-        queryset = ClassicWordle.objects.filter(player=player).order_by('-date_played')[:limit]
-        serializer = ClassicWordleSerializer(queryset, many=True)
-        return Response(serializer.data)
+        paginator = KeysetPagination(ordering=('-date_played', '-id'), default_limit=15)
+        page = paginator.paginate_queryset(ClassicWordle.objects.filter(player=player), request)
+        serializer = ClassicWordleSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     def create(self, request):
         player = getattr(request.user, 'player', None)
@@ -204,53 +340,172 @@ class ClassicWordleViewSet(viewsets.GenericViewSet):
         if not player:
             return Response({'error': 'Player not found'}, status=404)
 
-        serializer = self.serializer_class(data=request.data)
+        data = {key: request.data.get(key) for key in self.serializer_class.Meta.fields if key in request.data}
+
+        # The result is computed by the server when the guesses are sent
+        guesses = request.data.get('guesses')
+        if missing_guesses(guesses):
+            return Response({'error': 'The guesses of the game are required.'}, status=400)
+        if guesses is not None:
+            result = score_submitted_guesses(data.get('word'), guesses, data.get('time_consumed'))
+            if result is None:
+                return Response({'error': 'Invalid guesses.'}, status=400)
+            data.update(result)
+
+        serializer = self.serializer_class(data=data)
         serializer.is_valid(raise_exception=True)
+
+        if not is_valid_word(serializer.validated_data['word']):
+            return Response({'error': 'Word not in list.'}, status=400)
+
         serializer.save(player=player)
         return Response(serializer.data, status=201)
 
+class WordsViewSet(viewsets.ViewSet):
+    """
+    API endpoint that allows validating words and getting random words of the dictionary.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_batch_size = 100
+
+    # Checks if the words exist in the dictionary. A single word is checked with
+    # GET ?word=..., and several words with POST {"words": [...]}. Without a
+    # dictionary, the words can not be checked (503).
+    @action(detail=False, methods=['get', 'post'])
+    def validate(self, request):
+        dictionary = get_dictionary()
+        if not dictionary:
+            return Response({'error': 'The dictionary is not available.'}, status=503)
+
+        if request.method == 'GET':
+            word = request.query_params.get('word')
+            if not word:
+                return Response({'error': 'word parameter is required.'}, status=400)
+            return Response({'word': word, 'valid': word in dictionary})
+
+        words = request.data.get('words') if isinstance(request.data, dict) else None
+        if not isinstance(words, list) or not words:
+            return Response({'error': 'words field must be a non empty list.'}, status=400)
+        if not all(isinstance(word, str) for word in words):
+            return Response({'error': 'words field must be a list of strings.'}, status=400)
+        if len(words) > self.max_batch_size:
+            return Response({'error': f'A maximum of {self.max_batch_size} words can be validated at once.'}, status=400)
+
+        return Response({'results': dictionary.validate(words)})
+
+    # Gets a random word of the specified length
+    @action(detail=False, methods=['get'])
+    def random(self, request):
+        try:
+            length = int(request.query_params.get('length'))
+        except (TypeError, ValueError):
+            return Response({'error': 'length parameter must be a number.'}, status=400)
+
+        dictionary = get_dictionary()
+        if not dictionary:
+            return Response({'error': 'The dictionary is not available.'}, status=503)
+
+        word = dictionary.random_word(length)
+        if word is None:
+            return Response({'error': f'No words found for length {length}.'}, status=404)
+        return Response({'word': word})
+
 class AvatarView(APIView):
     """
     API endpoint that allows getting and saving the players' avatars.
     """
     permission_classes = [permissions.IsAuthenticated]
 
-    # Gets the avatar image. Only returned if the requesting player is the owner.
+    # Gets the URLs of the avatar image and its thumbnails. Only returned if the requesting player is the owner.
     def get(self, request, user_id):
-        try:
-            user = get_object_or_404(CustomUser, id=user_id)
-            if request.user == user:
-                if user.avatar:
-                    avatar_data = user.avatar.read()
-                    return JsonResponse({'avatar': avatar_data.decode('utf-8')}, status=200, safe=False)
-                else:
-                    return Response({'detail': 'Avatar not available.'}, status=404)
-            else:
-                return Response({'detail': 'You do not have permission to get the avatar.'}, status=403)
-        except CustomUser.DoesNotExist:
-            return Response({'detail': 'The specified user does not exist.'}, status=404)
-
-    # Save the player avatar. If there is an existing one, is removed.
+        user = get_object_or_404(CustomUser, id=user_id)
+        if request.user != user:
+            return Response({'detail': 'You do not have permission to get the avatar.'}, status=403)
+        if not user.avatar or (parse_name(user.avatar.name) is None and not convert_legacy_avatar(user)):
+            return Response({'detail': 'Avatar not available.'}, status=404)
+        return Response(avatar_urls(request, user), status=200)
+
+    # Save the player avatar, sent as a file or as a data URL. If there is an existing one, is removed.
     def post(self, request, user_id):
+        user = get_object_or_404(CustomUser, id=user_id)
+        if request.user != user:
+            return Response({'detail': 'You do not have permission to upload an avatar.'}, status=403)
+
+        avatar_data = request.FILES.get('avatar') or request.data.get('avatar')
+        if not avatar_data:
+            return Response({'detail': 'No avatar image attached.'}, status=400)
         try:
-            user = get_object_or_404(CustomUser, id=user_id)
-            if request.user == user:
-                avatar_data = request.data.get('avatar')
-                if avatar_data:
-                     # Delete the existing avatar if it exists
-                    if user.avatar:
-                        user.avatar.delete()
-
-                    # Save the avatar image without encoding or decoding
-                    filename = f'{user_id}_avatar.png'
-                    user.avatar.save(filename, ContentFile(avatar_data.encode('utf-8')))
-                    return Response({'detail': 'Avatar uploaded correctly.'}, status=200)
-                else:
-                    return Response({'detail': 'No avatar image attached.'}, status=400)
+            save_avatar(user, avatar_data)
+        except AvatarError as error:
+            return Response({'detail': str(error)}, status=400)
+        return Response({'detail': 'Avatar uploaded correctly.', **avatar_urls(request, user)}, status=200)
+
+class AvatarFileView(APIView):
+    """
+    API endpoint that serves the avatar images. The URLs have the hash of the image,
+    so their content never changes and the clients cache them until they expire.
+    The URLs are signed, and they are only given to the users that can see the avatar.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, user_id, digest, size):
+        expires = check_url_signature(user_id, digest, size, request.query_params.get('expires'),
+                                      request.query_params.get('signature'))
+        if expires is None:
+            return Response({'detail': 'Invalid or expired avatar URL.'}, status=403)
+
+        parsed = parse_name(CustomUser.objects.filter(id=user_id).values_list('avatar', flat=True).first())
+        if parsed is None or parsed[0] != digest or (size != 'original' and size not in avatar_sizes()):
+            return Response({'detail': 'Avatar not available.'}, status=404)
+
+        headers = {'ETag': f'"{digest}-{size}"', 'Cache-Control': f'private, max-age={expires - int(time.time())}, immutable'}
+        if headers['ETag'] in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=304, headers=headers)
+
+        name = avatar_file_name(*parsed, size)
+        return serve_file(name, CONTENT_TYPES[name.rsplit('.', 1)[1]], headers)
+
+class AvatarBatchView(APIView):
+    """
+    API endpoint that returns the avatars of a list of users, used by the lists of
+    players (friends, rankings and brackets).
+    GET ?ids=1,2,3&size=small returns the URLs of the thumbnails, and with &inline=true
+    the thumbnails themselves as data URLs. The avatars that the player cannot see
+    and the users without avatar are null.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_batch_size = 100
+
+    def get(self, request):
+        ids = request.query_params.get('ids', '').split(',')
+        if not all(user_id.isdigit() for user_id in ids):
+            return Response({'error': 'ids parameter must be a comma separated list of user IDs.'}, status=400)
+        if len(ids) > self.max_batch_size:
+            return Response({'error': f'A maximum of {self.max_batch_size} avatars can be requested at once.'}, status=400)
+
+        size = request.query_params.get('size', 'small')
+        inline = request.query_params.get('inline') in ('true', '1')
+        if size not in avatar_sizes() and (inline or size != 'original'):
+            return Response({'error': f'size must be one of: {", ".join(avatar_sizes())}.'}, status=400)
+
+        avatars = visible_avatars(request.user, [int(user_id) for user_id in ids])
+        results = {}
+        for user_id in dict.fromkeys(int(user_id) for user_id in ids):
+            name = avatars.get(user_id)
+            parsed = parse_name(name)
+            if parsed is None:
+                results[user_id] = None
+            elif inline:
+                results[user_id] = inline_thumbnail(name, size)
             else:
-                return Response({'detail': 'You do not have permission to upload an avatar.'}, status=403)
-        except CustomUser.DoesNotExist:
-            return Response({'detail': 'The specified user does not exist.'}, status=404)   
+                results[user_id] = media_url(request, avatar_path(user_id, parsed[0], size))
+        return Response({'avatars': results}, headers={'Cache-Control': 'private, max-age=60'})
+
+# Absolute URLs of the avatar of the user and its thumbnails
+def avatar_urls(request, user):
+    paths = avatar_paths(user)
+    return {'avatar' if size == 'original' else size: media_url(request, path) for size, path in paths.items()}
 
 class NotificationsViewSet(viewsets.ModelViewSet):
     """
@@ -260,18 +515,22 @@ class NotificationsViewSet(viewsets.ModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerPermission]
     
-    # Gets limited number of notifications from the most recent to the oldest.
+    # Gets the notifications from the most recent to the oldest, in pages of ?limit=
+    # notifications. The next page is requested with the cursor of the X-Next-Cursor header.
+    # The stamp includes the unread ones, so marking them as read changes the ETag.
+    @conditional(lambda view, request: player_stamp(request, lambda player: Notification.objects.filter(player=player), 'id',
+                                                    unread=Count('pk', filter=Q(read=False))))
     def list(self, request):
-        limit = int(request.query_params.get('limit', 10))
         player = getattr(request.user, 'player', None)
 
         if not player:
             return Response({'error': 'Player not found'}, status=404)
 
-        notifications = self.queryset.filter(player=player).order_by('-timestamp')[:limit]
+        paginator = KeysetPagination(ordering=('-timestamp', '-id'), default_limit=10)
+        notifications = paginator.paginate_queryset(self.queryset.filter(player=player), request)
         serializer = self.serializer_class(notifications, many=True)
 
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
 
     def create(self, request):
         player = getattr(request.user, 'player', None)
@@ -284,10 +543,56 @@ class NotificationsViewSet(viewsets.ModelViewSet):
         serializer.save(player=player)
         return Response(serializer.data, status=201)
 
+    # The unread notifications that are deleted are discounted from the counter
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            if Notification.objects.filter(pk=instance.pk, read=False).delete()[0]:
+                add_unread(instance.player_id, -1)
+            else:
+                instance.delete()
+
+    # Gets the number of unread notifications of the player, from its counter
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        player = getattr(request.user, 'player', None)
+        if not player:
+            return Response({'error': 'Player not found'}, status=404)
+
+        return Response({'unread': unread_count(player)})
+
+    # Marks as read the notifications with the ids of {"ids": [...]}, or all the
+    # notifications of the player if no ids are sent
+    @action(detail=False, methods=['post'])
+    def mark_read(self, request):
+        player = getattr(request.user, 'player', None)
+        if not player:
+            return Response({'error': 'Player not found'}, status=404)
+
+        ids = request.data.get('ids')
+        if ids is not None and (not isinstance(ids, list) or not all(isinstance(id, int) for id in ids)):
+            return Response({'error': 'The ids must be a list of integers.'}, status=400)
+
+        marked = mark_read(player, ids)
+        return Response({'marked': marked, 'unread': unread_count(player)})
+
 class TournamentViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Tournament.objects.order_by('max_players')
     serializer_class = TournamentSerializer
 
+    # Gets the tournaments, filtered by ?word_length=, from the cached lists. The
+    # cached list is also the stamp of the ETag.
+    @conditional(lambda view, request: tournament_list_stamp(request))
+    def list(self, request, *args, **kwargs):
+        word_length = request.query_params.get('word_length')
+        if word_length and not word_length.isdigit():
+            return Response({'error': 'word_length must be a number.'}, status=400)
+
+        tournaments = get_tournament_list(word_length)
+        page = self.paginate_queryset(tournaments)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(tournaments)
+
     # Get a list of all the tournaments filtered by its word length.
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -316,6 +621,7 @@ class TournamentViewSet(viewsets.ReadOnlyModelViewSet):
 
     # Gets the tournament that the player is joined in.
     @action(detail=False, methods=['get'])
+    @conditional(lambda view, request: player_stamp(request, lambda player: Tournament.objects.filter(participation__player=player), 'updated_at'))
     def player_tournaments(self, request):
         player = getattr(request.user, 'player', None)
         if not player:
@@ -360,13 +666,41 @@ class TournamentViewSet(viewsets.ReadOnlyModelViewSet):
         if not participations.exists():
             return Response({'error': 'You are not a participant of this tournament.'}, status=403)
 
-        round_games = RoundGame.objects.filter(round=round)
-        game_ids = round_games.values_list('game__id', flat=True)
-        games = Game.objects.filter(id__in=game_ids)
+        games = Game.objects.filter(roundgame__round=round).select_related('player1__user', 'player2__user')
 
         serializer = GameDetailSerializer(games, many=True)
         return Response(serializer.data)
 
+    # Gets the whole bracket of a tournament, every round with its games, in three
+    # queries. The ETag is the time of the last change of the tournament, so the
+    # clients that poll a live bracket get a 304 while nothing changes.
+    @action(detail=True, methods=['get'])
+    def bracket(self, request, pk=None):
+        player = getattr(request.user, 'player', None)
+        participations = Participation.objects.filter(tournament=OuterRef('pk'), player=player)
+        tournament = Tournament.objects.filter(pk=pk).annotate(is_participant=Exists(participations)).first()
+        if tournament is None:
+            return Response({'error': 'Tournament not found.'}, status=404)
+        if not tournament.is_participant:
+            return Response({'error': 'You are not a participant of this tournament.'}, status=403)
+
+        etag, not_modified = check_etag(request, tournament.updated_at)
+        if not_modified is not None:
+            return not_modified
+
+        rounds = {round.id: {'number': round.number, 'games': []}
+                  for round in Round.objects.filter(tournament=tournament).order_by('number')}
+        games = list(Game.objects.filter(roundgame__round__tournament=tournament)
+                     .select_related('player1__user', 'player2__user')
+                     .annotate(round_id=F('roundgame__round_id')).order_by('roundgame__id'))
+        for game, data in zip(games, BracketGameSerializer(games, many=True).data):
+            rounds[game.round_id]['games'].append(data)
+
+        return Response({
+            'tournament': TournamentSerializer(tournament).data,
+            'rounds': list(rounds.values()),
+        }, headers=etag_headers(etag))
+
 
 class ParticipationViewSet(viewsets.ModelViewSet):
     queryset = Participation.objects.all()
@@ -393,52 +727,10 @@ class ParticipationViewSet(viewsets.ModelViewSet):
         if not player:
             return Response({'error': 'Player not found'}, status=404)
 
-        # Case of non existing tournament
         try:
-            tournament = Tournament.objects.get(id=tournament_id)
-        except Tournament.DoesNotExist:
-            return Response({'error': 'Invalid tournament ID'}, status=400)
-        
-        # Case of existing participation
-        if Participation.objects.filter(tournament_id=tournament_id, player=player).exists():
-            return Response({'error': 'You are participating in this tournament.'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Case of the tournament is closed
-        if tournament.is_closed:
-            return Response({'error': 'Tournament is closed for participation'}, status=400)
-
-        # Close the tournament if is full
-        if tournament.num_players >= tournament.max_players:
-            tournament.is_closed = True
-            tournament.save()
-            return Response({'error': 'Tournament is already full'}, status=400)
-
-        participation = Participation.objects.create(tournament=tournament, player=player)
-        tournament.num_players += 1
-        # Close the tournament if is full
-        if tournament.num_players >= tournament.max_players:
-            tournament.is_closed = True
-
-            rounds = int(math.log2(tournament.max_players))
-            for round_number in range(1, rounds+1):
-                round = Round.objects.create(tournament=tournament, number=round_number)
-                if round_number == 1:
-                    # Assign games to the first round
-                    participants = Participation.objects.filter(tournament=tournament)
-                    participants_count = participants.count()
-                    for i in range(0, participants_count, 2):
-                        player1 = participants[i].player
-                        player2 = participants[i + 1].player
-                        new_game = Game.objects.create(player1=player1, player2=player2, is_tournament_game=True)
-                        RoundGame.objects.create(round=round, game=new_game)
-                
-        tournament.save()
-
-        # Create the related notification to the player
-        message = f"You were assigned in {tournament.name}. Good luck!"
-        link = "http://localhost/tabs/tournaments"
-        notification = Notification.objects.create(player=player, text=message, link=link)
-        notification.save()
+            participation = join_tournament(Participation(tournament_id=tournament_id, player=player))
+        except JoinError as error:
+            return Response({'error': str(error)}, status=400)
 
         serializer = self.get_serializer(participation)
         return Response(serializer.data, status=201)
@@ -447,12 +739,13 @@ class FriendListViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = FriendListSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @conditional(lambda view, request: player_stamp(request, lambda player: FriendList.objects.filter(sender=player), 'id'))
     def list(self, request, *args, **kwargs):
         player = getattr(request.user, 'player', None)
         if not player:
             return Response({'error': 'Player not found'}, status=404)
 
-        queryset = FriendList.objects.filter(Q(sender=player) | Q(receiver=player))
+        queryset = FriendList.objects.filter(sender=player).select_related('receiver__user')
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
     
@@ -464,18 +757,26 @@ class FriendListViewSet(viewsets.ReadOnlyModelViewSet):
         if not player:
             return Response({'error': 'Player not found'}, status=404)
 
-        try:
-            friend = Player.objects.get(id=friend_id)
-        except Player.DoesNotExist:
-            return Response({'error': 'Friend not found'}, status=404)
-
-        if not FriendList.objects.filter(Q(sender=player, receiver=friend) | Q(sender=friend, receiver=player)).exists():
+        if not remove_friendship(player.id, friend_id):
+            if not Player.objects.filter(id=friend_id).exists():
+                return Response({'error': 'Friend not found'}, status=404)
             return Response({'error': 'Player is not friends with this user'}, status=403)
 
-        # Delete the friend relationship
-        FriendList.objects.filter(Q(sender=player, receiver=friend) | Q(sender=friend, receiver=player)).delete()
-
         return Response({'message': 'Friend relationship deleted successfully'}, status=204)
+
+    # Suggests new friends: the friends of the friends of the player, ranked by
+    # the number of mutual friends
+    @action(detail=False, methods=['get'])
+    def suggestions(self, request, *args, **kwargs):
+        player = getattr(request.user, 'player', None)
+        if not player:
+            return Response({'error': 'Player not found'}, status=404)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 10)), 50))
+        except ValueError:
+            return Response({'error': 'Invalid limit.'}, status=400)
+
+        return Response(suggestions(player.id, limit))
     
 class FriendRequestViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = FriendRequest.objects.all()
@@ -487,7 +788,7 @@ class FriendRequestViewSet(viewsets.ReadOnlyModelViewSet):
         if not player:
             return Response({'error': 'Player not found'}, status=404)
 
-        queryset = FriendRequest.objects.filter(receiver=player).order_by('timestamp')
+        queryset = FriendRequest.objects.filter(receiver=player).select_related('sender__user').order_by('timestamp')
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
@@ -516,18 +817,12 @@ class FriendRequestViewSet(viewsets.ReadOnlyModelViewSet):
             return Response({'error': 'Friend request already sent'}, status=status.HTTP_400_BAD_REQUEST)
 
         # Check if there is an existing friendship
-        existing_friendship1 = FriendList.objects.filter(sender=sender, receiver=receiver)
-        existing_friendship2 = FriendList.objects.filter(sender=receiver, receiver=sender)
-        if existing_friendship1.exists() or existing_friendship2.exists():
+        if are_friends(sender.id, receiver.id):
             return Response({'error': 'Friendship already exists'}, status=status.HTTP_400_BAD_REQUEST)
         
         # Create the request and notify it
         friend_request = FriendRequest.objects.create(sender=sender, receiver=receiver)
-        Notification.objects.create(
-            player=receiver,
-            text='You have a new friend request!',
-            link='http://localhost/friendlist'
-        )
+        notify([(receiver.id, 'You have a new friend request!', 'http://localhost/friendlist')])
 
         serializer = FriendRequestSerializer(friend_request)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -544,19 +839,13 @@ class FriendRequestViewSet(viewsets.ReadOnlyModelViewSet):
             return Response({'error': 'Permission denied'}, status=403)
 
         # Create the friendship
-        FriendList.objects.create(sender=instance.sender, receiver=receiver)
+        add_friendship(instance.sender_id, receiver.id)
 
         # Create notification for both players
-        Notification.objects.create(
-            player=instance.sender,
-            text=f"You are now friends with {receiver.user.username}.",
-            link='http://localhost/friendlist'
-        )
-        Notification.objects.create(
-            player=receiver,
-            text=f"You are now friends with {instance.sender.user.username}.",
-            link='http://localhost/friendlist'
-        )
+        notify([
+            (instance.sender_id, f"You are now friends with {receiver.user.username}.", 'http://localhost/friendlist'),
+            (receiver.id, f"You are now friends with {instance.sender.user.username}.", 'http://localhost/friendlist'),
+        ])
 
         instance.delete()
         return Response({'message': 'Friend request accepted'}, status=200)
@@ -574,7 +863,7 @@ class FriendRequestViewSet(viewsets.ReadOnlyModelViewSet):
         return Response({'message': 'Friend request rejected'}, status=200)
 
 class GameViewSet(viewsets.ModelViewSet):
-    queryset = Game.objects.all()
+    queryset = Game.objects.select_related('player1__user', 'player2__user')
     serializer_class = GameCreateSerializer
     permission_classes = [permissions.IsAuthenticated]
     http_method_names = ['get', 'post', 'patch']
@@ -588,26 +877,31 @@ class GameViewSet(viewsets.ModelViewSet):
 
     # Completed games are those which the winner is not null
     @action(detail=False, methods=['get'])
+    @conditional(lambda view, request: player_stamp(
+        request, lambda player: Game.objects.filter(Q(player1=player) | Q(player2=player), winner__isnull=False), 'id'))
     def completed_games(self, request):
-        limit = 15
         player = getattr(request.user, 'player', None)
         if not player:
             return Response({'error': 'Player not found'}, status=404)
-        
-        queryset = Game.objects.filter(Q(player1=player) | Q(player2=player), ~Q(winner=None)).order_by('-timestamp')[:limit]
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+
+        # The games as player1 and as player2 are read with their own index and merged
+        completed = self.get_queryset().filter(winner__isnull=False)
+        paginator = KeysetPagination(ordering=('-timestamp', '-id'), default_limit=15)
+        page = paginator.paginate_querysets([completed.filter(player1=player), completed.filter(player2=player)], request)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
     
     # Pending games are those which the winner is null and the player is the receiver (player2)
     @action(detail=False, methods=['get'])
     def pending_games(self, request):
-        limit = 15
         player = getattr(request.user, 'player', None)
         if not player:
             return Response({'error': 'Player not found'}, status=404)
-        queryset = Game.objects.filter(player2=player, winner=None, is_tournament_game=False).order_by('timestamp')[:limit]
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = self.get_queryset().filter(player2=player, winner=None, is_tournament_game=False)
+        paginator = KeysetPagination(ordering=('timestamp', 'id'), default_limit=15)
+        page = paginator.paginate_queryset(queryset, request)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -644,23 +938,32 @@ class GameViewSet(viewsets.ModelViewSet):
 
         if 'winner' in data:
             return Response({'error': 'The "winner" field cannot be modified.'}, status=400)
-        
+
+        # The result is computed by the server when the guesses are sent
+        guesses = request.data.get('guesses')
+        if missing_guesses(guesses):
+            return Response({'error': 'The guesses of the game are required.'}, status=400)
+        if guesses is not None:
+            result = score_submitted_guesses(data['word'], guesses, data['player1_time'])
+            if result is None:
+                return Response({'error': 'Invalid guesses.'}, status=400)
+            data['player1_xp'] = result['xp_gained']
+            data['player1_attempts'] = result['attempts']
         
         serializer = self.get_serializer(data=data)
         serializer.is_valid(raise_exception=True)
 
+        word = serializer.validated_data.get('word')
+        if word and not is_valid_word(word):
+            return Response({'error': 'Word not in list.'}, status=400)
+
         # Increment player XP
-        player1.xp += serializer.validated_data['player1_xp']
-        player1.save()
+        add_player_stats(player1, xp=serializer.validated_data['player1_xp'])
 
         serializer.save(player1=player1, player2=player2)
 
         # Create notification to the guest player
-        Notification.objects.create(
-            player=player2,
-            text=f"You have been challenged by {player1.user.username}. Let's play!",
-            link=''
-        )
+        notify([(player2.id, f"You have been challenged by {player1.user.username}. Let's play!", '')])
 
         return Response(serializer.data, status=201)
 
@@ -682,38 +985,40 @@ class GameViewSet(viewsets.ModelViewSet):
         if 'winner' in data:
             return Response({'error': 'The "winner" field cannot be modified.'}, status=400)
 
-        player2_xp = request.data.get('player2_xp')
+        # The result is computed by the server when the guesses are sent
+        guesses = request.data.get('guesses')
+        if missing_guesses(guesses):
+            return Response({'error': 'The guesses of the game are required.'}, status=400)
+        if guesses is not None:
+            result = score_submitted_guesses(instance.word, guesses, data['player2_time'])
+            if result is None:
+                return Response({'error': 'Invalid guesses.'}, status=400)
+            data['player2_xp'] = result['xp_gained']
+            data['player2_attempts'] = result['attempts']
+
+        player2_xp = data['player2_xp']
         player1_xp = instance.player1_xp
         player2_time = request.data.get('player2_time')
         player1_time = instance.player1_time
 
         # Determine the winner if all data is available.
         if player2_xp is not None:
-            player1_xp = instance.player1_xp
             if player2_xp > player1_xp:
                 instance.winner = instance.player2
-                instance.winner.wins_pvp += 1
-                instance.winner.save()
             elif player2_xp < player1_xp:
                 instance.winner = instance.player1
-                instance.winner.wins_pvp += 1
-                instance.winner.save()
+            elif player2_time <= player1_time:
+                instance.winner = instance.player2
             else:
-                if player2_time <= player1_time:
-                    instance.winner = instance.player2
-                    instance.winner.wins_pvp += 1
-                    instance.winner.save()
-                else:
-                    instance.winner = instance.player1
-                    instance.winner.wins_pvp += 1
-                    instance.winner.save()
+                instance.winner = instance.player1
 
         serializer = self.get_serializer(instance, data=data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
 
-        player.xp += serializer.validated_data['player2_xp']
-        player.save()
+        add_player_stats(player, xp=serializer.validated_data['player2_xp'], wins_pvp=int(instance.winner == player))
+        if instance.winner is not None and instance.winner != player:
+            add_player_stats(instance.winner, wins_pvp=1)
 
         return Response({'winner': instance.winner.user.username})
     
@@ -754,6 +1059,18 @@ class GameViewSet(viewsets.ModelViewSet):
         if instance.word != '':
             data.pop('word')
 
+        # The result is computed by the server when the guesses are sent
+        guesses = request.data.get('guesses')
+        if missing_guesses(guesses):
+            return Response({'error': 'The guesses of the game are required.'}, status=400)
+        if guesses is not None:
+            prefix = 'player1_' if player == instance.player1 else 'player2_'
+            result = score_submitted_guesses(data.get('word') or instance.word, guesses, data[prefix + 'time'])
+            if result is None:
+                return Response({'error': 'Invalid guesses.'}, status=400)
+            data[prefix + 'xp'] = result['xp_gained']
+            data[prefix + 'attempts'] = result['attempts']
+
         serializer = self.get_serializer(instance, data=data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
@@ -765,25 +1082,14 @@ class GameViewSet(viewsets.ModelViewSet):
         if (player_xp != 0 and player_time != 0 and opponent_xp != 0 and opponent_time != 0):
             if player_xp > opponent_xp:
                 instance.winner = player
-                instance.winner.wins_pvp += 1
-                instance.winner.save()
-                instance.save()
             elif player_xp < opponent_xp:
                 instance.winner = opponent
-                opponent.wins_pvp += 1
-                instance.winner.save()
-                instance.save()
+            elif player_time <= opponent_time:
+                instance.winner = player
             else:
-                if player_time <= opponent_time:
-                    instance.winner = player
-                    instance.winner.wins_pvp += 1
-                    instance.winner.save()
-                    instance.save()
-                else:
-                    instance.winner = opponent
-                    opponent.wins_pvp += 1
-                    instance.winner.save()
-                    instance.save()
+                instance.winner = opponent
+            instance.save()
+            add_player_stats(instance.winner, wins_pvp=1)
 
         if instance.winner is not None:
             return Response({'winner': instance.winner.user.username})
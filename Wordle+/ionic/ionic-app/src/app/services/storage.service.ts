@@ -147,8 +147,16 @@ export class StorageService {
     await this._storage?.set('avatarUrl', image);
   }
 
+  // The signed URLs of the server expire (?expires= has the time in seconds),
+  // so an expired URL is removed and the avatar has to be fetched again
   async getAvatarUrl(): Promise<string | null> {
-    return await this._storage?.get('avatarUrl') || null;
+    const avatarUrl = await this._storage?.get('avatarUrl') || null;
+    const expires = avatarUrl?.match(/[?&]expires=(\d+)/);
+    if (expires && Number(expires[1]) * 1000 <= Date.now()) {
+      await this.removeAvatarUrl();
+      return null;
+    }
+    return avatarUrl;
   }
 
   async removeAvatarUrl() {
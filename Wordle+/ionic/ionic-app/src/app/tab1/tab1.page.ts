@@ -23,6 +23,7 @@ export class Tab1Page implements OnInit{
   xP: number;
   backgroundImage: string;
   avatarImage: string;
+  avatarReloaded: boolean = false;
   isReady: boolean = false;
 
   constructor(
@@ -110,6 +111,17 @@ export class Tab1Page implements OnInit{
     }
   }
 
+  // The stored URL can fail before it expires (e.g. the clock of the device is
+  // wrong, or the server key has changed), so it is fetched again once
+  async onAvatarError() {
+    if (this.avatarReloaded || this.avatarImage === '../../assets/avatar.png') {
+      return;
+    }
+    this.avatarReloaded = true;
+    await this.storageService.removeAvatarUrl();
+    await this.loadAvatarImage();
+  }
+
   // Popover of word length selection
   async handleSelectionPopover(event: any) {
     const popover = await this.popoverController.create({